@@ -0,0 +1,33 @@
+"""add per-problem time and memory limits
+
+Revision ID: 20240921_000004
+Revises: 20240921_000003
+Create Date: 2025-09-28 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20240921_000004'
+down_revision = '20240921_000003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('problems', sa.Column('time_limit_ms', sa.Integer(), nullable=True))
+    op.add_column('problems', sa.Column('memory_limit_mb', sa.Integer(), nullable=True))
+    op.add_column('problems', sa.Column('limit_multipliers', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.create_check_constraint('ck_problems_time_limit_positive', 'problems', 'time_limit_ms IS NULL OR time_limit_ms > 0')
+    op.create_check_constraint('ck_problems_memory_limit_positive', 'problems', 'memory_limit_mb IS NULL OR memory_limit_mb > 0')
+
+
+def downgrade() -> None:
+    op.drop_constraint('ck_problems_memory_limit_positive', 'problems', type_='check')
+    op.drop_constraint('ck_problems_time_limit_positive', 'problems', type_='check')
+    op.drop_column('problems', 'limit_multipliers')
+    op.drop_column('problems', 'memory_limit_mb')
+    op.drop_column('problems', 'time_limit_ms')
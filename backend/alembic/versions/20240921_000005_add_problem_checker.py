@@ -0,0 +1,26 @@
+"""add optional checker (special judge) to problems
+
+Revision ID: 20240921_000005
+Revises: 20240921_000004
+Create Date: 2025-09-29 09:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20240921_000005'
+down_revision = '20240921_000004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('problems', sa.Column('checker_code', sa.Text(), nullable=True))
+    op.add_column('problems', sa.Column('checker_language', sa.String(length=20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('problems', 'checker_language')
+    op.drop_column('problems', 'checker_code')
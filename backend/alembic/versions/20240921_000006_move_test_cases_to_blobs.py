@@ -0,0 +1,103 @@
+"""move problem test cases out of the problems row into content-addressed blobs
+
+Revision ID: 20240921_000006
+Revises: 20240921_000005
+Create Date: 2025-10-02 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20240921_000006'
+down_revision = '20240921_000005'
+branch_labels = None
+depends_on = None
+
+# Existing problems keep their first cases visible as samples
+SAMPLE_CASES = 2
+
+
+def upgrade() -> None:
+    op.create_table(
+        'test_case_blobs',
+        sa.Column('sha256', sa.String(length=64), primary_key=True, nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_table(
+        'test_cases',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column('problem_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('problems.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('ordinal', sa.Integer(), nullable=False),
+        sa.Column('input_sha256', sa.String(length=64), sa.ForeignKey('test_case_blobs.sha256'), nullable=False),
+        sa.Column('output_sha256', sa.String(length=64), sa.ForeignKey('test_case_blobs.sha256'), nullable=False),
+        sa.Column('input_size', sa.BigInteger(), nullable=False),
+        sa.Column('output_size', sa.BigInteger(), nullable=False),
+        sa.Column('is_sample', sa.Boolean(), server_default=sa.text('false'), nullable=False),
+        sa.UniqueConstraint('problem_id', 'ordinal', name='uq_test_cases_problem_ordinal'),
+    )
+    op.create_index('ix_test_cases_problem_id', 'test_cases', ['problem_id'])
+
+    # Backfill from the JSONB array, hashing in the database so nothing is
+    # pulled through Python.
+    op.execute(
+        """
+        CREATE TEMP TABLE _cases AS
+        SELECT p.id AS problem_id,
+               (c.ord - 1)::int AS ordinal,
+               convert_to(coalesce(c.tc->>'input', ''), 'UTF8') AS input,
+               convert_to(coalesce(c.tc->>'expectedOutput', ''), 'UTF8') AS output
+        FROM problems p,
+             jsonb_array_elements(coalesce(p.test_cases, '[]'::jsonb)) WITH ORDINALITY AS c(tc, ord)
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO test_case_blobs (sha256, size, data)
+        SELECT encode(sha256(b), 'hex'), octet_length(b), b
+        FROM (SELECT input AS b FROM _cases UNION SELECT output FROM _cases) blobs
+        ON CONFLICT (sha256) DO NOTHING
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO test_cases (id, problem_id, ordinal, input_sha256, output_sha256, input_size, output_size, is_sample)
+        SELECT gen_random_uuid(), problem_id, ordinal,
+               encode(sha256(input), 'hex'), encode(sha256(output), 'hex'),
+               octet_length(input), octet_length(output), ordinal < {SAMPLE_CASES}
+        FROM _cases
+        """
+    )
+    op.execute("DROP TABLE _cases")
+    op.drop_column('problems', 'test_cases')
+
+
+def downgrade() -> None:
+    op.add_column('problems', sa.Column('test_cases', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.execute(
+        """
+        UPDATE problems p SET test_cases = agg.cases
+        FROM (
+            SELECT tc.problem_id,
+                   jsonb_agg(
+                       jsonb_build_object(
+                           'input', convert_from(i.data, 'UTF8'),
+                           'expectedOutput', convert_from(o.data, 'UTF8')
+                       )
+                       ORDER BY tc.ordinal
+                   ) AS cases
+            FROM test_cases tc
+            JOIN test_case_blobs i ON i.sha256 = tc.input_sha256
+            JOIN test_case_blobs o ON o.sha256 = tc.output_sha256
+            GROUP BY tc.problem_id
+        ) agg
+        WHERE agg.problem_id = p.id
+        """
+    )
+    op.drop_index('ix_test_cases_problem_id', table_name='test_cases')
+    op.drop_table('test_cases')
+    op.drop_table('test_case_blobs')
@@ -0,0 +1,64 @@
+"""add submissions history and per-problem/language rollup
+
+Revision ID: 20240921_000007
+Revises: 20240921_000006
+Create Date: 2025-10-06 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20240921_000007'
+down_revision = '20240921_000006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'submissions',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column('problem_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('problems.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('user_id', sa.String(length=128), nullable=False),
+        sa.Column('language', sa.String(length=20), nullable=False),
+        sa.Column('code_hash', sa.String(length=64), nullable=False),
+        sa.Column('verdict', sa.String(length=4), nullable=False),
+        sa.Column('passed_cases', sa.Integer(), nullable=False),
+        sa.Column('total_cases', sa.Integer(), nullable=False),
+        sa.Column('time_ms', sa.Float(), nullable=True),
+        sa.Column('memory_kb', sa.Integer(), nullable=True),
+        sa.Column('cases', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.create_index('ix_submissions_user_created', 'submissions', ['user_id', sa.text('created_at DESC')])
+    op.create_index('ix_submissions_user_problem_created', 'submissions', ['user_id', 'problem_id', sa.text('created_at DESC')])
+    op.create_index('ix_submissions_problem_created', 'submissions', ['problem_id', sa.text('created_at DESC')])
+    op.create_index(
+        'ix_submissions_accepted_fastest',
+        'submissions',
+        ['problem_id', 'language', 'time_ms'],
+        postgresql_where=sa.text("verdict = 'AC'"),
+    )
+
+    op.create_table(
+        'problem_language_stats',
+        sa.Column('problem_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('problems.id', ondelete='CASCADE'), primary_key=True, nullable=False),
+        sa.Column('language', sa.String(length=20), primary_key=True, nullable=False),
+        sa.Column('submissions', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('accepted', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('best_time_ms', sa.Float(), nullable=True),
+        sa.Column('best_memory_kb', sa.Integer(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('problem_language_stats')
+    op.drop_index('ix_submissions_accepted_fastest', table_name='submissions')
+    op.drop_index('ix_submissions_problem_created', table_name='submissions')
+    op.drop_index('ix_submissions_user_problem_created', table_name='submissions')
+    op.drop_index('ix_submissions_user_created', table_name='submissions')
+    op.drop_table('submissions')
@@ -0,0 +1,97 @@
+"""full-text (tsvector) and trigram search over questions, knowledge items and problems
+
+Revision ID: 20240921_000008
+Revises: 20240921_000007
+Create Date: 2025-10-08 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20240921_000008'
+down_revision = '20240921_000007'
+branch_labels = None
+depends_on = None
+
+# 'simple' neither stems nor drops stop words, which suits mixed Chinese and
+# English content; CJK runs are matched through the trigram indexes instead.
+# Keep in sync with app.services.search.SEARCH_CONFIG.
+TRIGGERS = {
+    'questions': """
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.text, '')), 'A') ||
+            setweight(to_tsvector('simple', array_to_string(coalesce(NEW.tags, '{}'), ' ')), 'C');
+    """,
+    'knowledge_items': """
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.flashcard->>'answer', '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(
+                (SELECT string_agg(p, ' ') FROM jsonb_array_elements_text(
+                    CASE WHEN jsonb_typeof(NEW.flashcard->'pitfalls') = 'array'
+                         THEN NEW.flashcard->'pitfalls' ELSE '[]'::jsonb END) AS p),
+                '')), 'C');
+    """,
+    'problems': """
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.description, '')), 'B') ||
+            setweight(to_tsvector('simple', array_to_string(coalesce(NEW.tags, '{}'), ' ')), 'C');
+    """,
+}
+# the columns each vector is built from; other updates leave it alone
+SOURCE_COLUMNS = {
+    'questions': 'text, tags',
+    'knowledge_items': 'flashcard',
+    'problems': 'title, description, tags',
+}
+TRGM_INDEXES = [
+    ('ix_questions_text_trgm', 'questions', 'text'),
+    ('ix_knowledge_items_answer_trgm', 'knowledge_items', "(flashcard ->> 'answer')"),
+    ('ix_problems_title_trgm', 'problems', 'title'),
+    ('ix_problems_description_trgm', 'problems', 'description'),
+]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    for table, body in TRIGGERS.items():
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute(
+            f"""
+            CREATE FUNCTION {table}_search_vector() RETURNS trigger AS $$
+            BEGIN
+                {body}
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+            """
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_search_vector
+            BEFORE INSERT OR UPDATE OF {SOURCE_COLUMNS[table]} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector()
+            """
+        )
+        # backfill through the trigger so the vector is defined in one place
+        first_column = SOURCE_COLUMNS[table].split(',')[0]
+        op.execute(f'UPDATE {table} SET {first_column} = {first_column}')
+        op.create_index(f'ix_{table}_search_vector', table, ['search_vector'], postgresql_using='gin')
+
+    for name, table, expr in TRGM_INDEXES:
+        op.create_index(name, table, [sa.text(f'{expr} gin_trgm_ops')], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(TRGM_INDEXES):
+        op.drop_index(name, table_name=table)
+    for table in reversed(list(TRIGGERS)):
+        op.drop_index(f'ix_{table}_search_vector', table_name=table)
+        op.execute(f'DROP TRIGGER {table}_search_vector ON {table}')
+        op.execute(f'DROP FUNCTION {table}_search_vector()')
+        op.drop_column(table, 'search_vector')
+    # pg_trgm is left installed; other objects may depend on it
@@ -0,0 +1,26 @@
+"""composite (created_at, id) indexes for keyset pagination of items and problems
+
+Revision ID: 20240921_000009
+Revises: 20240921_000008
+Create Date: 2025-10-09 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20240921_000009'
+down_revision = '20240921_000008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_knowledge_items_created_id', 'knowledge_items', [sa.text('created_at DESC'), sa.text('id DESC')])
+    op.create_index('ix_problems_created_id', 'problems', [sa.text('created_at DESC'), sa.text('id DESC')])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_problems_created_id', table_name='problems')
+    op.drop_index('ix_knowledge_items_created_id', table_name='knowledge_items')
@@ -0,0 +1,38 @@
+"""GIN indexes on tag arrays and B-tree indexes for the difficulty filters
+
+Revision ID: 20240921_000010
+Revises: 20240921_000009
+Create Date: 2025-10-10 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20240921_000010'
+down_revision = '20240921_000009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # `tags @> ARRAY[...]` (tags.contains) on both listings
+    op.create_index('ix_questions_tags', 'questions', ['tags'], postgresql_using='gin')
+    op.create_index('ix_problems_tags', 'problems', ['tags'], postgresql_using='gin')
+    # /items?difficulty= filters questions while paging knowledge_items by
+    # (created_at, id): probes by id, and the count reads only this index
+    op.create_index('ix_questions_difficulty_id', 'questions', ['difficulty', 'id'])
+    # /problems?difficulty= in listing order
+    op.create_index(
+        'ix_problems_difficulty_created_id',
+        'problems',
+        ['difficulty', sa.text('created_at DESC'), sa.text('id DESC')],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_problems_difficulty_created_id', table_name='problems')
+    op.drop_index('ix_questions_difficulty_id', table_name='questions')
+    op.drop_index('ix_problems_tags', table_name='problems')
+    op.drop_index('ix_questions_tags', table_name='questions')
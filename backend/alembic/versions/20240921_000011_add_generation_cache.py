@@ -0,0 +1,44 @@
+"""Generation cache: normalized question text -> knowledge item, with MinHash LSH buckets
+
+Revision ID: 20240921_000011
+Revises: 20240921_000010
+Create Date: 2025-10-12 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20240921_000011'
+down_revision = '20240921_000010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'generation_cache',
+        sa.Column('text_hash', sa.String(length=64), primary_key=True),
+        sa.Column('item_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('knowledge_items.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('minhash', postgresql.ARRAY(sa.BigInteger()), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('ix_generation_cache_item_id', 'generation_cache', ['item_id'])
+    # the primary key (band, bucket, text_hash) serves the candidate lookup
+    op.create_table(
+        'generation_cache_bands',
+        sa.Column('band', sa.Integer(), primary_key=True),
+        sa.Column('bucket', sa.BigInteger(), primary_key=True),
+        sa.Column('text_hash', sa.String(length=64), sa.ForeignKey('generation_cache.text_hash', ondelete='CASCADE'), primary_key=True),
+    )
+    op.create_index('ix_generation_cache_bands_text_hash', 'generation_cache_bands', ['text_hash'])
+    # existing items are added by scripts/backfill_generation_cache.py
+
+
+def downgrade() -> None:
+    op.drop_index('ix_generation_cache_bands_text_hash', table_name='generation_cache_bands')
+    op.drop_table('generation_cache_bands')
+    op.drop_index('ix_generation_cache_item_id', table_name='generation_cache')
+    op.drop_table('generation_cache')
@@ -0,0 +1,30 @@
+"""Generation drafts: sections persisted while a knowledge item is streamed
+
+Revision ID: 20240921_000012
+Revises: 20240921_000011
+Create Date: 2025-10-13 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '20240921_000012'
+down_revision = '20240921_000011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'generation_drafts',
+        sa.Column('question_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('questions.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('sections', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('generation_drafts')
@@ -0,0 +1,63 @@
+"""Normalized text hash on questions, unique, for deduplicating imports
+
+Revision ID: 20240921_000013
+Revises: 20240921_000012
+Create Date: 2025-10-14 10:00:00
+
+"""
+import hashlib
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '20240921_000013'
+down_revision = '20240921_000012'
+branch_labels = None
+depends_on = None
+
+BATCH = 5000
+
+
+def question_hash(text: str) -> str:
+    # frozen copy of app.services.generation_cache.question_hash as of this
+    # revision: NFKC, case folding and whitespace collapse, symbols kept
+    normalized = " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column('questions', sa.Column('text_hash', sa.String(length=64), nullable=True))
+
+    # The normalization (NFKC, case folding, whitespace) lives in Python, so
+    # the backfill does too. Among existing duplicates only the oldest
+    # question gets the hash; the others keep NULL, which the unique index
+    # allows.
+    conn = op.get_bind()
+    # per statement: Connection.execution_options would stream every later statement too
+    rows = conn.execute(
+        sa.text("SELECT id, text FROM questions ORDER BY created_at, id").execution_options(yield_per=BATCH)
+    )
+    update = sa.text("UPDATE questions SET text_hash = :h WHERE id = :id")
+    seen = set()
+    batch = []
+    for question_id, text in rows:
+        h = question_hash(text)
+        if h in seen:
+            continue
+        seen.add(h)
+        batch.append({"id": question_id, "h": h})
+        if len(batch) >= BATCH:
+            conn.execute(update, batch)
+            batch = []
+    if batch:
+        conn.execute(update, batch)
+
+    op.create_index('uq_questions_text_hash', 'questions', ['text_hash'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_questions_text_hash', table_name='questions')
+    op.drop_column('questions', 'text_hash')
@@ -1,16 +1,212 @@
-from sqlalchemy import create_engine
+import itertools
+import threading
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from .config import get_settings
 
 
 settings = get_settings()
-engine = create_engine(settings.database_url, pool_pre_ping=True, future=True)
+# Requests with these methods are served by a read replica when one is configured
+READ_METHODS = frozenset({"GET", "HEAD"})
+# Upper bounds (ms) of the checkout wait histogram; the last bucket is open
+WAIT_BUCKETS_MS = (1, 10, 100, 1000)
+
+
+class PoolMetrics:
+    """Checkout counts, time spent waiting for a free connection, and new connections.
+
+    The wait excludes opening a connection when the pool grows; that is
+    counted separately (`connects`, `connect_ms_*`).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.connects = 0
+        self.connect_ms_total = 0.0
+        self.connect_ms_max = 0.0
+
+    def waited(self, ms: float) -> None:
+        bucket = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if ms < bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += ms
+            self.wait_ms_max = max(self.wait_ms_max, ms)
+            self.wait_buckets[bucket] += 1
+
+    def connected(self, ms: float) -> None:
+        with self._lock:
+            self.connects += 1
+            self.connect_ms_total += ms
+            self.connect_ms_max = max(self.connect_ms_max, ms)
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self, pool: QueuePool) -> Dict[str, object]:
+        labels = [f"<{b}ms" for b in WAIT_BUCKETS_MS] + [f">={WAIT_BUCKETS_MS[-1]}ms"]
+        with self._lock:
+            return {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+                "wait_ms": dict(zip(labels, self.wait_buckets)),
+                "connects": self.connects,
+                "connect_ms_avg": round(self.connect_ms_total / self.connects, 3) if self.connects else 0.0,
+                "connect_ms_max": round(self.connect_ms_max, 3),
+            }
+
+
+class _MeteredPool:
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timed_out()
+            raise
+        if self.metrics is not None:
+            # a connection opened for this checkout is not time spent waiting
+            connect_ms = conn.__dict__.pop("connect_ms", 0.0)
+            self.metrics.waited(max((time.perf_counter() - start) * 1000 - connect_ms, 0.0))
+        return conn
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        record = super()._create_connection()
+        if self.metrics is not None:
+            record.connect_ms = (time.perf_counter() - start) * 1000
+            self.metrics.connected(record.connect_ms)
+        return record
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(_MeteredPool, QueuePool):
+    pass
+
+
+class MeteredAsyncPool(_MeteredPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_options(poolclass) -> dict:
+    return dict(
+        poolclass=poolclass,
+        # off by default: pool_recycle retires stale connections without a
+        # round-trip on every checkout
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_sec,
+        pool_recycle=settings.db_pool_recycle_sec,
+    )
+
+
+def _connect_args(asyncpg: bool) -> dict:
+    if not settings.db_statement_timeout_ms:
+        return {}
+    timeout = str(settings.db_statement_timeout_ms)
+    if asyncpg:
+        return {"server_settings": {"statement_timeout": timeout}}
+    return {"options": f"-c statement_timeout={timeout}"}
+
+
+def _async_url(url: str):
+    return make_url(url).set(drivername="postgresql+asyncpg")
+
+
+def _make_engine(name: str, url) -> Engine:
+    created = create_engine(url, future=True, connect_args=_connect_args(False), **_pool_options(MeteredQueuePool))
+    created.pool.metrics = PoolMetrics(name)
+    return created
+
+
+def _make_async_engine(name: str, url) -> AsyncEngine:
+    created = create_async_engine(url, connect_args=_connect_args(True), **_pool_options(MeteredAsyncPool))
+    created.sync_engine.pool.metrics = PoolMetrics(name)
+    return created
+
+
+# Each engine has its own pool of the configured size.
+engine = _make_engine("primary", settings.database_url)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
-def get_db():
-    db = SessionLocal()
+# Read paths served from `async def` handlers use asyncpg on the same database.
+async_database_url = settings.async_database_url or _async_url(settings.database_url)
+async_engine = _make_async_engine("async-primary", async_database_url)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+replica_engines: List[Engine] = [
+    _make_engine(f"replica-{i}", url) for i, url in enumerate(settings.database_replica_urls)
+]
+async_replica_engines: List[AsyncEngine] = [
+    _make_async_engine(f"async-replica-{i}", _async_url(url)) for i, url in enumerate(settings.database_replica_urls)
+]
+_next_replica = itertools.count()
+_replica_lock = threading.Lock()
+
+
+def _replica_index() -> int:
+    with _replica_lock:
+        return next(_next_replica) % len(replica_engines)
+
+
+def read_engine() -> Engine:
+    """A replica (round robin), or the primary when none is configured."""
+    return replica_engines[_replica_index()] if replica_engines else engine
+
+
+def async_read_engine() -> AsyncEngine:
+    return async_replica_engines[_replica_index()] if async_replica_engines else async_engine
+
+
+def get_db(request: Request):
+    # GET/HEAD handlers only read, so they go to a replica; everything else to the primary
+    db = SessionLocal(bind=read_engine()) if request.method in READ_METHODS else SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+
+async def get_async_db(request: Request):
+    bind = async_read_engine() if request.method in READ_METHODS else async_engine
+    async with AsyncSessionLocal(bind=bind) as db:
+        yield db
+
+
+def pool_stats() -> Dict[str, Dict[str, object]]:
+    """Pool usage and checkout waits per engine, to spot pool starvation."""
+    pools = [engine.pool, async_engine.sync_engine.pool]
+    pools += [e.pool for e in replica_engines] + [e.sync_engine.pool for e in async_replica_engines]
+    return {p.metrics.name: p.metrics.stats(p) for p in pools}
+
+
+async def dispose_async_engines() -> None:
+    for e in [async_engine, *async_replica_engines]:
+        await e.dispose()
@@ -1,14 +1,29 @@
+import logging
+
+from docker.errors import DockerException
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import get_settings
+from .db import dispose_async_engines, pool_stats
 from .routers.questions import router as questions_router
 from .routers.items import router as items_router
 from .routers.problems import router as problems_router
 from .routers.execute import router as execute_router
+from .routers.submissions import router as submissions_router
+from .routers.search import router as search_router
+from .services.container_pool import get_pool, shutdown_pool
+from .services.generation import shutdown_generation_queue
+from .services.images import get_image_manager, shutdown_image_manager
+from .services.judge_queue import shutdown_judge_queue
+from .services.provider_registry import shutdown_provider_router
+from .services.question_import import shutdown_import_queue
+from .services.sandbox import LANGUAGE_MAP
+from .services.submissions import shutdown_submission_recorder
 
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="InterviewAce Backend", version="0.1.0")
 
@@ -27,12 +42,51 @@ app.add_middleware(
 )
 
 
+@app.on_event("startup")
+def start_sandbox():
+    get_image_manager().start()
+    if settings.sandbox_pool_enabled:
+        try:
+            get_pool().start()
+        except DockerException as exc:
+            # Executions fall back to cold starts once Docker becomes reachable.
+            logger.warning("sandbox pool disabled: %s", exc)
+
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    shutdown_judge_queue()
+    shutdown_generation_queue()
+    shutdown_import_queue()
+    # after the generation queue, whose jobs may still be calling providers
+    shutdown_provider_router()
+    # after the judge queue, so results of jobs still finishing are written
+    shutdown_submission_recorder()
+    shutdown_pool()
+    shutdown_image_manager()
+
+
+@app.on_event("shutdown")
+async def close_async_engines():
+    await dispose_async_engines()
+
+
 @app.get("/health")
 def health():
-    return {"status": "ok", "env": settings.env}
+    images = get_image_manager().readiness()
+    sandbox = {lang: images[cfg.image]["ready"] for lang, cfg in LANGUAGE_MAP.items()}
+    return {"status": "ok", "env": settings.env, "sandbox": sandbox}
+
+
+@app.get("/health/db")
+def db_health():
+    # checkout waits and timeouts per engine: latency from pool starvation shows up here
+    return {"pools": pool_stats()}
 
 
 app.include_router(questions_router)
 app.include_router(items_router)
 app.include_router(problems_router)
 app.include_router(execute_router)
+app.include_router(submissions_router)
+app.include_router(search_router)
@@ -1,8 +1,8 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import BigInteger, Boolean, Column, String, Text, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import UUID, JSONB, ARRAY, TSVECTOR
+from sqlalchemy.orm import declarative_base, deferred, relationship
 
 
 Base = declarative_base()
@@ -10,17 +10,37 @@ Base = declarative_base()
 
 class Question(Base):
     __tablename__ = "questions"
+    __table_args__ = (
+        Index("ix_questions_search_vector", "search_vector", postgresql_using="gin"),
+        # substring / fuzzy matches (ILIKE, similarity), which also covers CJK text
+        Index("ix_questions_text_trgm", "text", postgresql_using="gin", postgresql_ops={"text": "gin_trgm_ops"}),
+        # /items?tag= (array containment) and ?difficulty=
+        Index("ix_questions_tags", "tags", postgresql_using="gin"),
+        Index("ix_questions_difficulty_id", "difficulty", "id"),
+        # one question per normalized text (NULL for duplicates that predate it)
+        Index("uq_questions_text_hash", "text_hash", unique=True),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     text = Column(Text, nullable=False)
     tags = Column(ARRAY(String), nullable=True)
     difficulty = Column(String(10), nullable=True)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    # sha256 of the normalized text, see generation_cache.question_hash
+    text_hash = Column(String(64), nullable=True)
+    # maintained by the questions_search_vector trigger (text, tags)
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     item = relationship("KnowledgeItem", back_populates="question", uselist=False)
 
 
 class KnowledgeItem(Base):
     __tablename__ = "knowledge_items"
+    __table_args__ = (
+        Index("ix_knowledge_items_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_knowledge_items_answer_trgm", text("(flashcard ->> 'answer') gin_trgm_ops"), postgresql_using="gin"),
+        # keyset pagination, newest first
+        Index("ix_knowledge_items_created_id", text("created_at DESC"), text("id DESC")),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id"), nullable=False, index=True)
     flashcard = Column(JSONB)
@@ -29,22 +49,143 @@ class KnowledgeItem(Base):
     project_usage = Column(Text)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+    # maintained by the knowledge_items_search_vector trigger (flashcard answer, pitfalls)
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     question = relationship("Question", back_populates="item")
 
 
 class Problem(Base):
     __tablename__ = "problems"
+    __table_args__ = (
+        Index("ix_problems_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_problems_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_problems_description_trgm", "description", postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"}),
+        # keyset pagination, newest first
+        Index("ix_problems_created_id", text("created_at DESC"), text("id DESC")),
+        # /problems?tag= and ?difficulty= (in listing order)
+        Index("ix_problems_tags", "tags", postgresql_using="gin"),
+        Index("ix_problems_difficulty_created_id", "difficulty", text("created_at DESC"), text("id DESC")),
+    )
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
     difficulty = Column(String(10), nullable=True)
     solution_code = Column(Text, nullable=False)
     solution_language = Column(String(20), nullable=False)
-    test_cases = Column(JSONB)
     solution_snippets = Column(JSONB)
     default_language = Column(String(20), nullable=True)
     tags = Column(ARRAY(String), nullable=True)
     editorial = Column(Text, nullable=True)
+    # NULL falls back to the configured defaults
+    time_limit_ms = Column(Integer, nullable=True)
+    memory_limit_mb = Column(Integer, nullable=True)
+    # {"java": {"time": 2.0, "memory": 2.0}}; overrides the language defaults
+    limit_multipliers = Column(JSONB, nullable=True)
+    # Special judge, run as `checker <input> <output> <answer>` (testlib style)
+    checker_code = Column(Text, nullable=True)
+    checker_language = Column(String(20), nullable=True)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+    # maintained by the problems_search_vector trigger (title, description, tags)
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
+
+    cases = relationship("TestCase", order_by="TestCase.ordinal", cascade="all, delete-orphan", back_populates="problem")
+
+
+class TestCase(Base):
+    """One judge case; input and expected output are blobs referenced by hash."""
+    __tablename__ = "test_cases"
+    __table_args__ = (UniqueConstraint("problem_id", "ordinal", name="uq_test_cases_problem_ordinal"),)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    problem_id = Column(UUID(as_uuid=True), ForeignKey("problems.id", ondelete="CASCADE"), nullable=False, index=True)
+    ordinal = Column(Integer, nullable=False)
+    input_sha256 = Column(String(64), ForeignKey("test_case_blobs.sha256"), nullable=False)
+    output_sha256 = Column(String(64), ForeignKey("test_case_blobs.sha256"), nullable=False)
+    input_size = Column(BigInteger, nullable=False)
+    output_size = Column(BigInteger, nullable=False)
+    # samples are shown with the problem; the rest stay hidden
+    is_sample = Column(Boolean, nullable=False, default=False)
+
+    problem = relationship("Problem", back_populates="cases")
+
+
+class TestCaseBlob(Base):
+    """Content-addressed test data, shared by every case with the same bytes."""
+    __tablename__ = "test_case_blobs"
+    sha256 = Column(String(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    # never loaded with the row; the test-case store copies it to local disk
+    data = deferred(Column(LargeBinary, nullable=False))
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+
+class Submission(Base):
+    """A judged submission; written in batches by the submission recorder."""
+    __tablename__ = "submissions"
+    __table_args__ = (
+        # "my recent submissions" (optionally for one problem)
+        Index("ix_submissions_user_created", "user_id", text("created_at DESC")),
+        Index("ix_submissions_user_problem_created", "user_id", "problem_id", text("created_at DESC")),
+        # recent submissions per problem
+        Index("ix_submissions_problem_created", "problem_id", text("created_at DESC")),
+        # fastest accepted runs per problem and language
+        Index(
+            "ix_submissions_accepted_fastest",
+            "problem_id",
+            "language",
+            "time_ms",
+            postgresql_where=text("verdict = 'AC'"),
+        ),
+    )
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    problem_id = Column(UUID(as_uuid=True), ForeignKey("problems.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(String(128), nullable=False)
+    language = Column(String(20), nullable=False)
+    code_hash = Column(String(64), nullable=False)  # sha256 of the source
+    verdict = Column(String(4), nullable=False)
+    passed_cases = Column(Integer, nullable=False)
+    total_cases = Column(Integer, nullable=False)
+    # CPU time summed over cases (wall time when unavailable) and peak RSS
+    time_ms = Column(Float, nullable=True)
+    memory_kb = Column(Integer, nullable=True)
+    # [{"verdict", "timeMs", "cpuTimeMs", "memoryKb"}] in case order
+    cases = Column(JSONB, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+
+class ProblemLanguageStats(Base):
+    """Per problem and language totals, folded in as submissions are written."""
+    __tablename__ = "problem_language_stats"
+    problem_id = Column(UUID(as_uuid=True), ForeignKey("problems.id", ondelete="CASCADE"), primary_key=True)
+    language = Column(String(20), primary_key=True)
+    submissions = Column(Integer, nullable=False, default=0)
+    accepted = Column(Integer, nullable=False, default=0)
+    best_time_ms = Column(Float, nullable=True)  # fastest accepted
+    best_memory_kb = Column(Integer, nullable=True)  # smallest accepted
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class GenerationDraft(Base):
+    """Sections streamed so far for a question whose item is not complete yet."""
+    __tablename__ = "generation_drafts"
+    question_id = Column(UUID(as_uuid=True), ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    sections = Column(JSONB, nullable=False)  # {section: value}
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class GenerationCacheEntry(Base):
+    """The knowledge item generated for a normalized question text."""
+    __tablename__ = "generation_cache"
+    text_hash = Column(String(64), primary_key=True)  # sha256 of the normalized text
+    item_id = Column(UUID(as_uuid=True), ForeignKey("knowledge_items.id", ondelete="CASCADE"), nullable=False, index=True)
+    minhash = Column(ARRAY(BigInteger), nullable=True)  # signature for near-duplicate matching
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+
+class GenerationCacheBand(Base):
+    """LSH buckets of an entry's MinHash signature; near-duplicates share a bucket."""
+    __tablename__ = "generation_cache_bands"
+    band = Column(Integer, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    text_hash = Column(String(64), ForeignKey("generation_cache.text_hash", ondelete="CASCADE"), primary_key=True, index=True)
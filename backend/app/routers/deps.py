@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from fastapi import Request
+
+
+def get_owner(request: Request) -> str:
+    """Who is calling.
+
+    No auth yet: callers may identify themselves with `X-User-Id`, otherwise
+    the client address stands in.
+    """
+    return request.headers.get("x-user-id") or (request.client.host if request.client else "anonymous")
@@ -1,61 +1,109 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
 
+from app.config import get_settings
 from app.db import get_db
 from app import models
-from app.schemas import ExecuteRequest, ExecuteResponse, CaseResult
-from app.services.sandbox import execute_code
-from app.services.judge import compare_outputs
+from app.routers.deps import get_owner
+from app.schemas import ExecuteRequest, ExecuteResponse, JudgeJobOut
+from app.services.sandbox import LANGUAGE_MAP
+from app.services.container_pool import get_pool
+from app.services.jobs import JobRejected
+from app.services.judge_queue import get_judge_queue, serialize_job
+from app.services.runner import run_submission
+from app.services.scheduler import get_case_slots
+from app.services.submissions import record_submission
+from app.services.verdict_cache import get_verdict_cache
 
 
 router = APIRouter(prefix="/api/v1", tags=["execute"])
 
 
+@router.get("/execute/pool")
+def pool_stats():
+    if not get_settings().sandbox_pool_enabled:
+        return {"enabled": False, "images": {}, "languages": {}, "slots": get_case_slots().stats()}
+    images = get_pool().stats()
+    languages = {
+        lang: images.get(cfg.image, {}).get("size", 0)
+        for lang, cfg in LANGUAGE_MAP.items()
+    }
+    return {"enabled": True, "images": images, "languages": languages, "slots": get_case_slots().stats()}
+
+
+@router.get("/execute/cache")
+def verdict_cache_stats():
+    cache = get_verdict_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
 @router.post("/execute", response_model=ExecuteResponse)
-def execute(req: ExecuteRequest, db: Session = Depends(get_db)):
-    # If problem_id specified, run per test case and aggregate
+def execute(req: ExecuteRequest, db: Session = Depends(get_db), owner: str = Depends(get_owner)):
+    p = None
     if req.problem_id:
         p = db.get(models.Problem, req.problem_id)
         if not p:
             raise HTTPException(status_code=404, detail="problem not found")
-        cases: List[CaseResult] = []
-        all_passed = True
-        last_stdout = ""
-        last_stderr = ""
-        exec_time = "0ms"
-        status = "success"
-        for c in p.test_cases or []:
-            stdin = (c.get("input") or "")
-            expected = (c.get("expectedOutput") or "")
-            res = execute_code(req.language, req.code, stdin)
-            actual = res.get("stdout") or ""
-            last_stdout = actual
-            last_stderr = res.get("stderr") or ""
-            exec_time = res.get("executionTime") or "0ms"
-            status = res.get("status") or "success"
-            passed, _ = compare_outputs(expected, actual, req.match or "exact", req.float_tolerance or 1e-6)
-            passed = passed and status == "success" and (not last_stderr)
-            all_passed = all_passed and passed
-            cases.append(CaseResult(expected=expected, actual=actual, passed=passed))
-        return ExecuteResponse(
-            stdout=last_stdout,
-            stderr=last_stderr,
-            executionTime=exec_time,
-            memory="",
-            status=status,
-            passed=all_passed,
-            cases=cases,
-        )
-
-    # Single run using provided stdin
-    res = execute_code(req.language, req.code, req.stdin or "")
-    return ExecuteResponse(
-        stdout=res.get("stdout", ""),
-        stderr=res.get("stderr", ""),
-        executionTime=res.get("executionTime", "0ms"),
-        memory=res.get("memory", ""),
-        status=res.get("status", "success"),
-    )
+    res = run_submission(req, p)
+    if p is not None:
+        record_submission(owner, req, p, res)
+    return res
+
+
+@router.post("/execute/jobs", response_model=JudgeJobOut, status_code=status.HTTP_202_ACCEPTED)
+def submit_judge_job(req: ExecuteRequest, db: Session = Depends(get_db), owner: str = Depends(get_owner)):
+    if req.problem_id and not db.get(models.Problem, req.problem_id):
+        raise HTTPException(status_code=404, detail="problem not found")
+    q = get_judge_queue()
+    try:
+        job = q.submit(owner, {"owner": owner, "request": req.model_dump(mode="json")})
+    except JobRejected as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "1"})
+    return serialize_job(job, q.position(job.id))
+
+
+@router.get("/execute/jobs/metrics")
+def judge_queue_metrics():
+    return get_judge_queue().metrics()
+
+
+def _own_job(job_id: str, owner: str):
+    # someone else's job is reported as missing, so ids reveal nothing
+    job = get_judge_queue().get(job_id)
+    if not job or job.owner != owner:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
+@router.get("/execute/jobs/{job_id}", response_model=JudgeJobOut)
+def get_judge_job(job_id: str, owner: str = Depends(get_owner)):
+    job = _own_job(job_id, owner)
+    return serialize_job(job, get_judge_queue().position(job_id))
+
+
+@router.get("/execute/jobs/{job_id}/events")
+def stream_judge_job(job_id: str, owner: str = Depends(get_owner)):
+    _own_job(job_id, owner)
+    q = get_judge_queue()
+
+    def events():
+        seen = None
+        while True:
+            job = q.wait(job_id, seen, timeout=15)
+            if job is None:
+                return
+            if job.status == seen:
+                yield ": keep-alive\n\n"
+                continue
+            seen = job.status
+            data = serialize_job(job, q.position(job_id)).model_dump_json()
+            yield f"event: {job.status}\ndata: {data}\n\n"
+            if job.finished:
+                return
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
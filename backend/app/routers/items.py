@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import select, func
 from typing import Optional
 from uuid import UUID
 
-from app.db import get_db
+from app.db import get_async_db, get_db
 from app import models
 from app.schemas import (
     KnowledgeItemOut,
@@ -14,14 +15,16 @@ from app.schemas import (
     PaginatedKnowledgeItems,
 )
 from app.serializers import serialize_knowledge_item
+from app.services.pagination import count_total, keyset_page
 
 
 router = APIRouter(prefix="/api/v1", tags=["items"])
 
 
 @router.get("/items/{item_id}", response_model=KnowledgeItemOut)
-def get_item(item_id: UUID, db: Session = Depends(get_db)):
-    item = db.get(models.KnowledgeItem, item_id)
+async def get_item(item_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    # the question is serialized too; lazy loads are not available on AsyncSession
+    item = await db.get(models.KnowledgeItem, item_id, options=[joinedload(models.KnowledgeItem.question)])
     if not item:
         raise HTTPException(status_code=404, detail="item not found")
     return serialize_knowledge_item(item)
@@ -49,13 +52,15 @@ def update_item(item_id: UUID, payload: KnowledgeItemUpdate, db: Session = Depen
 
 
 @router.get("/items", response_model=PaginatedKnowledgeItems)
-def list_items(
+async def list_items(
     q: Optional[str] = None,
     tag: Optional[str] = None,
     difficulty: Optional[str] = Query(default=None, pattern=r"^(easy|medium|hard)$"),
     page: int = 1,
     page_size: int = 20,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(default=None, description="keyset mode; empty for the first page"),
+    total: Optional[str] = Query(default=None, pattern=r"^(exact|approx|none)$", description="exact by default in page mode, none in cursor mode"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     if page < 1:
         page = 1
@@ -69,6 +74,7 @@ def list_items(
         stmt_base = stmt_base.join(models.Question, models.Question.id == models.KnowledgeItem.question_id)
 
     if q:
+        # served by the ix_questions_text_trgm index; /search ranks results
         filters.append(models.Question.text.ilike(f"%{q}%"))
     if tag:
         # array contains
@@ -80,19 +86,36 @@ def list_items(
         stmt_base = stmt_base.where(*filters)
 
     # total count
-    total_stmt = select(func.count(models.KnowledgeItem.id)).join(models.Question, models.Question.id == models.KnowledgeItem.question_id)
+    total_stmt = select(func.count(models.KnowledgeItem.id))
     if filters:
-        total_stmt = total_stmt.where(*filters)
-    total = db.scalar(total_stmt) or 0
+        total_stmt = total_stmt.join(models.Question, models.Question.id == models.KnowledgeItem.question_id).where(*filters)
+    cursor_mode = cursor is not None
+    total_count = await count_total(
+        db,
+        total or ("none" if cursor_mode else "exact"),
+        total_stmt,
+        table=None if filters else models.KnowledgeItem.__tablename__,
+    )
+
+    if cursor_mode:
+        # (created_at, id) keyset on ix_knowledge_items_created_id: no OFFSET scan
+        try:
+            rows, next_cursor = await keyset_page(
+                db, stmt_base, models.KnowledgeItem.created_at, models.KnowledgeItem.id, cursor, page_size
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid cursor")
+        items = [serialize_knowledge_item(r) for r in rows]
+        return PaginatedKnowledgeItems(items=items, total=total_count, page_size=page_size, next_cursor=next_cursor)
 
     stmt = (
-        stmt_base.order_by(models.KnowledgeItem.created_at.desc())
+        stmt_base.order_by(models.KnowledgeItem.created_at.desc(), models.KnowledgeItem.id.desc())
         .offset((page - 1) * page_size)
         .limit(page_size)
     )
-    rows = db.execute(stmt).scalars().unique().all()
+    rows = (await db.execute(stmt)).scalars().unique().all()
     items = [serialize_knowledge_item(r) for r in rows]
-    return PaginatedKnowledgeItems(items=items, total=total, page=page, page_size=page_size)
+    return PaginatedKnowledgeItems(items=items, total=total_count, page=page, page_size=page_size)
 
 
 @router.get("/items/{item_id}/export")
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from typing import Dict, Optional, List
+from typing import Dict, Optional, List, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, select
+from pathlib import Path
 from uuid import UUID
 
-from app.db import get_db
+from app.config import get_settings
+from app.db import get_async_db, get_db
 from app import models
 from app.schemas import (
     ProblemOut,
@@ -16,64 +20,128 @@ from app.schemas import (
     ProblemTestCase,
     ProblemListItem,
     ProblemEditorialResponse,
+    PaginatedProblems,
 )
+from app.services.pagination import count_total, keyset_page
+from app.services.testcases import get_test_case_store, save_cases
 
 
 router = APIRouter(prefix="/api/v1", tags=["problems"])
 
 
-@router.get("/problems", response_model=List[ProblemListItem])
-def list_problems(difficulty: Optional[str] = Query(default=None), tag: Optional[str] = Query(default=None), db: Session = Depends(get_db)):
-    stmt = select(models.Problem)
+def _list_item(p: models.Problem) -> ProblemListItem:
+    solutions_map: Dict[str, Dict[str, str]] = p.solution_snippets or {}
+    languages = list(solutions_map.keys())
+    if not languages and p.solution_language:
+        languages = [p.solution_language]
+    return ProblemListItem(
+        id=p.id,
+        title=p.title,
+        difficulty=p.difficulty,
+        tags=p.tags,
+        solution_languages=languages,
+    )
+
+
+@router.get("/problems", response_model=Union[PaginatedProblems, List[ProblemListItem]])
+async def list_problems(
+    difficulty: Optional[str] = Query(default=None),
+    tag: Optional[str] = Query(default=None),
+    cursor: Optional[str] = Query(default=None, description="keyset mode; empty for the first page"),
+    page_size: int = 20,
+    total: str = Query(default="none", pattern=r"^(exact|approx|none)$"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    filters = []
     if difficulty:
-        stmt = stmt.where(models.Problem.difficulty == difficulty)
+        filters.append(models.Problem.difficulty == difficulty)
     if tag:
-        stmt = stmt.where(models.Problem.tags.contains([tag]))
-    stmt = stmt.order_by(models.Problem.created_at.desc())
-    rows = db.execute(stmt).scalars().all()
-    items: List[ProblemListItem] = []
-    for p in rows:
-        solutions_map: Dict[str, Dict[str, str]] = p.solution_snippets or {}
-        languages = list(solutions_map.keys())
-        if not languages and p.solution_language:
-            languages = [p.solution_language]
-        items.append(
-            ProblemListItem(
-                id=p.id,
-                title=p.title,
-                difficulty=p.difficulty,
-                tags=p.tags,
-                solution_languages=languages,
-            )
+        filters.append(models.Problem.tags.contains([tag]))
+    stmt = select(models.Problem).where(*filters)
+
+    if cursor is None:
+        # without a cursor: the whole list, as before
+        rows = (await db.execute(stmt.order_by(models.Problem.created_at.desc(), models.Problem.id.desc()))).scalars().all()
+        return [_list_item(p) for p in rows]
+
+    if page_size < 1 or page_size > 100:
+        page_size = 20
+    try:
+        rows, next_cursor = await keyset_page(db, stmt, models.Problem.created_at, models.Problem.id, cursor, page_size)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    total_count = await count_total(
+        db,
+        total,
+        select(func.count(models.Problem.id)).where(*filters),
+        table=None if filters else models.Problem.__tablename__,
+    )
+    return PaginatedProblems(
+        items=[_list_item(p) for p in rows],
+        total=total_count,
+        page_size=page_size,
+        next_cursor=next_cursor,
+    )
+
+
+def _read_samples(samples: List[models.TestCase], paths: Dict[str, Path]) -> List[ProblemTestCase]:
+    return [
+        ProblemTestCase(
+            input=paths[c.input_sha256].read_text(encoding="utf-8", errors="replace"),
+            expectedOutput=paths[c.output_sha256].read_text(encoding="utf-8", errors="replace"),
+            sample=True,
         )
-    return items
+        for c in samples
+    ]
 
 
-@router.get("/problems/{problem_id}", response_model=ProblemOut)
-def get_problem(problem_id: UUID, db: Session = Depends(get_db)):
-    p = db.get(models.Problem, problem_id)
-    if not p:
-        raise HTTPException(status_code=404, detail="problem not found")
+def _sample_hashes(p: models.Problem) -> List[str]:
+    return [h for c in p.cases if c.is_sample for h in (c.input_sha256, c.output_sha256)]
+
+
+def _problem_out(p: models.Problem, paths: Dict[str, Path]) -> ProblemOut:
     solutions_map: Dict[str, Dict[str, str]] = p.solution_snippets or {}
     languages = list(solutions_map.keys())
     if not languages and p.solution_language:
         languages = [p.solution_language]
     default_language = p.default_language or (languages[0] if languages else p.solution_language)
-    test_cases_data = p.test_cases or []
-    serialized_cases = [ProblemTestCase(**tc) for tc in test_cases_data]
     return ProblemOut(
         id=p.id,
         title=p.title,
         description=p.description,
         difficulty=p.difficulty,
         tags=p.tags,
-        test_cases=serialized_cases,
+        test_cases=_read_samples([c for c in p.cases if c.is_sample], paths),
+        test_case_count=len(p.cases),
         solution_languages=languages,
         default_language=default_language,
         has_editorial=bool(p.editorial),
+        has_checker=bool(p.checker_code),
+        time_limit_ms=p.time_limit_ms or get_settings().problem_time_limit_ms,
+        memory_limit_mb=p.memory_limit_mb or get_settings().problem_memory_limit_mb,
     )
 
 
+@router.get("/problems/{problem_id}", response_model=ProblemOut)
+async def get_problem(problem_id: UUID, db: AsyncSession = Depends(get_async_db)):
+    p = await db.get(models.Problem, problem_id, options=[selectinload(models.Problem.cases)])
+    if not p:
+        raise HTTPException(status_code=404, detail="problem not found")
+    # hidden cases stay in the test-case store; only samples are read. Only
+    # the query runs on the event loop: file checks and writes go to threads.
+    store = get_test_case_store()
+    hashes = _sample_hashes(p)
+    missing = await run_in_threadpool(store.missing, hashes)
+    if missing:
+        async for sha256, data in await db.stream(store.blob_query(missing)):
+            await run_in_threadpool(store.save_fetched, sha256, data)
+    try:
+        paths = await run_in_threadpool(store.paths, hashes)
+    except LookupError as exc:
+        raise HTTPException(status_code=500, detail=f"problem {problem_id}: {exc}")
+    return await run_in_threadpool(_problem_out, p, paths)
+
+
 @router.get("/problems/{problem_id}/solution", response_model=ProblemSolutionResponse)
 def get_problem_solution(problem_id: UUID, language: Optional[str] = Query(default=None), db: Session = Depends(get_db)):
     p = db.get(models.Problem, problem_id)
@@ -117,15 +185,24 @@ def import_problem(payload: ProblemImportRequest, db: Session = Depends(get_db))
         solution_code=payload.solutions[0].code,
         solution_snippets=solution_map,
         default_language=default_lang,
-        test_cases=[tc.model_dump() for tc in payload.test_cases],
         editorial=payload.editorial,
+        time_limit_ms=payload.time_limit_ms,
+        memory_limit_mb=payload.memory_limit_mb,
+        limit_multipliers=(
+            {lang.lower(): m.model_dump() for lang, m in payload.limit_multipliers.items()}
+            if payload.limit_multipliers
+            else None
+        ),
+        checker_code=payload.checker_code,
+        checker_language=payload.checker_language.lower() if payload.checker_code and payload.checker_language else None,
     )
 
     db.add(problem)
+    save_cases(db, problem, ((tc.input, tc.expectedOutput, tc.sample) for tc in payload.test_cases))
     db.commit()
     db.refresh(problem)
 
-    return get_problem(problem.id, db)
+    return _problem_out(problem, get_test_case_store().materialize(db, _sample_hashes(problem)))
 
 
 @router.get("/problems/{problem_id}/editorial", response_model=ProblemEditorialResponse)
@@ -1,19 +1,39 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from uuid import UUID
 
-from app.db import get_db
+from app.config import get_settings
+from app.db import get_async_db, get_db
 from app import models
+from app.routers.deps import get_owner
 from app.schemas import (
+    BulkGenerateRequest,
     BulkQuestionsCreate,
+    GenerationJobOut,
+    ImportJobOut,
     QuestionCreate,
     QuestionOut,
     GenerateRequest,
     KnowledgeItemOut,
 )
-from app.services.llm_provider import get_provider
+from app.services.generation import get_generation_queue, stream_item
+from app.services.generation_cache import get_generation_cache
+from app.services.jobs import Job, JobRejected
+from app.services.llm_provider import ProviderError, get_provider
+from app.services.provider_registry import get_provider_router
+from app.services.question_import import get_import_queue, question_row
 from app.serializers import serialize_knowledge_item
 
 
@@ -22,25 +42,84 @@ router = APIRouter(prefix="/api/v1", tags=["questions"])
 
 @router.post("/questions", response_model=list[QuestionOut])
 def create_questions(payload: BulkQuestionsCreate, db: Session = Depends(get_db)):
-    created = []
+    # One multi-row INSERT and one SELECT for the whole payload. An item whose
+    # normalized text is already stored (or repeated) gets that question back.
+    rows = {}
+    hashes = []
     for item in payload.items:
-        q = models.Question(text=item.text, tags=item.tags, difficulty=item.difficulty)
-        db.add(q)
-        created.append(q)
-    db.commit()
-    for q in created:
-        db.refresh(q)
-    return [QuestionOut(id=q.id, text=q.text, tags=q.tags, difficulty=q.difficulty) for q in created]
+        row = question_row(item)
+        rows.setdefault(row["text_hash"], row)
+        hashes.append(row["text_hash"])
+    if rows:
+        db.execute(insert(models.Question).on_conflict_do_nothing(index_elements=["text_hash"]), list(rows.values()))
+        db.commit()
+    stored = {
+        q.text_hash: q
+        for q in db.execute(select(models.Question).where(models.Question.text_hash.in_(list(rows)))).scalars()
+    }
+    return [QuestionOut(id=q.id, text=q.text, tags=q.tags, difficulty=q.difficulty) for q in (stored[h] for h in hashes)]
+
+
+@router.post("/questions/import", response_model=ImportJobOut, status_code=status.HTTP_202_ACCEPTED)
+async def import_questions(
+    request: Request,
+    format: str = Query("jsonl", pattern="^(jsonl|csv)$"),
+    method: str = Query("copy", pattern="^(copy|insert)$"),
+    owner: str = Depends(get_owner),
+):
+    """Queue an import of the request body (JSONL or CSV); see services/question_import.py."""
+    limit = get_settings().question_import_max_mb * 1024 * 1024
+    size = 0
+    # spooled to disk so the upload is not held in memory and the job can run after the request
+    with tempfile.NamedTemporaryFile("wb", prefix="question-import-", delete=False) as f:
+        try:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > limit:
+                    raise HTTPException(status_code=413, detail=f"at most {limit // (1024 * 1024)} MB per import")
+                f.write(chunk)
+        except HTTPException:
+            os.unlink(f.name)
+            raise
+    q = get_import_queue()
+    try:
+        job = q.submit(owner, {"path": f.name, "format": format, "method": method})
+    except JobRejected as exc:
+        os.unlink(f.name)
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "5"})
+    return _serialize_import_job(job, q.position(job.id))
+
+
+@router.get("/questions/import/{job_id}", response_model=ImportJobOut)
+def get_import_job(job_id: str):
+    q = get_import_queue()
+    job = q.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    return _serialize_import_job(job, q.position(job_id))
 
 
 @router.post("/generate", response_model=KnowledgeItemOut)
-def generate_item(req: GenerateRequest, db: Session = Depends(get_db)):
+def generate_item(req: GenerateRequest, response: Response, db: Session = Depends(get_db)):
     q: models.Question | None = db.get(models.Question, req.question_id)
     if not q:
         raise HTTPException(status_code=404, detail="question not found")
 
-    provider = get_provider()
-    data = provider.generate_from_question(q.text)
+    cache = get_generation_cache()
+    hit = None
+    cache_status = "off" if cache is None else "bypass"
+    if cache is not None and not req.bypass_cache:
+        hit = cache.lookup(db, q.text)
+        cache_status = hit.kind if hit else "miss"
+    elif cache is not None:
+        cache.bypassed()
+    # exact | near (content of a similar question's item) | miss | bypass | off
+    response.headers["X-Generation-Cache"] = cache_status
+    try:
+        data = hit.payload if hit else get_provider().generate_from_question(q.text)
+    except ProviderError as exc:
+        # every provider failed or is unavailable; the stream path sends this as `error`
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "5"})
 
     item = models.KnowledgeItem(
         question_id=q.id,
@@ -51,7 +130,107 @@ def generate_item(req: GenerateRequest, db: Session = Depends(get_db)):
     )
     db.add(item)
     db.commit()
+    if cache is not None and hit is None:
+        cache.store(db, q.text, item.id)
+        db.commit()
     db.refresh(item)
 
     # Assemble response using simple dict passthrough for nested structures
     return serialize_knowledge_item(item)
+
+
+@router.post("/generate/stream")
+async def generate_item_stream(req: GenerateRequest, db: AsyncSession = Depends(get_async_db)):
+    """Server-sent events: one `section` event per generated section, then `done` (or `error`)."""
+    q: models.Question | None = await db.get(models.Question, req.question_id)
+    if not q:
+        raise HTTPException(status_code=404, detail="question not found")
+
+    cache = get_generation_cache()
+    if cache is not None and req.bypass_cache:
+        cache.bypassed()
+    sections = stream_item(get_provider(), q.id, q.text, use_cache=cache is not None and not req.bypass_cache)
+
+    async def events():
+        async for event, data in sections:
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    # X-Accel-Buffering: let nginx pass each event through as it is written
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+
+def _ts(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+
+def _serialize_job(job: Job, position: Optional[int] = None) -> GenerationJobOut:
+    return GenerationJobOut(
+        id=job.id,
+        status=job.status,
+        position=position,
+        progress=job.progress or {"total": len(job.payload["question_ids"])},
+        result=job.result,
+        error=job.error,
+        created_at=_ts(job.created_at),
+        started_at=_ts(job.started_at),
+        finished_at=_ts(job.finished_at),
+    )
+
+
+def _serialize_import_job(job: Job, position: Optional[int] = None) -> ImportJobOut:
+    return ImportJobOut(
+        id=job.id,
+        status=job.status,
+        position=position,
+        progress=job.progress or {},
+        result=job.result,
+        error=job.error,
+        created_at=_ts(job.created_at),
+        started_at=_ts(job.started_at),
+        finished_at=_ts(job.finished_at),
+    )
+
+
+@router.post("/generate/bulk", response_model=GenerationJobOut, status_code=status.HTTP_202_ACCEPTED)
+def generate_bulk(req: BulkGenerateRequest, owner: str = Depends(get_owner)):
+    question_ids = list(dict.fromkeys(req.question_ids))
+    limit = get_settings().generation_max_questions
+    if len(question_ids) > limit:
+        raise HTTPException(status_code=400, detail=f"at most {limit} questions per job")
+    q = get_generation_queue()
+    try:
+        job = q.submit(
+            owner,
+            {"question_ids": [str(i) for i in question_ids], "overwrite": req.overwrite, "bypass_cache": req.bypass_cache},
+        )
+    except JobRejected as exc:
+        raise HTTPException(status_code=429, detail=str(exc), headers={"Retry-After": "5"})
+    return _serialize_job(job, q.position(job.id))
+
+
+@router.get("/generate/cache")
+def generation_cache_stats():
+    cache = get_generation_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/generate/providers")
+def provider_stats():
+    return get_provider_router().stats()
+
+
+@router.get("/generate/jobs/metrics")
+def generation_queue_metrics():
+    return get_generation_queue().metrics()
+
+
+@router.get("/generate/jobs/{job_id}", response_model=GenerationJobOut)
+def get_generation_job(job_id: str):
+    q = get_generation_queue()
+    job = q.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    return _serialize_job(job, q.position(job_id))
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.schemas import SearchResponse
+from app.services.search import search_items, search_problems
+
+
+router = APIRouter(prefix="/api/v1", tags=["search"])
+
+
+@router.get("/search", response_model=SearchResponse)
+def search(
+    q: str = Query(min_length=1, max_length=200),
+    type: str = Query(default="all", pattern=r"^(all|items|problems)$"),
+    limit: int = Query(default=20, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    q = q.strip()
+    hits = []
+    if q and type in ("all", "items"):
+        hits.extend(search_items(db, q, limit))
+    if q and type in ("all", "problems"):
+        hits.extend(search_problems(db, q, limit))
+    hits.sort(key=lambda h: h.score, reverse=True)
+    return SearchResponse(q=q, items=hits[:limit])
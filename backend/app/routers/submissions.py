@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.db import get_db
+from app.routers.deps import get_owner
+from app.schemas import (
+    LeaderboardEntry,
+    PaginatedSubmissions,
+    ProblemLanguageStatsOut,
+    ProblemStatsOut,
+    SubmissionOut,
+)
+from app.services.judge import AC
+from app.services.submissions import get_submission_recorder
+
+
+router = APIRouter(prefix="/api/v1", tags=["submissions"])
+
+
+def _rate(accepted: int, submissions: int) -> float:
+    return round(accepted / submissions, 4) if submissions else 0.0
+
+
+def _serialize(s: models.Submission, with_cases: bool = False) -> SubmissionOut:
+    return SubmissionOut(
+        id=s.id,
+        problem_id=s.problem_id,
+        user_id=s.user_id,
+        language=s.language,
+        code_hash=s.code_hash,
+        verdict=s.verdict,
+        passed_cases=s.passed_cases,
+        total_cases=s.total_cases,
+        time_ms=s.time_ms,
+        memory_kb=s.memory_kb,
+        created_at=s.created_at,
+        cases=s.cases if with_cases else None,
+    )
+
+
+@router.get("/submissions", response_model=PaginatedSubmissions)
+def list_submissions(
+    problem_id: Optional[UUID] = None,
+    user_id: Optional[str] = Query(default=None, description="defaults to the caller"),
+    page: int = 1,
+    page_size: int = 20,
+    db: Session = Depends(get_db),
+    owner: str = Depends(get_owner),
+):
+    if page < 1:
+        page = 1
+    if page_size < 1 or page_size > 100:
+        page_size = 20
+
+    # served by ix_submissions_user_created / ix_submissions_user_problem_created
+    filters = [models.Submission.user_id == (user_id or owner)]
+    if problem_id:
+        filters.append(models.Submission.problem_id == problem_id)
+    total = db.scalar(select(func.count()).select_from(models.Submission).where(*filters)) or 0
+    stmt = (
+        select(models.Submission)
+        .where(*filters)
+        .order_by(models.Submission.created_at.desc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
+    rows = db.execute(stmt).scalars().all()
+    return PaginatedSubmissions(items=[_serialize(s) for s in rows], total=total, page=page, page_size=page_size)
+
+
+@router.get("/submissions/metrics")
+def submission_metrics():
+    return get_submission_recorder().stats()
+
+
+@router.get("/submissions/{submission_id}", response_model=SubmissionOut)
+def get_submission(submission_id: UUID, db: Session = Depends(get_db)):
+    s = db.get(models.Submission, submission_id)
+    if not s:
+        # recorded submissions are written within SUBMISSION_FLUSH_MS
+        raise HTTPException(status_code=404, detail="submission not found")
+    return _serialize(s, with_cases=True)
+
+
+@router.get("/problems/{problem_id}/stats", response_model=ProblemStatsOut)
+def get_problem_stats(problem_id: UUID, db: Session = Depends(get_db)):
+    if not db.get(models.Problem, problem_id):
+        raise HTTPException(status_code=404, detail="problem not found")
+    # the rollup is maintained as submissions are written; nothing is scanned here
+    stmt = (
+        select(models.ProblemLanguageStats)
+        .where(models.ProblemLanguageStats.problem_id == problem_id)
+        .order_by(models.ProblemLanguageStats.language)
+    )
+    rows = db.execute(stmt).scalars().all()
+    languages = [
+        ProblemLanguageStatsOut(
+            language=r.language,
+            submissions=r.submissions,
+            accepted=r.accepted,
+            acceptance_rate=_rate(r.accepted, r.submissions),
+            best_time_ms=r.best_time_ms,
+            best_memory_kb=r.best_memory_kb,
+        )
+        for r in rows
+    ]
+    submissions = sum(r.submissions for r in rows)
+    accepted = sum(r.accepted for r in rows)
+    return ProblemStatsOut(
+        problem_id=problem_id,
+        submissions=submissions,
+        accepted=accepted,
+        acceptance_rate=_rate(accepted, submissions),
+        languages=languages,
+    )
+
+
+@router.get("/problems/{problem_id}/leaderboard", response_model=List[LeaderboardEntry])
+def get_problem_leaderboard(
+    problem_id: UUID,
+    language: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    # fastest accepted runs: ix_submissions_accepted_fastest (partial on verdict = 'AC')
+    filters = [
+        models.Submission.problem_id == problem_id,
+        models.Submission.verdict == AC,
+        models.Submission.time_ms.is_not(None),
+    ]
+    if language:
+        filters.append(models.Submission.language == language.lower())
+    stmt = select(models.Submission).where(*filters).order_by(models.Submission.time_ms, models.Submission.created_at).limit(limit)
+    return [
+        LeaderboardEntry(
+            submission_id=s.id,
+            user_id=s.user_id,
+            language=s.language,
+            time_ms=s.time_ms,
+            memory_kb=s.memory_kb,
+            created_at=s.created_at,
+        )
+        for s in db.execute(stmt).scalars().all()
+    ]
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 from datetime import datetime
 from uuid import UUID
 from pydantic import BaseModel, Field
@@ -63,6 +63,43 @@ class KnowledgeItemOut(BaseModel):
 
 class GenerateRequest(BaseModel):
     question_id: UUID
+    # always call the provider, even when a question with the same text has an item
+    bypass_cache: bool = False
+
+
+class BulkGenerateRequest(BaseModel):
+    question_ids: List[UUID] = Field(min_length=1)
+    # regenerate questions that already have a knowledge item (implies bypass_cache)
+    overwrite: bool = False
+    bypass_cache: bool = False
+
+
+class ImportJobOut(BaseModel):
+    id: str
+    status: str  # queued|running|done|failed
+    position: Optional[int] = None
+    # {"read", "inserted", "duplicates", "invalid", "rows_per_sec"}, per chunk
+    progress: Dict[str, int] = {}
+    # progress fields plus {"errors": [{"line", "error"}], "elapsed_sec"}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class GenerationJobOut(BaseModel):
+    id: str
+    status: str  # queued|running|done|failed
+    position: Optional[int] = None  # place in the queue while queued
+    # {"total", "done", "failed", "skipped", "retries", "cached"}
+    progress: Dict[str, int] = {}
+    # {"items": {question_id: item_id}, "errors": {question_id: message}, "skipped": [question_id]}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
 
 
 class KnowledgeItemUpdate(BaseModel):
@@ -74,14 +111,32 @@ class KnowledgeItemUpdate(BaseModel):
 
 class PaginatedKnowledgeItems(BaseModel):
     items: List[KnowledgeItemOut]
-    total: int
-    page: int
+    total: Optional[int] = None  # omitted unless requested in cursor mode
+    page: Optional[int] = None  # page mode only
     page_size: int
+    next_cursor: Optional[str] = None  # cursor mode; None on the last page
+
+
+class SearchHit(BaseModel):
+    type: str  # item | problem
+    id: UUID  # knowledge item id for items
+    title: str
+    snippet: str
+    difficulty: Optional[str] = None
+    tags: Optional[List[str]] = None
+    score: float
+
+
+class SearchResponse(BaseModel):
+    q: str
+    items: List[SearchHit]
 
 
 class ProblemTestCase(BaseModel):
     input: str
     expectedOutput: str
+    # shown with the problem; on import, unset everywhere means the first two
+    sample: bool = False
 
 
 class ProblemOut(BaseModel):
@@ -90,10 +145,14 @@ class ProblemOut(BaseModel):
     description: Optional[str] = None
     difficulty: Optional[str] = None
     tags: Optional[List[str]] = None
-    test_cases: List[ProblemTestCase]
+    test_cases: List[ProblemTestCase]  # samples only
+    test_case_count: int = 0  # all cases, hidden ones included
     solution_languages: List[str]
     default_language: Optional[str] = None
     has_editorial: bool = False
+    has_checker: bool = False
+    time_limit_ms: int
+    memory_limit_mb: int
 
 
 class ProblemListItem(BaseModel):
@@ -104,12 +163,24 @@ class ProblemListItem(BaseModel):
     solution_languages: List[str]
 
 
+class PaginatedProblems(BaseModel):
+    items: List[ProblemListItem]
+    total: Optional[int] = None
+    page_size: int
+    next_cursor: Optional[str] = None
+
+
 class ProblemSolution(BaseModel):
     language: str
     code: str
     explanation: Optional[str] = None
 
 
+class LimitMultiplier(BaseModel):
+    time: float = Field(default=1.0, gt=0)
+    memory: float = Field(default=1.0, gt=0)
+
+
 class ProblemImportRequest(BaseModel):
     title: str
     description: Optional[str]
@@ -118,6 +189,13 @@ class ProblemImportRequest(BaseModel):
     test_cases: List[ProblemTestCase] = Field(min_length=1)
     solutions: List[ProblemSolution] = Field(min_length=1)
     editorial: Optional[str] = None
+    time_limit_ms: Optional[int] = Field(default=None, gt=0)
+    memory_limit_mb: Optional[int] = Field(default=None, gt=0)
+    # per-language overrides, e.g. {"python": {"time": 5}}
+    limit_multipliers: Optional[Dict[str, LimitMultiplier]] = None
+    # special judge for problems with several valid answers; see docs
+    checker_code: Optional[str] = None
+    checker_language: Optional[str] = None
 
 
 class ProblemSolutionResponse(BaseModel):
@@ -137,12 +215,28 @@ class ExecuteRequest(BaseModel):
     problem_id: Optional[UUID] = None
     match: Optional[str] = Field(default="exact", pattern=r"^(exact|tolerant)$")
     float_tolerance: Optional[float] = 1e-6
+    # tolerant mode: numbers also match within this fraction of the expected value
+    float_rel_tolerance: Optional[float] = Field(default=0.0, ge=0)
+    stop_on_first_failure: Optional[bool] = False
 
 
 class CaseResult(BaseModel):
     expected: str
+    expectedTruncated: bool = False  # `expected` is only the first SANDBOX_OUTPUT_PREVIEW_KB
     actual: str
     passed: bool
+    stderr: str = ""
+    status: str = "success"  # success|error|timeout|skipped
+    exitCode: Optional[int] = None
+    verdict: Optional[str] = None  # AC|WA|TLE|MLE|OLE|RE|CE, None when skipped
+    executionTime: Optional[str] = None
+    # measured inside the sandbox: wall time, user+sys CPU time, peak RSS
+    timeMs: Optional[float] = None
+    cpuTimeMs: Optional[float] = None
+    memoryKb: Optional[int] = None
+    checkerMessage: Optional[str] = None  # what the problem's checker reported
+    truncated: bool = False  # `actual` is only the first SANDBOX_OUTPUT_PREVIEW_KB
+    outputLimitExceeded: bool = False
 
 
 class ExecuteResponse(BaseModel):
@@ -153,3 +247,78 @@ class ExecuteResponse(BaseModel):
     status: str  # success|error|timeout
     passed: Optional[bool] = None
     cases: Optional[List[CaseResult]] = None
+    verdict: Optional[str] = None  # first non-AC case verdict when judging a problem
+    timeMs: Optional[float] = None  # summed over cases
+    cpuTimeMs: Optional[float] = None  # summed over cases
+    memoryKb: Optional[int] = None  # peak over cases
+    compileTimeMs: Optional[float] = None
+    truncated: bool = False
+    outputLimitExceeded: bool = False
+    submissionId: Optional[UUID] = None  # recorded in the submission history (written asynchronously)
+    meta: Optional[Dict[str, Any]] = None
+
+
+class JudgeJobOut(BaseModel):
+    id: str
+    status: str  # queued|running|done|failed
+    position: Optional[int] = None  # place in the queue while queued
+    result: Optional[ExecuteResponse] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class SubmissionCase(BaseModel):
+    verdict: Optional[str] = None
+    timeMs: Optional[float] = None
+    cpuTimeMs: Optional[float] = None
+    memoryKb: Optional[int] = None
+
+
+class SubmissionOut(BaseModel):
+    id: UUID
+    problem_id: UUID
+    user_id: str
+    language: str
+    code_hash: str
+    verdict: str
+    passed_cases: int
+    total_cases: int
+    time_ms: Optional[float] = None
+    memory_kb: Optional[int] = None
+    created_at: datetime
+    cases: Optional[List[SubmissionCase]] = None  # only on GET /submissions/{id}
+
+
+class PaginatedSubmissions(BaseModel):
+    items: List[SubmissionOut]
+    total: int
+    page: int
+    page_size: int
+
+
+class ProblemLanguageStatsOut(BaseModel):
+    language: str
+    submissions: int
+    accepted: int
+    acceptance_rate: float
+    best_time_ms: Optional[float] = None
+    best_memory_kb: Optional[int] = None
+
+
+class ProblemStatsOut(BaseModel):
+    problem_id: UUID
+    submissions: int
+    accepted: int
+    acceptance_rate: float
+    languages: List[ProblemLanguageStatsOut]
+
+
+class LeaderboardEntry(BaseModel):
+    submission_id: UUID
+    user_id: str
+    language: str
+    time_ms: Optional[float] = None
+    memory_kb: Optional[int] = None
+    created_at: datetime
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple
+
+from docker.errors import DockerException
+
+from app.services.judge import AC, JE, WA
+from app.services.sandbox import LANGUAGE_MAP, SandboxSession
+
+
+CHECKER_DIR = "check"
+DEFAULT_CHECKER_LANGUAGE = "cpp"
+# testlib exit codes: 0 ok, 1 wrong answer, 2 presentation error; the rest
+# (3 fail, crashes, timeouts) mean the checker itself is broken
+_WRONG_ANSWER_EXITS = (1, 2)
+_MESSAGE_LIMIT = 1024
+
+
+class Checker:
+    """A problem's checker (special judge), compiled and kept open in one sandbox.
+
+    It is invoked like a testlib checker, `checker <input> <output> <answer>`,
+    once per case. Compilation goes through the compile cache, so a checker is
+    compiled once per source across all submissions; within a submission the
+    same container serves every case.
+    """
+
+    def __init__(self, language: str | None, code: str, use_pool: bool | None = None):
+        self.language = (language or DEFAULT_CHECKER_LANGUAGE).lower()
+        self.code = code
+        self.use_pool = use_pool
+        self._session: SandboxSession | None = None
+        self._lock = threading.Lock()  # one check at a time in the shared container
+
+    def open(self) -> Dict[str, Any]:
+        """Compile the checker; returns the compile result like `SandboxSession.open`."""
+        config = LANGUAGE_MAP.get(self.language)
+        if config is None:
+            return {"status": "error", "stderr": f"checker language {self.language} not supported", "timeMs": 0}
+        session = SandboxSession(config, self.code, use_pool=self.use_pool)
+        try:
+            compiled = session.open()
+        except Exception:
+            session.close()
+            raise
+        if compiled["status"] != "success":
+            session.close()
+            return compiled
+        self._session = session
+        return compiled
+
+    def check(self, input_data: str | Path, expected: str | Path, actual: Iterable[bytes]) -> Tuple[str, str]:
+        """Return (verdict, checker message) for one case: AC, WA or JE.
+
+        Input and answer may be test-case files; like program inputs they are
+        read in place or sent to the container only once.
+        """
+        try:
+            with self._lock:
+                paths = self._session.stage(
+                    {
+                        f"{CHECKER_DIR}/input.txt": input_data,
+                        f"{CHECKER_DIR}/output.txt": list(actual),
+                        f"{CHECKER_DIR}/answer.txt": expected,
+                    }
+                )
+                args = " ".join(paths[f"{CHECKER_DIR}/{name}.txt"] for name in ("input", "output", "answer"))
+                res = self._session.run(paths[f"{CHECKER_DIR}/input.txt"], args=args, trusted=True)
+        except DockerException as exc:
+            return JE, f"checker sandbox failed: {exc}"
+        message = (res["stderr"] or res["stdout"]).strip()[:_MESSAGE_LIMIT]
+        if res["status"] == "timeout":
+            return JE, "checker timed out"
+        if res["exitCode"] == 0:
+            return AC, message
+        if res["exitCode"] in _WRONG_ANSWER_EXITS:
+            return WA, message
+        return JE, message or f"checker exited with code {res['exitCode']}"
+
+    def close(self) -> None:
+        session, self._session = self._session, None
+        if session is not None:
+            session.close()
+
+    def __enter__(self) -> "Checker":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
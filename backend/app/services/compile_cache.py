@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import get_settings
+
+
+class CompileCache:
+    """Content-addressed, size-bounded LRU store of compiled artifacts.
+
+    Each entry is the tar archive of a run's artifact directory (binary or
+    class files) plus a small JSON sidecar with the original compile time, so
+    a hit can report how much compile time it saved.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()  # key -> (bytes, compile_ms)
+        self._bytes = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def key(image: str, image_id: str, source: str, compile_command: str) -> str:
+        # The compile command pins both the language and its flags.
+        h = hashlib.sha256()
+        for part in (image, image_id, compile_command, hashlib.sha256(source.encode("utf-8")).hexdigest()):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, int]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            try:
+                data = self._blob(key).read_bytes()
+                os.utime(self._blob(key))  # keeps LRU order across restarts
+            except OSError:
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_ms += entry[1]
+            return data, entry[1]
+
+    def put(self, key: str, data: bytes, compile_ms: int) -> None:
+        if len(data) > self.max_bytes:
+            return
+        blob = self._blob(key)
+        tmp = blob.with_suffix(f".tmp{threading.get_ident()}")
+        tmp.write_bytes(data)
+        os.replace(tmp, blob)
+        self._meta(key).write_text(json.dumps({"compile_ms": compile_ms}))
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[0]
+            self._entries[key] = (len(data), compile_ms)
+            self._bytes += len(data)
+            while self._bytes > self.max_bytes and self._entries:
+                self._drop(next(iter(self._entries)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "savedMs": self.saved_ms,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    # internals -----------------------------------------------------------
+    def _blob(self, key: str) -> Path:
+        return self.root / f"{key}.tar"
+
+    def _meta(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _drop(self, key: str) -> None:
+        size, _ = self._entries.pop(key, (0, 0))
+        self._bytes -= size
+        for path in (self._blob(key), self._meta(key)):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _load(self) -> None:
+        # Rebuild the index from disk, oldest access first.
+        blobs = sorted(self.root.glob("*.tar"), key=lambda p: p.stat().st_mtime)
+        for blob in blobs:
+            key = blob.stem
+            try:
+                compile_ms = int(json.loads(self._meta(key).read_text()).get("compile_ms", 0))
+            except (OSError, ValueError):
+                compile_ms = 0
+            size = blob.stat().st_size
+            self._entries[key] = (size, compile_ms)
+            self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+
+
+_cache: Optional[CompileCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_compile_cache() -> CompileCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            settings = get_settings()
+            _cache = CompileCache(settings.compile_cache_dir, settings.compile_cache_max_mb * 1024 * 1024)
+        return _cache
@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Optional
+
+import docker
+from docker.errors import DockerException
+
+from app.config import get_settings
+from app.services.images import get_docker_client, get_image_manager
+
+
+logger = logging.getLogger(__name__)
+
+POOL_LABEL = "interviewace.sandbox"
+WORKDIR = "/workspace"
+# Where SANDBOX_TESTCASE_SOURCE (the test-case store) is mounted read-only
+TESTCASE_MOUNT = "/testcases"
+# Root-only copies of input files, kept across leases (outside WORKDIR, which
+# is wiped on release) so a container receives each input once
+INPUT_CACHE_DIR = "/var/cache/judge"
+# Room for the shell and run wrapper on top of a program's memory limit, so
+# the container's cgroup limit never triggers before the limit itself.
+MEMORY_HEADROOM_MB = 32
+# World-writable scratch space, mounted as per-container tmpfs and wiped
+# together with WORKDIR on release so nothing a run leaves there reaches the
+# next lease
+SCRATCH_DIRS = ("/tmp", "/var/tmp", "/dev/shm")
+SCRATCH_TMPFS = "rw,nosuid,nodev,size=64m,mode=1777"
+
+
+def _nanos(cpus: float) -> int:
+    # nano_cpus is in units of 1e-9 CPUs
+    return int(cpus * 1_000_000_000)
+
+
+def default_memory_mb() -> int:
+    """Container memory limit for programs limited to `sandbox_memory_mb`."""
+    return get_settings().sandbox_memory_mb + MEMORY_HEADROOM_MB
+
+
+def create_sandbox_container(client: docker.DockerClient, image: str, label: str = "cold"):
+    """Create and start an idle, network-disabled, resource-limited container.
+
+    The container only runs `sleep`; user programs are started with `exec_run`
+    so the same container can serve several runs.
+    """
+    settings = get_settings()
+    memory = f"{default_memory_mb()}m"
+    get_image_manager().ensure(image)
+    volumes = {}
+    if settings.sandbox_testcase_source:
+        volumes[settings.sandbox_testcase_source] = {"bind": TESTCASE_MOUNT, "mode": "ro"}
+    container = client.containers.create(
+        image=image,
+        command=["sleep", "infinity"],
+        working_dir=WORKDIR,
+        network_disabled=True,
+        mem_limit=memory,
+        memswap_limit=memory,  # no swap: keeps peak RSS honest
+        nano_cpus=_nanos(settings.sandbox_cpus),
+        labels={POOL_LABEL: label},
+        volumes=volumes,
+        tmpfs={path: SCRATCH_TMPFS for path in SCRATCH_DIRS},
+        detach=True,
+    )
+    try:
+        container.start()
+    except Exception:
+        container.remove(force=True)
+        raise
+    return container
+
+
+@dataclass
+class PooledContainer:
+    container: object
+    image: str
+    uses: int = 0
+    memory_mb: Optional[int] = None  # set while raised above default_memory_mb()
+    staged: Dict[str, int] = field(default_factory=dict)  # INPUT_CACHE_DIR entries -> bytes
+
+
+@dataclass
+class _ImageStats:
+    hits: int = 0
+    cold_starts: int = 0
+    recycled: int = 0
+    creating: int = 0
+    in_use: int = 0
+    idle: Deque[PooledContainer] = field(default_factory=deque)
+
+
+class ContainerPool:
+    """Per-image pool of warm sandbox containers.
+
+    Containers are checked out exclusively, wiped after each run and recycled
+    after `max_uses` runs (or immediately if a run timed out or the reset
+    failed). A background thread keeps every image topped up to `size`.
+    """
+
+    def __init__(self, client: docker.DockerClient, images: Iterable[str], size: int, max_uses: int):
+        self.client = client
+        self.size = max(size, 0)
+        self.max_uses = max(max_uses, 1)
+        self._stats: Dict[str, _ImageStats] = {image: _ImageStats() for image in images}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # lifecycle -----------------------------------------------------------
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._remove_stale()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._refill_loop, name="sandbox-pool-refill", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            leftovers = [pc for st in self._stats.values() for pc in st.idle]
+            for st in self._stats.values():
+                st.idle.clear()
+        for pc in leftovers:
+            self._discard(pc)
+
+    # checkout ------------------------------------------------------------
+    def acquire(self, image: str) -> PooledContainer:
+        with self._lock:
+            st = self._stats.setdefault(image, _ImageStats())
+            pc = st.idle.popleft() if st.idle else None
+            if pc is not None:
+                st.hits += 1
+            else:
+                st.cold_starts += 1
+            st.in_use += 1
+        self._wakeup.set()
+        if pc is not None:
+            return pc
+        try:
+            container = create_sandbox_container(self.client, image)
+        except Exception:
+            with self._lock:
+                st.in_use -= 1
+            raise
+        return PooledContainer(container=container, image=image)
+
+    def release(self, pc: PooledContainer, reusable: bool = True) -> None:
+        pc.uses += 1
+        keep = reusable and pc.uses < self.max_uses and self._reset(pc)
+        with self._lock:
+            st = self._stats[pc.image]
+            st.in_use -= 1
+            if keep and len(st.idle) < self.size:
+                st.idle.append(pc)
+                return
+            st.recycled += 1
+        self._discard(pc)
+        self._wakeup.set()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {
+                image: {
+                    "size": len(st.idle),
+                    "in_use": st.in_use,
+                    "target": self.size,
+                    "hits": st.hits,
+                    "cold_starts": st.cold_starts,
+                    "recycled": st.recycled,
+                }
+                for image, st in self._stats.items()
+            }
+
+    # internals -----------------------------------------------------------
+    def _reset(self, pc: PooledContainer) -> bool:
+        # Kill everything but the idle `sleep` (PID 1) and wipe the workdir
+        # and scratch dirs; any entry left behind fails the reset, so the
+        # container is recycled instead of leaking files to the next lease.
+        dirs = " ".join((WORKDIR,) + SCRATCH_DIRS)
+        script = f"kill -9 -1 2>/dev/null; for d in {dirs}; do find \"$d\" -mindepth 1 -delete || exit 1; done"
+        try:
+            result = pc.container.exec_run(["/bin/sh", "-c", script])
+            return result.exit_code == 0
+        except Exception:
+            return False
+
+    def _discard(self, pc: PooledContainer) -> None:
+        try:
+            pc.container.remove(force=True)
+        except Exception:
+            pass
+
+    def _remove_stale(self) -> None:
+        # Containers left behind by a previous process (crash, reload).
+        try:
+            for container in self.client.containers.list(all=True, filters={"label": POOL_LABEL}):
+                try:
+                    container.remove(force=True)
+                except Exception:
+                    pass
+        except DockerException as exc:
+            logger.warning("sandbox pool: could not list stale containers: %s", exc)
+
+    def _missing(self) -> Optional[str]:
+        images = get_image_manager()
+        with self._lock:
+            for image, st in self._stats.items():
+                if not images.is_ready(image):
+                    continue
+                if len(st.idle) + st.creating + st.in_use < self.size:
+                    st.creating += 1
+                    return image
+        return None
+
+    def _refill_loop(self) -> None:
+        backoff = 1.0
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            image = self._missing()
+            if image is None:
+                self._wakeup.wait(timeout=5)
+                continue
+            try:
+                container = create_sandbox_container(self.client, image, label="pool")
+            except Exception as exc:
+                with self._lock:
+                    self._stats[image].creating -= 1
+                logger.warning("sandbox pool: failed to create container for %s: %s", image, exc)
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 60.0)
+                continue
+            backoff = 1.0
+            with self._lock:
+                st = self._stats[image]
+                st.creating -= 1
+                st.idle.append(PooledContainer(container=container, image=image))
+
+
+_pool: Optional[ContainerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ContainerPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from app.services.sandbox import LANGUAGE_MAP
+
+            settings = get_settings()
+            images = sorted({cfg.image for cfg in LANGUAGE_MAP.values()})
+            _pool = ContainerPool(
+                get_docker_client(),
+                images,
+                size=settings.sandbox_pool_size,
+                max_uses=settings.sandbox_pool_max_uses,
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.stop()
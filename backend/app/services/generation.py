@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from app import models
+from app.config import get_settings
+from app.db import SessionLocal
+from app.services.generation_cache import get_generation_cache
+from app.services.jobs import JobQueue
+from app.services.llm_provider import SECTIONS, LLMProvider, ProviderError, get_provider
+from app.serializers import serialize_knowledge_item
+
+
+logger = logging.getLogger(__name__)
+
+GENERATED_FIELDS = SECTIONS
+MAX_BACKOFF_SEC = 30.0
+
+# (texts to generate, ids without a question, ids skipped because they already have an item)
+Loaded = Tuple[Dict[UUID, str], List[UUID], List[UUID]]
+
+
+def load_questions(question_ids: Sequence[UUID], overwrite: bool) -> Loaded:
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(models.Question.id, models.Question.text, models.KnowledgeItem.id)
+            .outerjoin(models.KnowledgeItem, models.KnowledgeItem.question_id == models.Question.id)
+            .where(models.Question.id.in_(question_ids))
+        ).all()
+    texts = {question_id: text for question_id, text, _ in rows}
+    with_item = {question_id for question_id, _, item_id in rows if item_id is not None}
+    skipped = [] if overwrite else [q for q in question_ids if q in with_item]
+    for question_id in skipped:
+        del texts[question_id]
+    return texts, [q for q in question_ids if q not in texts and q not in with_item], skipped
+
+
+def save_items(generated: Dict[UUID, Dict[str, Any]]) -> Dict[UUID, UUID]:
+    """Create or update the knowledge item of each question; returns question id -> item id."""
+    with SessionLocal() as db:
+        existing = {
+            item.question_id: item
+            for item in db.execute(
+                select(models.KnowledgeItem).where(models.KnowledgeItem.question_id.in_(list(generated)))
+            ).scalars()
+        }
+        items = {}
+        for question_id, data in generated.items():
+            item = existing.get(question_id) or models.KnowledgeItem(question_id=question_id)
+            for key in GENERATED_FIELDS:
+                setattr(item, key, data.get(key))
+            db.add(item)
+            items[question_id] = item
+        db.commit()
+        return {question_id: item.id for question_id, item in items.items()}
+
+
+def lookup_cached(texts: Dict[UUID, str]) -> Dict[UUID, Dict[str, Any]]:
+    """Payloads of cached knowledge items for the questions that have one."""
+    cache = get_generation_cache()
+    if cache is None:
+        return {}
+    with SessionLocal() as db:
+        return {question_id: hit.payload for question_id, hit in cache.lookup_many(db, texts).items()}
+
+
+def remember(generated: Dict[UUID, Tuple[str, UUID]]) -> None:
+    """Add freshly generated items (question id -> (text, item id)) to the cache."""
+    cache = get_generation_cache()
+    if cache is None:
+        return
+    with SessionLocal() as db:
+        for text, item_id in generated.values():
+            cache.store(db, text, item_id)
+        db.commit()
+
+
+class GenerationRun:
+    """Generates knowledge items for many questions with bounded concurrency.
+
+    Questions are sent in batches of the provider's `max_batch_size`; at most
+    `concurrency` batches are in flight. Prompts that fail are retried (only
+    those, not the whole batch) up to `max_attempts` times with exponential
+    backoff and jitter. Each batch is saved as soon as it is generated and
+    progress is reported through `report`.
+
+    With `lookup` and `remember` (see `lookup_cached`), questions whose text
+    is already cached reuse that item's content instead of calling the
+    provider, and new items are added to the cache.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        question_ids: Sequence[UUID],
+        overwrite: bool = False,
+        concurrency: int = 4,
+        max_attempts: int = 3,
+        backoff_ms: int = 500,
+        report: Callable[..., None] = lambda **fields: None,
+        load: Callable[[Sequence[UUID], bool], Loaded] = load_questions,
+        save: Callable[[Dict[UUID, Dict[str, Any]]], Dict[UUID, UUID]] = save_items,
+        lookup: Optional[Callable[[Dict[UUID, str]], Dict[UUID, Dict[str, Any]]]] = None,
+        remember: Optional[Callable[[Dict[UUID, Tuple[str, UUID]]], None]] = None,
+    ):
+        self.provider = provider
+        self.question_ids = list(dict.fromkeys(question_ids))
+        self.overwrite = overwrite
+        self.concurrency = max(concurrency, 1)
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff_sec = max(backoff_ms, 0) / 1000
+        self.report = report
+        self.load = load
+        self.save = save
+        self.lookup = lookup
+        self.remember = remember
+        self.progress = {"total": len(self.question_ids), "done": 0, "failed": 0, "skipped": 0, "retries": 0, "cached": 0}
+        self.items: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+
+    async def run(self) -> Dict[str, Any]:
+        texts, missing, skipped = await asyncio.to_thread(self.load, self.question_ids, self.overwrite)
+        for question_id in missing:
+            self.errors[str(question_id)] = "question not found"
+        self._update(failed=len(missing), skipped=len(skipped))
+
+        pending = [q for q in self.question_ids if q in texts]
+        if self.lookup is not None and pending:
+            pending = await self._reuse_cached({q: texts[q] for q in pending})
+        size = max(self.provider.max_batch_size, 1)
+        batches = [pending[i:i + size] for i in range(0, len(pending), size)]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def process(batch: List[UUID]) -> None:
+            async with semaphore:
+                generated, failed = await self._generate(batch, texts)
+            if generated:
+                failed.update(await self._save(generated, texts))
+            self.errors.update({str(q): message for q, message in failed.items()})
+            self._update(done=self.progress["done"] + len(batch) - len(failed), failed=self.progress["failed"] + len(failed))
+
+        await asyncio.gather(*(process(batch) for batch in batches))
+        return {"items": self.items, "errors": self.errors, "skipped": [str(q) for q in skipped]}
+
+    async def _reuse_cached(self, texts: Dict[UUID, str]) -> List[UUID]:
+        """Save cached content for the questions that have some; returns the others."""
+        try:
+            cached = await asyncio.to_thread(self.lookup, texts)
+        except Exception:
+            # the cache is an optimization: generate everything rather than fail the job
+            logger.exception("generation cache lookup failed")
+            cached = {}
+        if cached:
+            failed = await self._save(cached, texts, fresh=False)
+            self.errors.update({str(q): message for q, message in failed.items()})
+            self._update(
+                done=self.progress["done"] + len(cached) - len(failed),
+                failed=self.progress["failed"] + len(failed),
+                cached=len(cached) - len(failed),
+            )
+        return [q for q in texts if q not in cached]
+
+    async def _save(self, generated: Dict[UUID, Dict[str, Any]], texts: Dict[UUID, str], fresh: bool = True) -> Dict[UUID, str]:
+        """Save items; returns the questions that could not be saved, with the error."""
+        try:
+            saved = await asyncio.to_thread(self.save, generated)
+        except Exception as exc:
+            logger.exception("saving %d generated items failed", len(generated))
+            return {q: f"save failed: {exc}" for q in generated}
+        self.items.update({str(q): str(i) for q, i in saved.items()})
+        if fresh and self.remember is not None and saved:
+            try:
+                await asyncio.to_thread(self.remember, {q: (texts[q], i) for q, i in saved.items()})
+            except Exception:
+                logger.exception("adding %d items to the generation cache failed", len(saved))
+        return {}
+
+    async def _generate(self, batch: List[UUID], texts: Dict[UUID, str]) -> Tuple[Dict[UUID, Dict[str, Any]], Dict[UUID, str]]:
+        generated: Dict[UUID, Dict[str, Any]] = {}
+        failed: Dict[UUID, str] = {}
+        todo = batch
+        for attempt in range(self.max_attempts):
+            if attempt:
+                self._update(retries=self.progress["retries"] + len(todo))
+                delay = min(self.backoff_sec * 2 ** (attempt - 1), MAX_BACKOFF_SEC)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            try:
+                results = await self.provider.agenerate_batch([texts[q] for q in todo])
+            except Exception as exc:
+                results = [exc] * len(todo)
+            failed = {}
+            for question_id, result in zip(todo, results):
+                if isinstance(result, dict):
+                    generated[question_id] = result
+                else:
+                    failed[question_id] = str(result) or type(result).__name__
+            todo = list(failed)
+            if not todo:
+                break
+        return generated, failed
+
+    def _update(self, **fields: int) -> None:
+        self.progress.update(fields)
+        self.report(**self.progress)
+
+
+def load_draft(question_id: UUID) -> Dict[str, Any]:
+    with SessionLocal() as db:
+        draft = db.get(models.GenerationDraft, question_id)
+        return dict(draft.sections) if draft is not None else {}
+
+
+def save_section(question_id: UUID, name: str, value: Any) -> None:
+    Draft = models.GenerationDraft
+    stmt = insert(Draft).values(question_id=question_id, sections={name: value}, updated_at=func.now())
+    with SessionLocal() as db:
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Draft.question_id],
+                set_={"sections": Draft.sections.op("||")(stmt.excluded.sections), "updated_at": func.now()},
+            )
+        )
+        db.commit()
+
+
+def finish_draft(question_id: UUID, text: str, sections: Dict[str, Any], fresh: bool) -> Dict[str, Any]:
+    """Save the knowledge item, drop the draft and return the serialized item."""
+    item_id = save_items({question_id: sections})[question_id]
+    if fresh:
+        remember({question_id: (text, item_id)})
+    with SessionLocal() as db:
+        db.execute(delete(models.GenerationDraft).where(models.GenerationDraft.question_id == question_id))
+        db.commit()
+        return serialize_knowledge_item(db.get(models.KnowledgeItem, item_id)).model_dump(mode="json")
+
+
+async def stream_item(
+    provider: LLMProvider, question_id: UUID, text: str, use_cache: bool = True
+) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """Generate one knowledge item section by section; yields (event, data).
+
+    `section` events carry {name, value, resumed} and come as soon as the
+    provider produces each section; `done` carries the saved item, `error`
+    the failure. Every section is written to the question's draft before it
+    is sent, so if the client goes away or the provider fails, the next
+    stream for that question resumes with the saved sections (`resumed`) and
+    only asks the provider for the rest.
+    """
+    cached = await asyncio.to_thread(lookup_cached, {question_id: text}) if use_cache else {}
+    if cached:
+        sections = cached[question_id]
+        for name in SECTIONS:
+            yield "section", {"name": name, "value": sections.get(name), "resumed": False}
+        item = await asyncio.to_thread(finish_draft, question_id, text, sections, False)
+        yield "done", {"item": item, "cached": True}
+        return
+
+    sections = await asyncio.to_thread(load_draft, question_id)
+    for name in SECTIONS:
+        if name in sections:
+            yield "section", {"name": name, "value": sections[name], "resumed": True}
+    try:
+        async for name, value in provider.astream_from_question(text, [n for n in SECTIONS if n not in sections]):
+            await asyncio.to_thread(save_section, question_id, name, value)
+            sections[name] = value
+            yield "section", {"name": name, "value": value, "resumed": False}
+    except ProviderError as exc:
+        yield "error", {"detail": str(exc), "saved": [n for n in SECTIONS if n in sections]}
+        return
+    item = await asyncio.to_thread(finish_draft, question_id, text, sections, True)
+    yield "done", {"item": item, "cached": False}
+
+
+def _run_job(payload: Dict[str, Any], report: Callable[..., None]) -> Dict[str, Any]:
+    # {"question_ids": [...], "overwrite": bool, "bypass_cache": bool}
+    settings = get_settings()
+    overwrite = payload.get("overwrite", False)
+    cache = get_generation_cache()
+    # overwriting asks for new content, which the cache (possibly holding
+    # these very items) cannot provide
+    use_cache = cache is not None and not overwrite and not payload.get("bypass_cache", False)
+    if cache is not None and not use_cache:
+        cache.bypassed(len(payload["question_ids"]))
+    run = GenerationRun(
+        get_provider(),
+        [UUID(q) for q in payload["question_ids"]],
+        overwrite=overwrite,
+        concurrency=settings.generation_concurrency,
+        max_attempts=settings.generation_max_attempts,
+        backoff_ms=settings.generation_backoff_ms,
+        report=report,
+        lookup=lookup_cached if use_cache else None,
+        remember=remember if cache is not None else None,
+    )
+    return _worker_loop().run_until_complete(run.run())
+
+
+_worker_loops = threading.local()
+
+
+def _worker_loop() -> asyncio.AbstractEventLoop:
+    # one event loop per worker thread, kept across jobs: async HTTP clients
+    # are bound to a loop, so their connection pools then outlive a job
+    loop = getattr(_worker_loops, "loop", None)
+    if loop is None:
+        loop = _worker_loops.loop = asyncio.new_event_loop()
+    return loop
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_generation_queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            settings = get_settings()
+            _queue = JobQueue(
+                "generation",
+                _run_job,
+                workers=settings.generation_workers,
+                max_depth=settings.generation_queue_max_depth,
+                per_owner_limit=settings.generation_max_jobs_per_user,
+                retain=settings.generation_jobs_retain,
+                with_progress=True,
+            )
+            _queue.start()
+        return _queue
+
+
+def shutdown_generation_queue() -> None:
+    global _queue
+    with _queue_lock:
+        q, _queue = _queue, None
+    if q is not None:
+        q.stop()
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, TypeVar
+from uuid import UUID
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import get_settings
+
+
+# MinHash signature = BANDS * ROWS values; LSH buckets one band of ROWS values.
+# Pairs above ~0.5 Jaccard usually share a bucket, so candidates for the
+# (much higher) similarity threshold are rarely missed.
+BANDS = 16
+ROWS = 4
+SHINGLE_SIZE = 3
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+_rng = random.Random(0x5EED)  # fixed: signatures are stored and compared across processes
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(BANDS * ROWS)]
+K = TypeVar("K")
+_CJK = r"\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff"  # CJK radicals .. unified ideographs, Hangul, compatibility
+_SPACE_NEXT_TO_CJK = re.compile(rf"(?<=[{_CJK}]) | (?=[{_CJK}])")
+# after NFKC, which turns full-width ，？！ into ASCII
+_SENTENCE_END = ".,;:?!。、"
+_QUOTES = "\"'`“”‘’「」『』"
+
+
+def normalize_question(text: str) -> str:
+    """Text as keyed by the cache: equal only for the same question.
+
+    NFKC folds full-width forms (ＡＢＣ１２３，？) to their ASCII
+    counterparts; then case is folded and runs of whitespace collapse.
+    Punctuation and symbols are kept: `==` and `!=`, or `a < b` and
+    `a > b`, make different questions.
+    """
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def fuzzy_question(text: str) -> str:
+    """Text as compared for near-duplicates (MinHash), from `normalize_question`.
+
+    Sentence punctuation ending a word (JS? / JS, 原理。/ 原理) and quotes
+    around it are dropped, as are spaces next to CJK characters (which carry
+    no meaning there). Operators and other symbols stay, so `==` and `!=`
+    still differ; how close is close enough is up to the similarity threshold.
+    """
+    words = (w.strip(_QUOTES).rstrip(_SENTENCE_END).strip(_QUOTES) for w in normalize_question(text).split())
+    return _SPACE_NEXT_TO_CJK.sub("", " ".join(w for w in words if w))
+
+
+def text_hash(normalized: str) -> str:
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def question_hash(text: str) -> str:
+    """Same for texts that differ only in width, case or spacing."""
+    return text_hash(normalize_question(text))
+
+
+def shingles(normalized: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    # character n-grams work for CJK (no word breaks) and Latin text alike
+    if len(normalized) <= size:
+        return {normalized}
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def minhash(normalized: str) -> List[int]:
+    hashed = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles(normalized)]
+    return [min((a * h + b) % _PRIME for h in hashed) & _MASK for a, b in _PERMUTATIONS]
+
+
+def lsh_buckets(signature: Sequence[int]) -> List[Tuple[int, int]]:
+    """(band, bucket) pairs; near-duplicates share at least one with high probability."""
+    buckets = []
+    for band in range(BANDS):
+        chunk = ",".join(str(v) for v in signature[band * ROWS:(band + 1) * ROWS])
+        digest = hashlib.blake2b(chunk.encode("ascii"), digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "big", signed=True)))
+    return buckets
+
+
+def similarity(a: Sequence[int], b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+@dataclass
+class CacheHit:
+    kind: str  # exact | near
+    item_id: UUID
+    payload: Dict[str, Any]
+    similarity: float = 1.0
+
+
+class GenerationCache:
+    """Reuses generated knowledge items for repeated questions.
+
+    Entries map the hash of a normalized question text (`question_hash`) to
+    the knowledge item generated for it (`generation_cache`); deleting the
+    item drops the entry. With `near_duplicates`, each entry also keeps a
+    MinHash signature of the `fuzzy_question` text with its LSH buckets
+    (`generation_cache_bands`), and a miss on the exact key falls back to the
+    most similar cached question at or above `threshold`.
+    """
+
+    def __init__(self, near_duplicates: bool, threshold: float):
+        self.near_duplicates = near_duplicates
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._counters = {"lookups": 0, "exact_hits": 0, "near_hits": 0, "misses": 0, "bypassed": 0, "stored": 0}
+
+    def lookup(self, db: Session, text: str) -> Optional[CacheHit]:
+        return self.lookup_many(db, {None: text}).get(None)
+
+    def lookup_many(self, db: Session, texts: Dict[K, str]) -> Dict[K, CacheHit]:
+        """Cached items for those of `texts` that have one (exact keys in one query)."""
+        hashes = {key: question_hash(text) for key, text in texts.items()}
+        found = self._exact(db, set(hashes.values()))
+        hits = {key: CacheHit("exact", found[h].id, _payload(found[h])) for key, h in hashes.items() if h in found}
+        if self.near_duplicates:
+            for key, text in texts.items():
+                fuzzy = fuzzy_question(text)
+                if key not in hits and fuzzy:
+                    hit = self._near(db, minhash(fuzzy))
+                    if hit is not None:
+                        hits[key] = hit
+        near = sum(1 for hit in hits.values() if hit.kind == "near")
+        with self._lock:
+            self._counters["lookups"] += len(texts)
+            self._counters["exact_hits"] += len(hits) - near
+            self._counters["near_hits"] += near
+            self._counters["misses"] += len(texts) - len(hits)
+        return hits
+
+    def store(self, db: Session, text: str, item_id: UUID) -> None:
+        """Remember `item_id` as the answer for `text` (the first item per text wins); the caller commits."""
+        key = question_hash(text)
+        fuzzy = fuzzy_question(text)
+        signature = minhash(fuzzy) if fuzzy else None
+        inserted = db.execute(
+            insert(models.GenerationCacheEntry)
+            .values(text_hash=key, item_id=item_id, minhash=signature)
+            .on_conflict_do_nothing(index_elements=["text_hash"])
+            .returning(models.GenerationCacheEntry.text_hash)
+        ).scalar()
+        if inserted is None:
+            return
+        if signature is not None:
+            db.execute(
+                insert(models.GenerationCacheBand),
+                [{"band": band, "bucket": bucket, "text_hash": key} for band, bucket in lsh_buckets(signature)],
+            )
+        self._count("stored")
+
+    def bypassed(self, count: int = 1) -> None:
+        self._count("bypassed", count)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        hits = counters["exact_hits"] + counters["near_hits"]
+        return {
+            **counters,
+            "hit_rate": round(hits / counters["lookups"], 4) if counters["lookups"] else 0.0,
+            "near_duplicates": self.near_duplicates,
+            "threshold": self.threshold,
+        }
+
+    # internals -----------------------------------------------------------
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[key] += n
+
+    def _exact(self, db: Session, keys: Set[str]) -> Dict[str, models.KnowledgeItem]:
+        if not keys:
+            return {}
+        rows = db.execute(
+            select(models.GenerationCacheEntry.text_hash, models.KnowledgeItem)
+            .join(models.KnowledgeItem, models.GenerationCacheEntry.item_id == models.KnowledgeItem.id)
+            .where(models.GenerationCacheEntry.text_hash.in_(keys))
+        ).all()
+        return {key: item for key, item in rows}
+
+    def _near(self, db: Session, signature: List[int]) -> Optional[CacheHit]:
+        Entry, Band = models.GenerationCacheEntry, models.GenerationCacheBand
+        candidates = db.execute(
+            select(Entry.item_id, Entry.minhash)
+            .join(Band, Band.text_hash == Entry.text_hash)
+            .where(tuple_(Band.band, Band.bucket).in_(lsh_buckets(signature)))
+            .distinct()
+        ).all()
+        best = max(
+            ((similarity(signature, other), item_id) for item_id, other in candidates if other),
+            default=None,
+            key=lambda c: c[0],
+        )
+        if best is None or best[0] < self.threshold:
+            return None
+        item = db.get(models.KnowledgeItem, best[1])
+        return CacheHit("near", item.id, _payload(item), round(best[0], 4)) if item is not None else None
+
+
+def _payload(item: models.KnowledgeItem) -> Dict[str, Any]:
+    return {
+        "flashcard": item.flashcard,
+        "mindmap": item.mindmap,
+        "code": item.code,
+        "project_usage": item.project_usage,
+    }
+
+
+_cache: Optional[GenerationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_generation_cache() -> Optional[GenerationCache]:
+    """The process-wide cache, or None when GENERATION_CACHE_ENABLED is off."""
+    global _cache
+    settings = get_settings()
+    if not settings.generation_cache_enabled:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = GenerationCache(
+                near_duplicates=settings.generation_cache_near_duplicates,
+                threshold=settings.generation_cache_threshold,
+            )
+        return _cache
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+
+import httpx
+
+from .llm_provider import SECTIONS, LLMProvider, ProviderError
+
+
+class HttpProvider(LLMProvider):
+    """A provider served over HTTP, reusing keep-alive connections.
+
+    Protocol (implemented by scripts/stub_llm_server.py):
+
+      POST /generate         {"question"}              -> item
+      POST /generate/batch   {"questions"}             -> {"results": [item | {"error"}]}
+      POST /generate/stream  {"question", "sections"}  -> NDJSON lines {"section", "value"}
+
+    Sync calls share one `httpx.Client`. An `httpx.AsyncClient` is bound to
+    the event loop it was first used on, so there is one per loop: the
+    server's loop and each generation worker's loop keep their own pool.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout_sec: float = 60,
+        max_connections: int = 20,
+        max_batch_size: int = 1,
+        api_key: Optional[str] = None,
+    ):
+        self.url = url.rstrip("/")
+        self.max_batch_size = max(max_batch_size, 1)
+        self._options = dict(
+            base_url=self.url,
+            timeout=httpx.Timeout(timeout_sec, connect=min(timeout_sec, 5)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            headers={"Authorization": f"Bearer {api_key}"} if api_key else {},
+        )
+        self._client = httpx.Client(**self._options)
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+
+    def generate_from_question(self, question_text: str) -> Dict[str, Any]:
+        try:
+            response = self._client.post("/generate", json={"question": question_text})
+        except httpx.HTTPError as exc:
+            raise ProviderError(f"{self.url}: {exc!r}") from exc
+        return self._json(response)
+
+    async def agenerate_from_question(self, question_text: str) -> Dict[str, Any]:
+        try:
+            response = await self._aclient().post("/generate", json={"question": question_text})
+        except httpx.HTTPError as exc:
+            raise ProviderError(f"{self.url}: {exc!r}") from exc
+        return self._json(response)
+
+    async def agenerate_batch(self, question_texts: List[str]) -> List[Union[Dict[str, Any], BaseException]]:
+        if self.max_batch_size == 1:
+            return await super().agenerate_batch(question_texts)
+        try:
+            response = await self._aclient().post("/generate/batch", json={"questions": question_texts})
+        except httpx.HTTPError as exc:
+            raise ProviderError(f"{self.url}: {exc!r}") from exc
+        results = self._json(response).get("results", [])
+        if len(results) != len(question_texts):
+            raise ProviderError(f"{self.url}: {len(results)} results for {len(question_texts)} prompts")
+        return [ProviderError(r["error"]) if "error" in r else r for r in results]
+
+    async def astream_from_question(
+        self, question_text: str, sections: Sequence[str] = SECTIONS
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        body = {"question": question_text, "sections": list(sections)}
+        try:
+            async with self._aclient().stream("POST", "/generate/stream", json=body) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    self._json(response)
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        chunk = json.loads(line)
+                        if "error" in chunk:
+                            raise ProviderError(f"{self.url}: {chunk['error']}")
+                        yield chunk["section"], chunk["value"]
+        except httpx.HTTPError as exc:
+            raise ProviderError(f"{self.url}: {exc!r}") from exc
+
+    def close(self) -> None:
+        self._client.close()
+        with self._lock:
+            # clients of other loops cannot be awaited from here; their
+            # connections are dropped with them
+            self._async_clients.clear()
+
+    def _aclient(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_clients[loop] = httpx.AsyncClient(**self._options)
+            return client
+
+    def _json(self, response: httpx.Response) -> Dict[str, Any]:
+        if response.status_code >= 400:
+            raise ProviderError(f"{self.url}: HTTP {response.status_code} {response.text[:200]}")
+        try:
+            return response.json()
+        except ValueError as exc:
+            raise ProviderError(f"{self.url}: invalid JSON") from exc
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+
+import docker
+from docker.errors import DockerException, ImageNotFound
+
+from app.config import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[docker.DockerClient] = None
+_client_lock = threading.Lock()
+
+
+def get_docker_client() -> docker.DockerClient:
+    """Process-wide Docker client; its HTTP connection pool is shared by all runs."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = docker.from_env()
+        return _client
+
+
+class ImageManager:
+    """Tracks which sandbox images are present locally.
+
+    Images are checked and pulled in the background at startup and then every
+    `refresh_sec`, so executions never talk to the registry. `ensure()` only
+    consults the cached state (plus one local lookup for an image it has not
+    seen yet).
+    """
+
+    def __init__(self, images: Iterable[str], refresh_sec: int):
+        self.images = sorted(set(images))
+        self.refresh_sec = max(refresh_sec, 1)
+        self._ids: Dict[str, str] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._refresh_now = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._loop, name="sandbox-image-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._refresh_now.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def is_ready(self, image: str) -> bool:
+        with self._lock:
+            return image in self._ids
+
+    def image_id(self, image: str) -> str:
+        with self._lock:
+            return self._ids.get(image, image)
+
+    def ensure(self, image: str) -> None:
+        """Raise ImageNotFound unless `image` is available locally."""
+        if self.is_ready(image):
+            return
+        if self._check_local(image):
+            return
+        self._refresh_now.set()
+        raise ImageNotFound(f"sandbox image {image} is not available yet")
+
+    def readiness(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {
+                image: {"ready": image in self._ids, "error": self._errors.get(image)}
+                for image in self.images
+            }
+
+    def refresh(self) -> None:
+        # Local lookups first so readiness is known before the slow pulls finish.
+        for image in self.images:
+            self._check_local(image)
+        for image in self.images:
+            try:
+                get_docker_client().images.pull(image)
+            except DockerException as exc:
+                # offline: keep whatever is present locally
+                with self._lock:
+                    self._errors[image] = str(exc)
+                continue
+            self._check_local(image)
+
+    # internals -----------------------------------------------------------
+    def _check_local(self, image: str) -> bool:
+        try:
+            image_id = get_docker_client().images.get(image).id
+        except ImageNotFound:
+            with self._lock:
+                self._ids.pop(image, None)
+            return False
+        except DockerException as exc:
+            with self._lock:
+                self._errors[image] = str(exc)
+            return False
+        with self._lock:
+            self._ids[image] = image_id
+            self._errors.pop(image, None)
+        return True
+
+    def _loop(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("sandbox image refresh failed")
+            self._refresh_now.wait(timeout=self.refresh_sec)
+            self._refresh_now.clear()
+
+
+_manager: Optional[ImageManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_image_manager() -> ImageManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            from app.services.sandbox import LANGUAGE_MAP
+
+            settings = get_settings()
+            _manager = ImageManager(
+                (cfg.image for cfg in LANGUAGE_MAP.values()),
+                refresh_sec=settings.sandbox_image_refresh_sec,
+            )
+        return _manager
+
+
+def shutdown_image_manager() -> None:
+    global _manager
+    with _manager_lock:
+        manager, _manager = _manager, None
+    if manager is not None:
+        manager.stop()
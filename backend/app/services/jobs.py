@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobRejected(Exception):
+    """Raised by `JobQueue.submit` when a job cannot be accepted right now."""
+
+
+class QueueFull(JobRejected):
+    pass
+
+
+class OwnerLimitExceeded(JobRejected):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    owner: str
+    payload: Any
+    status: str = "queued"  # queued|running|done|failed
+    result: Any = None
+    error: Optional[str] = None
+    progress: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+
+class JobQueue:
+    """Bounded in-process job queue drained by a pool of worker threads.
+
+    `submit` applies backpressure: it rejects new jobs once `max_depth` jobs
+    are waiting or when the owner already has `per_owner_limit` unfinished
+    jobs. Finished jobs are kept for polling until `retain` newer ones push
+    them out.
+
+    With `with_progress`, handlers are called as `handler(payload, report)`
+    and `report(**fields)` updates `job.progress` while the job runs.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Any],
+        workers: int,
+        max_depth: int,
+        per_owner_limit: int,
+        retain: int = 1000,
+        with_progress: bool = False,
+    ):
+        self.name = name
+        self.handler = handler
+        self.with_progress = with_progress
+        self.workers = max(workers, 1)
+        self.max_depth = max(max_depth, 1)
+        self.per_owner_limit = max(per_owner_limit, 1)
+        self.retain = max(retain, 1)
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._active: Dict[str, int] = {}
+        self._cond = threading.Condition()
+        self._threads: list[threading.Thread] = []
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        self._running = 0
+
+    # lifecycle -----------------------------------------------------------
+    def start(self) -> None:
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"{self.name}-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+
+    # public API ----------------------------------------------------------
+    def submit(self, owner: str, payload: Any) -> Job:
+        with self._cond:
+            if self._queue.qsize() >= self.max_depth:
+                self._counters["rejected"] += 1
+                raise QueueFull(f"{self.name} queue is full ({self.max_depth} jobs waiting)")
+            if self._active.get(owner, 0) >= self.per_owner_limit:
+                self._counters["rejected"] += 1
+                raise OwnerLimitExceeded(f"at most {self.per_owner_limit} unfinished jobs per user")
+            job = Job(id=str(uuid.uuid4()), owner=owner, payload=payload)
+            self._jobs[job.id] = job
+            self._active[owner] = self._active.get(owner, 0) + 1
+            self._counters["submitted"] += 1
+            self._evict()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, seen_status: Optional[str], timeout: float) -> Optional[Job]:
+        """Block until the job's status differs from `seen_status` (or timeout)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job.status != seen_status:
+                    return job
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return job
+                self._cond.wait(remaining)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """0-based position among queued jobs, None once the job has started."""
+        with self._cond:
+            pos = 0
+            for job in self._jobs.values():
+                if job.id == job_id:
+                    return pos if job.status == "queued" else None
+                if job.status == "queued":
+                    pos += 1
+        return None
+
+    def metrics(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "depth": self._queue.qsize(),
+                "running": self._running,
+                "workers": self.workers,
+                "max_depth": self.max_depth,
+                **self._counters,
+            }
+
+    # internals -----------------------------------------------------------
+    def _evict(self) -> None:
+        while len(self._jobs) > self.retain:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if not oldest.finished:
+                break
+            del self._jobs[oldest_id]
+
+    def _set(self, job: Job, **changes: Any) -> None:
+        with self._cond:
+            for key, value in changes.items():
+                setattr(job, key, value)
+            self._cond.notify_all()
+
+    def _report(self, job: Job, fields: Dict[str, Any]) -> None:
+        with self._cond:
+            job.progress = {**job.progress, **fields}
+            self._cond.notify_all()
+
+    def _work(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._cond:
+                self._running += 1
+            self._set(job, status="running", started_at=time.time())
+            try:
+                if self.with_progress:
+                    result = self.handler(job.payload, lambda **fields: self._report(job, fields))
+                else:
+                    result = self.handler(job.payload)
+            except Exception as exc:
+                logger.exception("%s job %s failed", self.name, job.id)
+                changes = {"status": "failed", "error": str(exc)}
+                counter = "failed"
+            else:
+                changes = {"status": "done", "result": result}
+                counter = "completed"
+            with self._cond:
+                self._running -= 1
+                self._counters[counter] += 1
+                remaining = self._active.get(job.owner, 1) - 1
+                if remaining > 0:
+                    self._active[job.owner] = remaining
+                else:
+                    self._active.pop(job.owner, None)
+            self._set(job, finished_at=time.time(), **changes)
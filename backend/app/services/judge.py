@@ -1,53 +1,277 @@
 from __future__ import annotations
 
-from typing import Tuple
+import codecs
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
 
 
-def _normalize_lines(s: str) -> list[str]:
-    # Split into lines, strip trailing spaces, drop leading/trailing blank lines
-    lines = [ln.rstrip() for ln in (s or "").splitlines()]
-    # trim empty head/tail
-    while lines and lines[0] == "":
-        lines.pop(0)
-    while lines and lines[-1] == "":
-        lines.pop()
-    return lines
+# Per-case verdicts
+AC = "AC"  # accepted
+WA = "WA"  # wrong answer
+TLE = "TLE"  # CPU time over the limit (or killed by the wall-clock guard)
+MLE = "MLE"  # peak RSS over the limit (or OOM-killed)
+OLE = "OLE"  # stdout over the capture limit (program killed)
+RE = "RE"  # non-zero exit / crashed
+CE = "CE"  # compilation failed
+JE = "JE"  # judge error: the checker or the judge itself failed, not the submission
 
+SIGKILL_EXIT = 128 + 9
 
-def _try_float(v: str):
+# A whole output, or its chunks in order (as read from the sandbox)
+Output = Union[str, bytes, Iterable[Union[str, bytes]]]
+
+# Strings are walked in slices of this many characters so that neither
+# comparison mode builds structures proportional to the whole output.
+_PIECE = 1 << 16
+# Stands for a line break in a token stream: text is tokenized with a
+# single str.split() after turning each line break into a NUL token. Real
+# NULs are replaced first (like undecodable bytes, they compare as U+FFFD).
+_EOL = "\0"
+_SPACES = (" ", "\n", "\t", "\r", "\x0b", "\x0c")
+# Line breaks are those of str.splitlines(): "\r\n", "\n" and "\r" are the
+# common ones; the rest are each looked for with `in`, which is far cheaper
+# than a regex search over a whole piece.
+_RARE_BREAKS = "\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+_TO_NEWLINE = str.maketrans(dict.fromkeys(_RARE_BREAKS, "\n"))
+
+
+def _iter_text(output: Output) -> Iterator[str]:
+    if isinstance(output, str):
+        for i in range(0, len(output), _PIECE):
+            yield output[i:i + _PIECE]
+        return
+    if isinstance(output, bytes):
+        output = [output]
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in output:
+        if isinstance(chunk, str):
+            yield from _iter_text(chunk)
+        else:
+            yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def _whole_tokens(output: Output) -> Iterator[str]:
+    """Pieces of `output` that end on whitespace, so no token spans two of them."""
+    partial: List[str] = []  # a token still being continued by later chunks
+    for text in _iter_text(output):
+        # str.split() splits on more than these, so a kept-back tail may hold
+        # other whitespace; that only makes it longer, never wrong
+        cut = max(map(text.rfind, _SPACES)) + 1
+        if cut == 0:
+            partial.append(text)
+            continue
+        yield "".join(partial) + text[:cut] if partial else text[:cut]
+        partial = [text[cut:]] if cut < len(text) else []
+    if partial:
+        yield "".join(partial)
+
+
+def _token_batches(output: Output) -> Iterator[List[str]]:
+    """Tokens of `output` in batches, with _EOL between lines.
+
+    Trailing spaces are irrelevant and leading/trailing blank lines are
+    dropped; inner blank lines show up as consecutive _EOLs. Batches are
+    bounded by the input chunk size.
+    """
+    started = False
+    pending = 0  # line breaks held back until a token shows they are inner
+    after_cr = False  # the previous piece ended with "\r", whose "\n" may start this one
+    for body in _whole_tokens(output):
+        if _EOL in body:
+            body = body.replace(_EOL, "\ufffd")
+        if after_cr and body.startswith("\n"):
+            body = body[1:]
+        if "\r" in body:
+            after_cr = body.endswith("\r")
+            body = body.replace("\r\n", "\n").replace("\r", "\n")
+        else:
+            after_cr = False
+        if any(ch in body for ch in _RARE_BREAKS):
+            body = body.translate(_TO_NEWLINE)
+        tokens = body.replace("\n", " \0 ").split()
+        if not started:
+            first = 0
+            while first < len(tokens) and tokens[first] == _EOL:
+                first += 1
+            if first == len(tokens):
+                continue
+            tokens = tokens[first:]
+            started = True
+        last = len(tokens)
+        while last and tokens[last - 1] == _EOL:
+            last -= 1
+        if last == 0:
+            pending += len(tokens)
+            continue
+        batch = tokens if last == len(tokens) else tokens[:last]
+        if pending:
+            batch = [_EOL] * pending + batch
+        pending = len(tokens) - last
+        yield batch
+
+
+class _TokenCursor:
+    """Position in a token stream, tracking line/token numbers for hints."""
+
+    def __init__(self, output: Output):
+        self._batches = _token_batches(output)
+        self.buf: List[str] = []
+        self.pos = 0
+        self.line = 1
+        self.token = 0  # tokens consumed on the current line
+
+    def available(self) -> int:
+        while self.pos == len(self.buf):
+            batch = next(self._batches, None)
+            if batch is None:
+                return 0
+            self.buf, self.pos = batch, 0
+        return len(self.buf) - self.pos
+
+    def advance(self, window: List[str]) -> None:
+        self.pos += len(window)
+        breaks = window.count(_EOL)
+        if breaks:
+            self.line += breaks
+            self.token = window[::-1].index(_EOL)  # tokens after the last break
+        else:
+            self.token += len(window)
+
+    def remaining_lines(self) -> int:
+        lines = 0
+        while self.available():
+            window = self.buf[self.pos:]
+            lines += window.count(_EOL)
+            self.pos = len(self.buf)
+        return lines
+
+
+def _as_number(token: str) -> float | None:
+    # whatever float() takes, inf/nan/1_000 included; only differing tokens
+    # get here and the first mismatch ends the comparison, so misses are rare
     try:
-        return float(v)
-    except Exception:
+        return float(token)
+    except ValueError:
         return None
 
 
-def compare_outputs(expected: str, actual: str, mode: str = "exact", float_tol: float = 1e-6) -> Tuple[bool, str]:
+def _numbers_close(expected: str, actual: str, abs_tol: float, rel_tol: float) -> bool:
+    """Whether both tokens are numbers that agree within tolerance."""
+    e, a = _as_number(expected), _as_number(actual)
+    if e is None or a is None:
+        return False
+    if e == a:  # also equal infinities, where the difference is nan
+        return True
+    diff = abs(e - a)
+    if math.isnan(diff):
+        return True  # a nan was never out of tolerance
+    return diff <= abs_tol or math.isfinite(diff) and diff <= rel_tol * abs(e)
+
+
+def compare_outputs(
+    expected: Output,
+    actual: Output,
+    mode: str = "exact",
+    float_tol: float = 1e-6,
+    rel_tol: float = 0.0,
+) -> Tuple[bool, str]:
     """
     Return (passed, hint)
     - exact: strict string equality after normalizing newlines
     - tolerant: ignore trailing spaces, ignore blank boundary lines, and compare tokens;
-      if both tokens numeric, compare within float_tol.
+      if both tokens numeric, they match when within `float_tol` (absolute) or
+      `rel_tol` (relative to the expected value).
+    Either side may be a string or an iterable of str/bytes chunks. Both are
+    walked incrementally in bounded memory and comparison stops at the first
+    mismatch.
     """
     if mode == "exact":
-        return (expected == actual, "")
-
-    exp_lines = _normalize_lines(expected)
-    act_lines = _normalize_lines(actual)
-    if len(exp_lines) != len(act_lines):
-        return (False, f"line_count expected={len(exp_lines)} actual={len(act_lines)}")
-    for i, (e, a) in enumerate(zip(exp_lines, act_lines), start=1):
-        e_tokens = e.split()
-        a_tokens = a.split()
-        if len(e_tokens) != len(a_tokens):
-            return (False, f"line {i}: token_count expected={len(e_tokens)} actual={len(a_tokens)}")
-        for j, (et, at) in enumerate(zip(e_tokens, a_tokens), start=1):
-            e_num = _try_float(et)
-            a_num = _try_float(at)
-            if e_num is not None and a_num is not None:
-                if abs(e_num - a_num) > float_tol:
-                    return (False, f"line {i} token {j}: |{e_num}-{a_num}|>{float_tol}")
-            else:
-                if et != at:
-                    return (False, f"line {i} token {j}: '{et}'!='{at}'")
+        return (_equal_streams(expected, actual), "")
+
+    exp = _TokenCursor(expected)
+    act = _TokenCursor(actual)
+    while True:
+        n = min(exp.available(), act.available())
+        if n == 0:
+            break
+        exp_window = exp.buf[exp.pos:exp.pos + n]
+        act_window = act.buf[act.pos:act.pos + n]
+        if exp_window != act_window:
+            # slow path: the window holds a difference, maybe a numeric one
+            for k, (et, at) in enumerate(zip(exp_window, act_window)):
+                if et == at:
+                    continue
+                if et != _EOL and at != _EOL and _numbers_close(et, at, float_tol, rel_tol):
+                    continue
+                exp.advance(exp_window[:k])
+                line, token = exp.line, exp.token + 1
+                if et == _EOL:
+                    return (False, f"line {line}: extra token '{at}'")
+                if at == _EOL:
+                    return (False, f"line {line}: missing token {token}, expected '{et}'")
+                if _as_number(et) is None or _as_number(at) is None:
+                    return (False, f"line {line} token {token}: '{et}'!='{at}'")
+                return (False, f"line {line} token {token}: |{et}-{at}| out of tolerance")
+        exp.advance(exp_window)
+        act.advance(act_window)
+
+    # one side ended: mid-line it is a token count mismatch, else a line count one
+    if exp.available() and exp.buf[exp.pos] != _EOL:
+        return (False, f"line {exp.line}: missing token {exp.token + 1}, expected '{exp.buf[exp.pos]}'")
+    if act.available() and act.buf[act.pos] != _EOL:
+        return (False, f"line {exp.line}: extra token '{act.buf[act.pos]}'")
+    if exp.available() or act.available():
+        line = exp.line
+        expected_lines = line + exp.remaining_lines()
+        actual_lines = line + act.remaining_lines()
+        return (False, f"line_count expected={expected_lines} actual={actual_lines}")
     return (True, "")
 
+
+def _equal_streams(expected: Output, actual: Output) -> bool:
+    exp_it, act_it = _iter_text(expected), _iter_text(actual)
+    exp, act = "", ""
+    exp_pos = act_pos = 0
+    while True:
+        if exp_pos == len(exp):
+            exp, exp_pos = next((t for t in exp_it if t), ""), 0
+        if act_pos == len(act):
+            act, act_pos = next((t for t in act_it if t), ""), 0
+        if not exp or not act:
+            return not exp and not act
+        n = min(len(exp) - exp_pos, len(act) - act_pos)
+        if exp[exp_pos:exp_pos + n] != act[act_pos:act_pos + n]:
+            return False
+        exp_pos += n
+        act_pos += n
+
+
+def case_verdict(result: Dict[str, Any], output_ok: bool, time_limit_ms: int, memory_limit_mb: int) -> str:
+    """Classify one sandbox run; resource limits win over the exit status and output."""
+    if result.get("outputLimitExceeded"):
+        # killed on purpose, so neither the exit code nor the output counts
+        return OLE
+    cpu_ms = (result.get("cpuUserMs") or 0) + (result.get("cpuSysMs") or 0)
+    if result.get("status") == "timeout" or cpu_ms > time_limit_ms:
+        return TLE
+    memory_kb = result.get("memoryKb")
+    if memory_kb is not None and memory_kb > memory_limit_mb * 1024:
+        return MLE
+    if result.get("exitCode"):
+        # nothing but the OOM killer sends SIGKILL without a timeout
+        return MLE if result["exitCode"] == SIGKILL_EXIT else RE
+    return AC if output_ok else WA
+
+
+def overall_verdict(verdicts: list[str | None]) -> str:
+    """The first non-AC case verdict; AC only when every case passed.
+
+    Cases without a verdict were skipped after an earlier failure
+    (stop_on_first_failure), which then decides; with no such failure they
+    were never judged, which is a judge error, not AC.
+    """
+    failed = next((v for v in verdicts if v is not None and v != AC), None)
+    if failed is not None:
+        return failed
+    return JE if None in verdicts else AC
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app import models
+from app.config import get_settings
+from app.db import SessionLocal
+from app.schemas import ExecuteRequest, JudgeJobOut
+from app.services.jobs import Job, JobQueue
+from app.services.runner import run_submission
+from app.services.submissions import record_submission
+
+
+def _judge(payload: Dict[str, Any]) -> Dict[str, Any]:
+    # {"owner": ..., "request": ExecuteRequest as JSON}
+    req = ExecuteRequest(**payload["request"])
+    db = SessionLocal()
+    try:
+        p = None
+        if req.problem_id:
+            p = db.get(models.Problem, req.problem_id)
+            if p is None:
+                raise LookupError("problem not found")
+        res = run_submission(req, p)
+        if p is not None:
+            record_submission(payload["owner"], req, p, res)
+        return res.model_dump()
+    finally:
+        db.close()
+
+
+def _ts(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value, tz=timezone.utc) if value is not None else None
+
+
+def serialize_job(job: Job, position: Optional[int] = None) -> JudgeJobOut:
+    return JudgeJobOut(
+        id=job.id,
+        status=job.status,
+        position=position,
+        result=job.result,
+        error=job.error,
+        created_at=_ts(job.created_at),
+        started_at=_ts(job.started_at),
+        finished_at=_ts(job.finished_at),
+    )
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_judge_queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            settings = get_settings()
+            _queue = JobQueue(
+                "judge",
+                _judge,
+                workers=settings.judge_workers,
+                max_depth=settings.judge_queue_max_depth,
+                per_owner_limit=settings.judge_max_jobs_per_user,
+                retain=settings.judge_jobs_retain,
+            )
+            _queue.start()
+        return _queue
+
+
+def shutdown_judge_queue() -> None:
+    global _queue
+    with _queue_lock:
+        q, _queue = _queue, None
+    if q is not None:
+        q.stop()
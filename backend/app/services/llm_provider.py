@@ -1,11 +1,22 @@
 from __future__ import annotations
 
-import os
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, List, Sequence, Tuple, Union
+
+
+# Sections of a generated knowledge item, in the order they are produced
+SECTIONS = ("flashcard", "mindmap", "code", "project_usage")
+
+
+class ProviderError(Exception):
+    """A generation call failed; callers may retry."""
 
 
 class LLMProvider(ABC):
+    # Most prompts a provider accepts in one `agenerate_batch` call
+    max_batch_size: int = 1
+
     @abstractmethod
     def generate_from_question(self, question_text: str) -> Dict[str, Any]:
         """
@@ -14,15 +25,40 @@ class LLMProvider(ABC):
         """
         raise NotImplementedError
 
+    async def agenerate_from_question(self, question_text: str) -> Dict[str, Any]:
+        """Async variant; by default the sync call runs in a thread."""
+        return await asyncio.to_thread(self.generate_from_question, question_text)
 
-def get_provider() -> LLMProvider:
-    provider_name = os.getenv("LLM_PROVIDER", "mock").lower()
-    if provider_name == "mock":
-        from .mock_provider import MockProvider
+    async def agenerate_batch(self, question_texts: List[str]) -> List[Union[Dict[str, Any], BaseException]]:
+        """One result per prompt, in order; a prompt that failed yields its exception.
 
-        return MockProvider()
-    # Future: openai, others...
-    from .mock_provider import MockProvider
+        Providers with a batch API override this to send up to
+        `max_batch_size` prompts in one request; the default fans out.
+        """
+        return await asyncio.gather(
+            *(self.agenerate_from_question(text) for text in question_texts),
+            return_exceptions=True,
+        )
+
+    async def astream_from_question(
+        self, question_text: str, sections: Sequence[str] = SECTIONS
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield `(section, value)` for each of `sections` as soon as it is ready.
+
+        Providers with a streaming API override this; the default waits for
+        the whole result, so the first section arrives no earlier than with
+        `agenerate_from_question`.
+        """
+        data = await self.agenerate_from_question(question_text)
+        for name in sections:
+            yield name, data.get(name)
+
+
+def get_provider() -> LLMProvider:
+    """The process-wide provider: a router over the providers in LLM_PROVIDERS.
 
-    return MockProvider()
+    Built once, so connection pools and rate limits are shared by all callers.
+    """
+    from .provider_registry import get_provider_router
 
+    return get_provider_router()
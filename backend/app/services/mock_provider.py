@@ -1,10 +1,96 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import asyncio
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 
+from .llm_provider import SECTIONS, LLMProvider, ProviderError
+
+
+class MockProvider(LLMProvider):
+    """Deterministic output, with optional latency and failures for load tests.
+
+    A call costs `latency_ms` plus `chunk_delay_ms` per section, paid once
+    per call, so a batch of prompts costs the same as a single one (as with
+    a real batch endpoint). Streaming yields each section after its own
+    delay instead of all of them at the end. `failure_rate` makes that share
+    of prompts fail with `ProviderError` (mid-stream when streaming).
+    """
+
+    max_batch_size = 8
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+        chunk_delay_ms: float = 0,
+    ):
+        self.latency_ms = max(latency_ms, 0)
+        self.chunk_delay_ms = max(chunk_delay_ms, 0)
+        self.failure_rate = min(max(failure_rate, 0.0), 1.0)
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> "MockProvider":
+        return cls(
+            latency_ms=float(os.getenv("MOCK_LLM_LATENCY_MS", "0")),
+            failure_rate=float(os.getenv("MOCK_LLM_FAILURE_RATE", "0")),
+            chunk_delay_ms=float(os.getenv("MOCK_LLM_CHUNK_DELAY_MS", "0")),
+        )
+
+    @property
+    def _call_sec(self) -> float:
+        return (self.latency_ms + self.chunk_delay_ms * len(SECTIONS)) / 1000
 
-class MockProvider:
     def generate_from_question(self, question_text: str) -> Dict[str, Any]:
+        if self._call_sec:
+            time.sleep(self._call_sec)
+        self._maybe_fail()
+        return self._payload(question_text)
+
+    async def agenerate_from_question(self, question_text: str) -> Dict[str, Any]:
+        if self._call_sec:
+            await asyncio.sleep(self._call_sec)
+        self._maybe_fail()
+        return self._payload(question_text)
+
+    async def astream_from_question(
+        self, question_text: str, sections: Sequence[str] = SECTIONS
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        fail_at = None
+        if sections and self.failure_rate and self._random.random() < self.failure_rate:
+            fail_at = self._random.randrange(len(sections))
+        payload = self._payload(question_text)
+        for i, name in enumerate(sections):
+            if self.chunk_delay_ms:
+                await asyncio.sleep(self.chunk_delay_ms / 1000)
+            if i == fail_at:
+                raise ProviderError(f"mock provider: injected failure before {name}")
+            yield name, payload[name]
+
+    async def agenerate_batch(self, question_texts: List[str]) -> List[Union[Dict[str, Any], BaseException]]:
+        if self._call_sec:
+            await asyncio.sleep(self._call_sec)
+        results: List[Union[Dict[str, Any], BaseException]] = []
+        for text in question_texts:
+            try:
+                self._maybe_fail()
+                results.append(self._payload(text))
+            except ProviderError as exc:
+                results.append(exc)
+        return results
+
+    def _maybe_fail(self) -> None:
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            raise ProviderError("mock provider: injected failure")
+
+    @staticmethod
+    def _payload(question_text: str) -> Dict[str, Any]:
         # Deterministic, schema-compliant mock output
         return {
             "flashcard": {
@@ -29,4 +115,3 @@ class MockProvider:
             },
             "project_usage": "在实际项目中可用于搭建知识卡片与复习素材。",
         }
-
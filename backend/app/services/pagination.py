@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+
+
+MAX_CACHED_COUNTS = 1000
+
+def encode_cursor(created_at: datetime, id_: UUID) -> str:
+    """Opaque cursor for the row after which the next page starts."""
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(id_)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Inverse of `encode_cursor`; raises ValueError for anything else."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        return datetime.fromisoformat(data["c"]), UUID(data["i"])
+    except (ValueError, TypeError, KeyError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+async def keyset_page(
+    db: AsyncSession,
+    stmt: Select,
+    created_col: Any,
+    id_col: Any,
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[List[Any], Optional[str]]:
+    """One page of `stmt` newest first, and the cursor of the next page (None at the end).
+
+    Rows are ordered by (created_at, id) descending and the page starts right
+    after the cursor row, so the (created_at, id) index is walked from the
+    cursor instead of skipping OFFSET rows.
+    """
+    if cursor:
+        created_at, id_ = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(created_col, id_col) < tuple_(created_at, id_))
+    stmt = stmt.order_by(created_col.desc(), id_col.desc()).limit(limit + 1)
+    rows = (await db.execute(stmt)).scalars().unique().all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, created_col.key), getattr(last, id_col.key))
+
+
+class CountCache:
+    """Totals for paginated listings, reused for `ttl_sec`.
+
+    `approx` totals only need to be roughly right, so filtered counts are
+    cached per statement and unfiltered ones come from the planner's row
+    estimate; neither scans the table on every page.
+    """
+
+    def __init__(self, ttl_sec: int):
+        self.ttl_sec = max(ttl_sec, 0)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[float, int]] = {}
+
+    async def count(self, db: AsyncSession, count_stmt: Select, table: Optional[str] = None) -> int:
+        """Approximate result of `count_stmt`; pass `table` when it is an unfiltered count of it."""
+        if table is not None:
+            estimate = await _estimated_rows(db, table)
+            if estimate is not None:
+                return estimate
+        compiled = count_stmt.compile()
+        key = f"{compiled}|{sorted(compiled.params.items())!r}"
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl_sec:
+                return entry[1]
+        total = await db.scalar(count_stmt) or 0
+        with self._lock:
+            self._entries[key] = (now, total)
+            if len(self._entries) > MAX_CACHED_COUNTS:
+                # bounded: drop expired entries, or everything if none has expired
+                expired = [k for k, (t, _) in self._entries.items() if now - t >= self.ttl_sec]
+                for k in expired or list(self._entries):
+                    del self._entries[k]
+        return total
+
+
+async def _estimated_rows(db: AsyncSession, table: str) -> Optional[int]:
+    # reltuples is -1 until the table has been vacuumed or analyzed
+    estimate = await db.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"), {"t": table})
+    return int(estimate) if estimate is not None and estimate >= 0 else None
+
+
+async def count_total(
+    db: AsyncSession,
+    mode: str,
+    count_stmt: Select,
+    table: Optional[str] = None,
+) -> Optional[int]:
+    """Total for a listing: `exact` counts, `approx` uses the count cache, `none` skips it."""
+    if mode == "exact":
+        return await db.scalar(count_stmt) or 0
+    if mode == "approx":
+        return await get_count_cache().count(db, count_stmt, table)
+    return None
+
+
+_count_cache: Optional[CountCache] = None
+_count_cache_lock = threading.Lock()
+
+
+def get_count_cache() -> CountCache:
+    global _count_cache
+    with _count_cache_lock:
+        if _count_cache is None:
+            _count_cache = CountCache(get_settings().pagination_count_cache_sec)
+        return _count_cache
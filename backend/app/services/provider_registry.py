@@ -0,0 +1,374 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, TypeVar, Union
+
+from app.config import get_settings
+from .llm_provider import SECTIONS, LLMProvider, ProviderError
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+# Upper bounds (ms) of the call latency histogram; the last bucket is open
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000)
+# Longest sleep between attempts to get a slot when every provider is busy
+MAX_POLL_SEC = 0.05
+
+
+class TokenBucket:
+    """`rate` requests per second on average, bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token; if there is none, return the seconds until there will be."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ProviderSlot:
+    """A named provider with its routing weight, limits, health and latency stats."""
+
+    def __init__(
+        self,
+        name: str,
+        provider: LLMProvider,
+        weight: float = 1,
+        rate_per_sec: float = 0,
+        burst: float = 0,
+        max_concurrency: int = 0,
+    ):
+        self.name = name
+        self.provider = provider
+        self.weight = max(weight, 0)
+        self.max_concurrency = max(max_concurrency, 0)  # 0 = unbounded
+        self.bucket = TokenBucket(rate_per_sec, burst or rate_per_sec) if rate_per_sec > 0 else None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.failures_in_row = 0
+        self.open_until = 0.0
+        self.latency_ms_total = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def try_acquire(self) -> float:
+        """0 when a call may start now (and counts as in flight), else seconds to wait."""
+        with self._lock:
+            if self.max_concurrency and self.in_flight >= self.max_concurrency:
+                return MAX_POLL_SEC
+            wait = self.bucket.take() if self.bucket is not None else 0.0
+            if not wait:
+                self.in_flight += 1
+            return wait
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def record(self, ms: float, ok: bool, failure_threshold: int, cooldown_sec: float) -> None:
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms < bound), len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            self.calls += 1
+            self.latency_ms_total += ms
+            self.latency_buckets[bucket] += 1
+            if ok:
+                self.failures_in_row = 0
+                return
+            self.errors += 1
+            self.failures_in_row += 1
+            if self.failures_in_row >= failure_threshold:
+                self.open_until = time.monotonic() + cooldown_sec
+        if self.failures_in_row == failure_threshold:
+            logger.warning("provider %s failed %d times in a row; skipping it for %ss", self.name, failure_threshold, cooldown_sec)
+
+    def healthy(self, now: float) -> bool:
+        return self.open_until <= now
+
+    def stats(self) -> Dict[str, Any]:
+        labels = [f"<{b}ms" for b in LATENCY_BUCKETS_MS] + [f">={LATENCY_BUCKETS_MS[-1]}ms"]
+        with self._lock:
+            return {
+                "weight": self.weight,
+                "healthy": self.healthy(time.monotonic()),
+                "in_flight": self.in_flight,
+                "max_concurrency": self.max_concurrency,
+                "rate_per_sec": self.bucket.rate if self.bucket is not None else None,
+                "calls": self.calls,
+                "errors": self.errors,
+                "latency_ms_avg": round(self.latency_ms_total / self.calls, 3) if self.calls else 0.0,
+                "latency_ms": dict(zip(labels, self.latency_buckets)),
+            }
+
+
+class ProviderRouter(LLMProvider):
+    """Spreads calls over named providers by weight, with failover.
+
+    Each call goes to a healthy provider chosen at random in proportion to
+    its weight, skipping providers whose rate limit or concurrency limit is
+    reached; when all are, it waits (up to `acquire_timeout_sec`) for the
+    first to free up. A failed call is retried on the next provider.
+    Providers that fail `failure_threshold` times in a row are skipped for
+    `cooldown_sec` unless no other is left.
+    """
+
+    def __init__(
+        self,
+        slots: Sequence[ProviderSlot],
+        failure_threshold: int = 3,
+        cooldown_sec: float = 30,
+        acquire_timeout_sec: float = 30,
+    ):
+        if not slots:
+            raise ValueError("at least one provider is required")
+        self.slots = list(slots)
+        self.failure_threshold = max(failure_threshold, 1)
+        self.cooldown_sec = cooldown_sec
+        self.acquire_timeout_sec = acquire_timeout_sec
+        # a batch goes to one provider, so it must fit all of them
+        self.max_batch_size = min(s.provider.max_batch_size for s in self.slots)
+        self._lock = threading.Lock()
+        self.failovers = 0
+        self.waits = 0
+        self.wait_ms_total = 0.0
+
+    def generate_from_question(self, question_text: str) -> Dict[str, Any]:
+        tried: Set[str] = set()
+        while True:
+            slot = self._acquire(tried)
+            start = time.perf_counter()
+            try:
+                result = slot.provider.generate_from_question(question_text)
+            except Exception as exc:
+                self._failed(slot, start, tried, exc)
+                continue
+            finally:
+                slot.release()
+            self._record(slot, start, True)
+            return result
+
+    async def agenerate_from_question(self, question_text: str) -> Dict[str, Any]:
+        return await self._call(lambda provider: provider.agenerate_from_question(question_text))
+
+    async def agenerate_batch(self, question_texts: List[str]) -> List[Union[Dict[str, Any], BaseException]]:
+        # a batch in which every prompt failed counts as a failed call
+        return await self._call(
+            lambda provider: provider.agenerate_batch(question_texts),
+            failed=lambda results: all(isinstance(r, BaseException) for r in results),
+        )
+
+    async def astream_from_question(
+        self, question_text: str, sections: Sequence[str] = SECTIONS
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        tried: Set[str] = set()
+        while True:
+            slot = await self._aacquire(tried)
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in slot.provider.astream_from_question(question_text, sections):
+                    started = True
+                    yield chunk
+            except Exception as exc:
+                if started:
+                    # sections already went out; the caller resumes from them
+                    self._record(slot, start, False)
+                    if isinstance(exc, ProviderError):
+                        raise
+                    raise ProviderError(str(exc) or type(exc).__name__) from exc
+                self._failed(slot, start, tried, exc)
+                continue
+            finally:
+                slot.release()
+            self._record(slot, start, True)
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            router = {
+                "failovers": self.failovers,
+                "waits": self.waits,
+                "wait_ms_total": round(self.wait_ms_total, 3),
+            }
+        return {**router, "providers": {s.name: s.stats() for s in self.slots}}
+
+    def close(self) -> None:
+        for slot in self.slots:
+            close = getattr(slot.provider, "close", None)
+            if close is not None:
+                close()
+
+    # internals -----------------------------------------------------------
+    async def _call(
+        self,
+        call: Callable[[LLMProvider], Awaitable[T]],
+        failed: Callable[[T], bool] = lambda result: False,
+    ) -> T:
+        tried: Set[str] = set()
+        while True:
+            slot = await self._aacquire(tried)
+            start = time.perf_counter()
+            try:
+                result = await call(slot.provider)
+            except Exception as exc:
+                self._failed(slot, start, tried, exc)
+                continue
+            finally:
+                slot.release()
+            if failed(result) and len(tried) < len(self.slots):
+                self._failed(slot, start, tried, None)
+                continue
+            self._record(slot, start, not failed(result))
+            return result
+
+    def _order(self, tried: Set[str]) -> List[ProviderSlot]:
+        now = time.monotonic()
+        left = [s for s in self.slots if s.name not in tried]
+        healthy = [s for s in left if s.healthy(now)]
+        if not healthy:
+            # every provider left is cooling down: try the one that failed longest ago
+            return sorted(left, key=lambda s: s.open_until)
+        # weighted random order (Efraimidis-Spirakis); weight 0 = only as a fallback
+        return sorted(healthy, key=lambda s: random.random() ** (1 / s.weight) if s.weight else -1.0, reverse=True)
+
+    def _try_acquire(self, tried: Set[str]) -> Tuple[Optional[ProviderSlot], float]:
+        wait = MAX_POLL_SEC
+        for slot in self._order(tried):
+            slot_wait = slot.try_acquire()
+            if not slot_wait:
+                return slot, 0.0
+            wait = min(wait, slot_wait)
+        return None, wait
+
+    def _acquire(self, tried: Set[str]) -> ProviderSlot:
+        slot, wait = self._try_acquire(tried)
+        start = time.perf_counter()
+        while slot is None:
+            self._check_wait(start)
+            time.sleep(wait)
+            slot, wait = self._try_acquire(tried)
+        self._waited(start, slot)
+        tried.add(slot.name)
+        return slot
+
+    async def _aacquire(self, tried: Set[str]) -> ProviderSlot:
+        # polls rather than waiting on a condition: callers run on several event loops
+        slot, wait = self._try_acquire(tried)
+        start = time.perf_counter()
+        while slot is None:
+            self._check_wait(start)
+            await asyncio.sleep(wait)
+            slot, wait = self._try_acquire(tried)
+        self._waited(start, slot)
+        tried.add(slot.name)
+        return slot
+
+    def _check_wait(self, start: float) -> None:
+        if time.perf_counter() - start > self.acquire_timeout_sec:
+            raise ProviderError(f"no provider available within {self.acquire_timeout_sec}s")
+
+    def _waited(self, start: float, slot: ProviderSlot) -> None:
+        ms = (time.perf_counter() - start) * 1000
+        if ms >= 1:
+            with self._lock:
+                self.waits += 1
+                self.wait_ms_total += ms
+
+    def _record(self, slot: ProviderSlot, start: float, ok: bool) -> None:
+        slot.record((time.perf_counter() - start) * 1000, ok, self.failure_threshold, self.cooldown_sec)
+
+    def _failed(self, slot: ProviderSlot, start: float, tried: Set[str], exc: Optional[Exception]) -> None:
+        """Record a failed call; raises when no provider is left to try."""
+        self._record(slot, start, False)
+        if len(tried) >= len(self.slots):
+            if exc is None:
+                return
+            if isinstance(exc, ProviderError):
+                raise exc
+            raise ProviderError(str(exc) or type(exc).__name__) from exc
+        logger.info("provider %s failed (%s); trying the next one", slot.name, exc or "every prompt failed")
+        with self._lock:
+            self.failovers += 1
+
+
+def build_provider(spec: Dict[str, Any]) -> LLMProvider:
+    """Provider for one entry of LLM_PROVIDERS."""
+    kind = spec.get("type", "mock")
+    if kind == "mock":
+        from .mock_provider import MockProvider
+
+        default = MockProvider.from_env()
+        return MockProvider(
+            latency_ms=spec.get("latency_ms", default.latency_ms),
+            failure_rate=spec.get("failure_rate", default.failure_rate),
+            chunk_delay_ms=spec.get("chunk_delay_ms", default.chunk_delay_ms),
+        )
+    if kind == "http":
+        from .http_provider import HttpProvider
+
+        return HttpProvider(
+            spec["url"],
+            timeout_sec=spec.get("timeout_sec", 60),
+            max_connections=spec.get("max_connections", 20),
+            max_batch_size=spec.get("max_batch_size", 1),
+            api_key=os.getenv(spec["api_key_env"]) if spec.get("api_key_env") else None,
+        )
+    raise ValueError(f"unknown provider type {kind!r}")
+
+
+def build_router(specs: Sequence[Dict[str, Any]], **options: Any) -> ProviderRouter:
+    slots = [
+        ProviderSlot(
+            spec.get("name") or f"{spec.get('type', 'mock')}-{i}",
+            build_provider(spec),
+            weight=spec.get("weight", 1),
+            rate_per_sec=spec.get("rate_per_sec", 0),
+            burst=spec.get("burst", 0),
+            max_concurrency=spec.get("max_concurrency", 0),
+        )
+        for i, spec in enumerate(specs)
+    ]
+    return ProviderRouter(slots, **options)
+
+
+_router: Optional[ProviderRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_provider_router() -> ProviderRouter:
+    """Providers are built once per process, so HTTP connection pools are reused."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            settings = get_settings()
+            specs = settings.llm_providers or [{"name": os.getenv("LLM_PROVIDER", "mock").lower(), "type": "mock"}]
+            _router = build_router(
+                specs,
+                failure_threshold=settings.llm_failure_threshold,
+                cooldown_sec=settings.llm_cooldown_sec,
+                acquire_timeout_sec=settings.llm_acquire_timeout_sec,
+            )
+        return _router
+
+
+def shutdown_provider_router() -> None:
+    global _router
+    with _router_lock:
+        r, _router = _router, None
+    if r is not None:
+        r.close()
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+from pydantic import ValidationError
+
+from app.config import get_settings
+from app.schemas import QuestionCreate
+from app.services.generation_cache import question_hash
+from app.services.jobs import JobQueue
+
+FORMATS = ("jsonl", "csv")
+METHODS = ("copy", "insert")
+# separator of the tags column in CSV files: "cpp|oop"
+CSV_TAG_SEPARATOR = "|"
+COLUMNS = ("text", "tags", "difficulty", "text_hash")
+MAX_REPORTED_ERRORS = 20
+
+_STAGE = """
+CREATE TEMP TABLE IF NOT EXISTS _question_import (
+    text text, tags varchar[], difficulty varchar(10), text_hash varchar(64)
+) ON COMMIT DELETE ROWS
+"""
+_COPY = f"COPY _question_import ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+# ids and timestamps come from the server: cheaper than building them per row in Python
+_MERGE = f"""
+INSERT INTO questions (id, created_at, {', '.join(COLUMNS)})
+SELECT gen_random_uuid(), clock_timestamp(), {', '.join(COLUMNS)} FROM _question_import
+ON CONFLICT (text_hash) DO NOTHING
+"""
+_INSERT = f"INSERT INTO questions (id, created_at, {', '.join(COLUMNS)}) VALUES %s ON CONFLICT (text_hash) DO NOTHING RETURNING id"
+_INSERT_ROW = f"(gen_random_uuid(), clock_timestamp(), {', '.join(['%s'] * len(COLUMNS))})"
+
+
+def question_row(item: QuestionCreate) -> Dict[str, Any]:
+    """Column values of a new question, `text_hash` included; `id` and `created_at` are left to defaults."""
+    return {
+        "text": item.text,
+        "tags": item.tags,
+        "difficulty": item.difficulty,
+        "text_hash": question_hash(item.text),
+    }
+
+
+def parse(lines: Iterable[str], fmt: str) -> Iterator[Tuple[int, Optional[QuestionCreate], Optional[str]]]:
+    """Yield (line number, question or None, error or None) for each record.
+
+    JSONL: one `{"text", "tags", "difficulty"}` object per line. CSV: a header
+    row with `text` and optionally `tags` (separated by `|`) and `difficulty`.
+    """
+    if fmt == "jsonl":
+        for n, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                yield n, _validate(json.loads(line)), None
+            except (ValueError, ValidationError) as exc:
+                yield n, None, _error(exc)
+    elif fmt == "csv":
+        reader = csv.DictReader(lines)
+        for row in reader:
+            n = reader.line_num
+            tags = [t.strip() for t in (row.get("tags") or "").split(CSV_TAG_SEPARATOR) if t.strip()]
+            record = {"text": row.get("text"), "tags": tags or None, "difficulty": row.get("difficulty") or None}
+            try:
+                yield n, _validate(record), None
+            except (ValueError, ValidationError) as exc:
+                yield n, None, _error(exc)
+    else:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+
+
+def _validate(record: Any) -> QuestionCreate:
+    if not isinstance(record, dict):
+        raise ValueError("expected an object")
+    item = QuestionCreate.model_validate(record)
+    if not item.text.strip():
+        raise ValueError("text is empty")
+    return item
+
+
+def _error(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'record'}: {e['msg']}" for e in exc.errors())
+    return str(exc)
+
+
+def _array(values: Optional[List[str]]) -> Optional[str]:
+    # Postgres array literal for a CSV COPY field
+    if values is None:
+        return None
+    quoted = ('"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values)
+    return "{" + ",".join(quoted) + "}"
+
+
+class QuestionImporter:
+    """Streams questions into the database in chunks, skipping duplicates.
+
+    A question is a duplicate when its normalized text (`question_hash`)
+    matches one earlier in the input or one already stored; the unique
+    index on `questions.text_hash` settles races with concurrent writers.
+    Each chunk is written with one round trip and committed, then progress
+    is reported; the next chunk is parsed meanwhile:
+
+      copy    COPY into a temp table, then INSERT ... SELECT ... ON CONFLICT
+      insert  multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING id
+    """
+
+    def __init__(
+        self,
+        method: str = "copy",
+        chunk_size: int = 5000,
+        report: Callable[..., None] = lambda **fields: None,
+    ):
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {', '.join(METHODS)}")
+        self.method = method
+        self.chunk_size = max(chunk_size, 1)
+        self.report = report
+        self.progress = {"read": 0, "inserted": 0, "duplicates": 0, "invalid": 0}
+        self.errors: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def run(self, lines: Iterable[str], fmt: str) -> Dict[str, Any]:
+        from app.db import engine
+
+        start = time.perf_counter()
+        seen = set()
+        chunk: List[Dict[str, Any]] = []
+        raw = engine.raw_connection()
+        # one chunk is written while the next is parsed and hashed: the
+        # driver releases the GIL while the server works
+        writer = ThreadPoolExecutor(1, thread_name_prefix="question-import-writer")
+        pending: Optional[Future] = None
+        try:
+            cur = raw.cursor()
+            if self.method == "copy":
+                cur.execute(_STAGE)
+            for line, item, error in parse(lines, fmt):
+                if item is None:
+                    self._count(read=1, invalid=1)
+                    if len(self.errors) < MAX_REPORTED_ERRORS:
+                        self.errors.append({"line": line, "error": error})
+                    continue
+                row = question_row(item)
+                if row["text_hash"] in seen:
+                    self._count(read=1, duplicates=1)
+                    continue
+                self._count(read=1)
+                seen.add(row["text_hash"])
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    if pending is not None:
+                        pending.result()
+                    pending = writer.submit(self._flush, raw, cur, chunk, start)
+                    chunk = []
+            if pending is not None:
+                pending.result()
+            self._flush(raw, cur, chunk, start)
+        finally:
+            writer.shutdown()
+            raw.close()
+        elapsed = time.perf_counter() - start
+        return {
+            **self.progress,
+            "errors": self.errors,
+            "elapsed_sec": round(elapsed, 3),
+            "rows_per_sec": round(self.progress["read"] / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def _count(self, **deltas: int) -> None:
+        with self._lock:
+            for key, n in deltas.items():
+                self.progress[key] += n
+
+    def _flush(self, raw, cur, chunk: List[Dict[str, Any]], start: float) -> None:
+        if chunk:
+            inserted = self._copy(cur, chunk) if self.method == "copy" else self._insert(cur, chunk)
+            raw.commit()
+            self._count(inserted=inserted, duplicates=len(chunk) - inserted)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            progress = dict(self.progress)
+        self.report(**progress, rows_per_sec=round(progress["read"] / elapsed) if elapsed else 0)
+
+    def _copy(self, cur, chunk: List[Dict[str, Any]]) -> int:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for row in chunk:
+            writer.writerow([row["text"], _array(row["tags"]), row["difficulty"], row["text_hash"]])
+        buf.seek(0)
+        cur.copy_expert(_COPY, buf)
+        cur.execute(_MERGE)
+        return cur.rowcount
+
+    def _insert(self, cur, chunk: List[Dict[str, Any]]) -> int:
+        values = [tuple(row[c] for c in COLUMNS) for row in chunk]
+        returned = execute_values(cur, _INSERT, values, template=_INSERT_ROW, page_size=len(values), fetch=True)
+        return len(returned)
+
+
+def _run_job(payload: Dict[str, Any], report: Callable[..., None]) -> Dict[str, Any]:
+    # {"path": spooled upload, "format": "jsonl"|"csv", "method": "copy"|"insert"}
+    importer = QuestionImporter(payload["method"], get_settings().question_import_chunk_size, report)
+    try:
+        with open(payload["path"], encoding="utf-8-sig", newline="") as f:
+            return importer.run(f, payload["format"])
+    finally:
+        os.unlink(payload["path"])
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_import_queue() -> JobQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            settings = get_settings()
+            _queue = JobQueue(
+                "question-import",
+                _run_job,
+                workers=settings.question_import_workers,
+                max_depth=settings.question_import_queue_max_depth,
+                per_owner_limit=settings.question_import_max_jobs_per_user,
+                retain=settings.question_import_jobs_retain,
+                with_progress=True,
+            )
+            _queue.start()
+        return _queue
+
+
+def shutdown_import_queue() -> None:
+    global _queue
+    with _queue_lock:
+        q, _queue = _queue, None
+    if q is not None:
+        q.stop()
@@ -0,0 +1,110 @@
+# Sandbox run wrapper; needs nothing beyond perl-base, which every toolchain
+# image ships.
+#
+#   perl /abs/path/run.pl INPUT LIMIT_MS COMMAND [UID]
+#
+# Runs COMMAND through /bin/sh with stdin from INPUT under a wall-clock
+# limit, then appends one line to stderr:
+#   __IA_RUSAGE__ exit=N timeout=0|1 interrupted=0|1 wall_us=N user_us=N sys_us=N maxrss_kb=N
+# SIGUSR1 to the wrapper (its pid is written to "$0.pid") kills the program
+# early, e.g. once it has produced more output than the caller will read;
+# the usage line then reports interrupted=1.
+# Once the program exits the shell re-execs this script with --report, which
+# takes getrusage(RUSAGE_CHILDREN) and the end time in the shell's place.
+# The numbers therefore cover the program's processes only: no wrapper
+# memory floor and no wrapper start-up time.
+# With UID, INPUT is opened first and COMMAND then runs as that user (and
+# group), so it cannot read test data the input was taken from.
+BEGIN {
+    if (@ARGV && $ARGV[0] eq "--report") {
+        my (undef, $code, $nr_clock_gettime, $nr_getrusage) = @ARGV;
+        my $ts = "\0" x 16;
+        my $ru = "\0" x 144;
+        syscall($nr_clock_gettime, 1, $ts);
+        syscall($nr_getrusage, -1, $ru);
+        my ($sec, $nsec) = unpack("q q", $ts);
+        my @f = unpack("q5", $ru);
+        if (open(my $out, ">&=", 3)) {
+            print $out join(" ", $sec * 1_000_000 + int($nsec / 1000),
+                $f[0] * 1_000_000 + $f[1], $f[2] * 1_000_000 + $f[3], $f[4]);
+            close($out);
+        }
+        exit($code);
+    }
+}
+
+use strict;
+use warnings;
+use POSIX ();
+
+# getrusage, clock_gettime, setitimer
+my %SYSCALLS = (x86_64 => [98, 228, 38], aarch64 => [165, 113, 103]);
+my ($SYS_getrusage, $SYS_clock_gettime, $SYS_setitimer) = @{ $SYSCALLS{(POSIX::uname())[4]} || [] };
+
+sub now_us {
+    my $ts = "\0" x 16;
+    return time() * 1_000_000 unless $SYS_clock_gettime && syscall($SYS_clock_gettime, 1, $ts) == 0;
+    my ($sec, $nsec) = unpack("q q", $ts);
+    return $sec * 1_000_000 + int($nsec / 1000);
+}
+
+sub children_usage {
+    my $ru = "\0" x 144;
+    return (0, 0, 0) unless $SYS_getrusage && syscall($SYS_getrusage, -1, $ru) == 0;
+    my @f = unpack("q5", $ru);
+    return ($f[0] * 1_000_000 + $f[1], $f[2] * 1_000_000 + $f[3], $f[4]);
+}
+
+my ($input, $limit_ms, $cmd, $uid) = @ARGV;
+my $script = $cmd;
+if ($SYS_getrusage) {
+    # the program itself must not see fd 3
+    $script = "{ $cmd\n} 3>&-\nexec /usr/bin/perl $0 --report \$? $SYS_clock_gettime $SYS_getrusage";
+}
+
+pipe(my $reader, my $writer) or die "pipe: $!\n";
+my $started = now_us();
+my $pid = fork() // die "fork: $!\n";
+if ($pid == 0) {
+    setpgrp(0, 0);
+    close($reader);
+    POSIX::dup2(fileno($writer), 3) or die "dup2: $!\n";
+    open(STDIN, "<", $input) or die "cannot open $input: $!\n";
+    if (defined $uid) {
+        $) = "$uid $uid";  # also drops supplementary groups
+        POSIX::setgid($uid) or die "setgid: $!\n";
+        POSIX::setuid($uid) or die "setuid: $!\n";
+    }
+    exec("/bin/sh", "-c", $script) or die "exec: $!\n";
+}
+close($writer);
+
+my $timed_out = 0;
+my $interrupted = 0;
+$SIG{ALRM} = sub { $timed_out = 1; kill("KILL", -$pid); };
+$SIG{USR1} = sub { $interrupted = 1; kill("KILL", -$pid); };
+if (open(my $pidfile, ">", "$0.pid")) {
+    print $pidfile $$;
+    close($pidfile);
+}
+if ($limit_ms > 0) {
+    my $itv = pack("q q q q", 0, 0, int($limit_ms / 1000), ($limit_ms % 1000) * 1000);
+    alarm(int(($limit_ms + 999) / 1000)) unless $SYS_setitimer && syscall($SYS_setitimer, 0, $itv, 0) == 0;
+}
+waitpid($pid, 0);
+my $status = $?;
+my $finished = now_us();
+$SIG{ALRM} = $SIG{USR1} = "IGNORE";
+kill("KILL", -$pid);  # leftover background processes
+
+my $report = do { local $/; <$reader> } // "";
+my ($ended, $user_us, $sys_us, $maxrss_kb) = split(" ", $report);
+unless (defined $maxrss_kb) {
+    # killed (or exited from the shell) before reporting
+    $ended = $finished;
+    ($user_us, $sys_us, $maxrss_kb) = children_usage();
+}
+my $code = $status & 127 ? 128 + ($status & 127) : $status >> 8;
+printf STDERR "\n__IA_RUSAGE__ exit=%d timeout=%d interrupted=%d wall_us=%d user_us=%d sys_us=%d maxrss_kb=%d\n",
+    $code, $timed_out, $interrupted, $ended - $started, $user_us, $sys_us, $maxrss_kb;
+exit($code);
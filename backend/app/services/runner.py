@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from docker.errors import DockerException
+from sqlalchemy.orm import object_session
+
+from app import models
+from app.config import get_settings
+from app.schemas import CaseResult, ExecuteRequest, ExecuteResponse
+from app.services.checker import Checker
+from app.services.compile_cache import get_compile_cache
+from app.services.images import get_image_manager
+from app.services.judge import AC, CE, JE, WA, case_verdict, compare_outputs, overall_verdict
+from app.services.sandbox import (
+    LANGUAGE_MAP,
+    RunLimits,
+    cpu_time_ms,
+    execute_code,
+    execute_parallel,
+    format_memory,
+    format_time,
+)
+from app.services.testcases import get_test_case_store, iter_chunks, read_prefix, test_set_version
+from app.services.verdict_cache import get_verdict_cache, normalize_source
+
+
+def _meta(compiled: Dict[str, Any] | None) -> Dict[str, Any]:
+    meta: Dict[str, Any] = {}
+    if compiled and compiled.get("cached") is not None:
+        stats = get_compile_cache().stats()
+        meta["compileCache"] = {
+            "hit": compiled["cached"],
+            "compileMs": compiled.get("timeMs", 0),
+            "savedMs": compiled.get("savedMs", 0),
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "totalSavedMs": stats["savedMs"],
+        }
+    return meta
+
+
+def problem_limits(p: models.Problem, language: str) -> RunLimits:
+    """The problem's limits scaled for `language`.
+
+    Multipliers come from the problem's `limit_multipliers` entry for the
+    language, falling back to the language defaults in LANGUAGE_MAP.
+    """
+    settings = get_settings()
+    lang = (language or "").lower()
+    config = LANGUAGE_MAP.get(lang)
+    override = (p.limit_multipliers or {}).get(lang) or {}
+    time_mult = float(override.get("time", config.time_multiplier if config else 1.0))
+    memory_mult = float(override.get("memory", config.memory_multiplier if config else 1.0))
+    return RunLimits.for_cpu_time(
+        time_ms=int((p.time_limit_ms or settings.problem_time_limit_ms) * time_mult),
+        memory_mb=int((p.memory_limit_mb or settings.problem_memory_limit_mb) * memory_mult),
+    )
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def judge_key(req: ExecuteRequest, p: models.Problem) -> str:
+    """Verdict cache key: everything the judged response depends on.
+
+    Source (normalized), toolchain image, the problem's test set, checker
+    and effective limits, the comparison options, and the output cap.
+    """
+    settings = get_settings()
+    lang = (req.language or "").lower()
+    config = LANGUAGE_MAP.get(lang)
+    limits = problem_limits(p, lang)
+    image_id = ""
+    if config is not None:
+        manager = get_image_manager()
+        try:
+            manager.ensure(config.image)  # resolves the local image id on first use
+        except DockerException:
+            pass
+        image_id = manager.image_id(config.image)
+    parts = [
+        lang,
+        image_id,
+        _sha256(normalize_source(req.code)),
+        test_set_version(p),
+        p.checker_language or "",
+        _sha256(p.checker_code or ""),
+        f"{limits.time_ms}:{limits.memory_mb}:{settings.sandbox_stdout_limit_kb}",
+        req.match or "exact",
+        repr(req.float_tolerance or 1e-6),
+        repr(req.float_rel_tolerance or 0.0),
+        str(bool(req.stop_on_first_failure)),
+    ]
+    return _sha256("\0".join(parts))
+
+
+def _expected_preview(path: Path) -> Tuple[str, bool]:
+    return read_prefix(path, get_settings().sandbox_output_preview_kb * 1024)
+
+
+def _failed(files: List[Tuple[Path, Path]], compiled: Dict[str, Any], verdict: str, meta: Dict[str, Any]) -> ExecuteResponse:
+    """Response for a submission that never ran: it or the checker did not compile, or the sandbox failed."""
+    cases = [
+        CaseResult(
+            expected=expected,
+            expectedTruncated=expected_truncated,
+            actual="",
+            passed=False,
+            stderr=compiled["stderr"],
+            status=compiled["status"],
+            verdict=verdict,
+        )
+        for expected, expected_truncated in (_expected_preview(output) for _, output in files)
+    ]
+    return ExecuteResponse(
+        stdout="",
+        stderr=compiled["stderr"],
+        executionTime=format_time(compiled["timeMs"]),
+        memory="",
+        status="timeout" if compiled["status"] == "timeout" else "error",
+        passed=False,
+        cases=cases,
+        verdict=verdict,
+        compileTimeMs=compiled["timeMs"] if verdict == CE else None,
+        meta=meta,
+    )
+
+
+def _judge_problem(req: ExecuteRequest, p: models.Problem) -> ExecuteResponse:
+    """Compile once and judge the test cases concurrently."""
+    limits = problem_limits(p, req.language)
+    meta_limits = {"timeMs": limits.time_ms, "memoryMb": limits.memory_mb}
+    # (input, expected output) files from the test-case store; inputs go
+    # to the sandbox as files and outputs are compared straight from disk
+    try:
+        files = get_test_case_store().case_files(object_session(p), p.cases)
+    except LookupError as exc:
+        return _failed([], {"status": "error", "stderr": str(exc), "timeMs": 0}, JE, {"limits": meta_limits})
+    verdicts: Dict[int, str] = {}
+    messages: Dict[int, str] = {}
+
+    # With a checker, compile it before running anything: if it is broken
+    # the submission cannot be judged at all.
+    checker = Checker(p.checker_language, p.checker_code) if p.checker_code else None
+    if checker is not None:
+        try:
+            checker_compiled = checker.open()
+        except DockerException as exc:
+            checker_compiled = {"status": "error", "stderr": str(exc), "timeMs": 0}
+        if checker_compiled["status"] != "success":
+            checker_compiled = {**checker_compiled, "stderr": f"checker: {checker_compiled['stderr']}"}
+            return _failed(files, checker_compiled, JE, {"limits": meta_limits})
+
+    def check(i: int, res: Dict[str, Any]) -> bool:
+        # the full captured output, not the preview in res["stdout"]; dropped once judged
+        chunks = res.pop("stdoutChunks")
+        verdict = case_verdict(res, True, limits.time_ms, limits.memory_mb)
+        if verdict == AC and checker is not None:
+            verdict, messages[i] = checker.check(files[i][0], files[i][1], chunks)
+        elif verdict == AC:
+            output_ok, _ = compare_outputs(
+                iter_chunks(files[i][1]),
+                chunks,
+                req.match or "exact",
+                req.float_tolerance or 1e-6,
+                req.float_rel_tolerance or 0.0,
+            )
+            verdict = AC if output_ok else WA
+        verdicts[i] = verdict
+        return verdict == AC
+
+    try:
+        batch = execute_parallel(
+            req.language,
+            req.code,
+            [stdin for stdin, _ in files],
+            check=check,
+            stop_on_first_failure=bool(req.stop_on_first_failure),
+            limits=limits,
+        )
+    finally:
+        if checker is not None:
+            checker.close()
+    if batch["status"] != "success":
+        compiled = batch["compile"]
+        # only a rejected compile is the submission's fault; sandbox and image failures are ours
+        verdict = CE if batch["status"] == "compile_error" else JE
+        return _failed(files, compiled, verdict, {**_meta(compiled), "limits": meta_limits})
+
+    cases: List[CaseResult] = []
+    all_passed = True
+    last_stdout = ""
+    last_stderr = ""
+    total_ms = 0.0
+    total_cpu_ms: Optional[float] = None
+    peak_kb: Optional[int] = None
+    status = "success"
+    for i, ((_, output), res) in enumerate(zip(files, batch["cases"])):
+        expected, expected_truncated = _expected_preview(output)
+        if res is None:
+            # not started because an earlier case failed (stop_on_first_failure)
+            all_passed = False
+            cases.append(
+                CaseResult(expected=expected, expectedTruncated=expected_truncated, actual="", passed=False, status="skipped")
+            )
+            continue
+        actual = res["stdout"]
+        last_stdout = actual
+        last_stderr = res["stderr"]
+        total_ms += res["timeMs"]
+        cpu_ms = cpu_time_ms(res)
+        if cpu_ms is not None:
+            total_cpu_ms = (total_cpu_ms or 0) + cpu_ms
+        if res["memoryKb"] is not None:
+            peak_kb = max(peak_kb or 0, res["memoryKb"])
+        if res["status"] == "timeout":
+            status = "timeout"
+        verdict = verdicts.get(i)
+        passed = verdict == AC
+        all_passed = all_passed and passed
+        cases.append(
+            CaseResult(
+                expected=expected,
+                expectedTruncated=expected_truncated,
+                actual=actual,
+                passed=passed,
+                stderr=res["stderr"],
+                status=res["status"],
+                exitCode=res["exitCode"],
+                verdict=verdict,
+                checkerMessage=messages.get(i),
+                executionTime=format_time(res["timeMs"]),
+                timeMs=res["timeMs"],
+                cpuTimeMs=cpu_ms,
+                memoryKb=res["memoryKb"],
+                truncated=res["truncated"],
+                outputLimitExceeded=res["outputLimitExceeded"],
+            )
+        )
+    return ExecuteResponse(
+        stdout=last_stdout,
+        stderr=last_stderr,
+        executionTime=format_time(total_ms),
+        memory=format_memory(peak_kb),
+        status=status,
+        passed=all_passed,
+        cases=cases,
+        verdict=overall_verdict([c.verdict for c in cases]),
+        timeMs=round(total_ms, 3),
+        cpuTimeMs=None if total_cpu_ms is None else round(total_cpu_ms, 3),
+        memoryKb=peak_kb,
+        compileTimeMs=batch["compile"]["timeMs"],
+        truncated=any(c.truncated for c in cases),
+        outputLimitExceeded=any(c.outputLimitExceeded for c in cases),
+        meta={**_meta(batch["compile"]), "limits": meta_limits},
+    )
+
+
+def run_submission(req: ExecuteRequest, p: Optional[models.Problem] = None) -> ExecuteResponse:
+    """Run `req` in the sandbox; with a problem, judge it against every test case."""
+    if p is not None:
+        cache = get_verdict_cache()
+        if cache is None:
+            return _judge_problem(req, p)
+        res, age = cache.get_or_judge(judge_key(req, p), lambda: _judge_problem(req, p))
+        stats = cache.stats()
+        res.meta = {
+            **(res.meta or {}),
+            "verdictCache": {
+                "hit": age is not None,
+                "ageSec": None if age is None else round(age, 3),
+                "hits": stats["hits"],
+                "misses": stats["misses"],
+            },
+        }
+        return res
+
+    # Single run using provided stdin
+    res = execute_code(req.language, req.code, req.stdin or "")
+    return ExecuteResponse(
+        stdout=res.get("stdout", ""),
+        stderr=res.get("stderr", ""),
+        executionTime=res.get("executionTime", "0ms"),
+        memory=res.get("memory", ""),
+        status=res.get("status", "success"),
+        timeMs=res.get("timeMs"),
+        cpuTimeMs=res.get("cpuTimeMs"),
+        memoryKb=res.get("memoryKb"),
+        compileTimeMs=(res.get("compile") or {}).get("timeMs"),
+        truncated=res.get("truncated", False),
+        outputLimitExceeded=res.get("outputLimitExceeded", False),
+        meta=_meta(res.get("compile")),
+    )
@@ -1,15 +1,58 @@
 from __future__ import annotations
 
-import io
+import hashlib
+import logging
 import tarfile
+import threading
 import time
+import uuid
 from dataclasses import dataclass
-from typing import Dict, Any
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
-import docker
 from docker.errors import DockerException
 
 from app.config import get_settings
+from app.services.compile_cache import get_compile_cache
+from app.services.container_pool import (
+    INPUT_CACHE_DIR,
+    MEMORY_HEADROOM_MB,
+    TESTCASE_MOUNT,
+    WORKDIR,
+    PooledContainer,
+    create_sandbox_container,
+    default_memory_mb,
+    get_pool,
+)
+from app.services.images import get_docker_client, get_image_manager
+from app.services.scheduler import get_case_slots
+
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = "out"
+
+
+@dataclass(frozen=True)
+class RunLimits:
+    """Per-run limits: CPU time and peak RSS decide TLE/MLE, `wall_ms` is the hard kill."""
+
+    time_ms: int
+    memory_mb: int
+    wall_ms: int
+
+    @classmethod
+    def default(cls) -> "RunLimits":
+        # free-form runs keep the global wall-clock timeout
+        settings = get_settings()
+        timeout_ms = settings.sandbox_timeout_sec * 1000
+        return cls(time_ms=timeout_ms, memory_mb=settings.sandbox_memory_mb, wall_ms=timeout_ms)
+
+    @classmethod
+    def for_cpu_time(cls, time_ms: int, memory_mb: int) -> "RunLimits":
+        # Waiting on I/O or a busy host should not turn into TLE, so the
+        # process is only killed well past its CPU-time limit.
+        return cls(time_ms=time_ms, memory_mb=memory_mb, wall_ms=max(time_ms * 2, time_ms + 1000))
 
 
 @dataclass(frozen=True)
@@ -17,13 +60,26 @@ class LanguageConfig:
     image: str
     filename: str
     run_command: str
+    # Compilers write everything needed at run time into {workdir}/out, which
+    # is what the compile cache stores and restores.
     compile_command: str | None = None
+    # Applied to a problem's limits unless the problem overrides them
+    time_multiplier: float = 1.0
+    memory_multiplier: float = 1.0
+
+    def compile(self, workdir: str) -> str | None:
+        if not self.compile_command:
+            return None
+        return f"mkdir -p {workdir}/{ARTIFACT_DIR} && " + self.compile_command.format(workdir=workdir)
+
+    def run(self, workdir: str, input_path: str) -> str:
+        return f"{self.run_command.format(workdir=workdir)} < {input_path}"
 
     def build_command(self, workdir: str) -> str:
         parts = []
         if self.compile_command:
-            parts.append(self.compile_command.format(workdir=workdir))
-        parts.append(self.run_command.format(workdir=workdir))
+            parts.append(self.compile(workdir))
+        parts.append(self.run(workdir, f"{workdir}/input.txt"))
         return " && ".join(parts)
 
 
@@ -31,128 +87,586 @@ LANGUAGE_MAP: Dict[str, LanguageConfig] = {
     "python": LanguageConfig(
         image="python:3.11-slim",
         filename="main.py",
-        run_command="python {workdir}/main.py < {workdir}/input.txt",
+        run_command="python {workdir}/main.py",
+        time_multiplier=3.0,
     ),
     "py": LanguageConfig(
         image="python:3.11-slim",
         filename="main.py",
-        run_command="python {workdir}/main.py < {workdir}/input.txt",
+        run_command="python {workdir}/main.py",
+        time_multiplier=3.0,
     ),
     "cpp": LanguageConfig(
         image="gcc:13",
         filename="main.cpp",
-        compile_command="g++ -O2 -std=c++17 {workdir}/main.cpp -o {workdir}/program",
-        run_command="{workdir}/program < {workdir}/input.txt",
+        compile_command="g++ -O2 -std=c++17 {workdir}/main.cpp -o {workdir}/out/program",
+        run_command="{workdir}/out/program",
     ),
     "c++": LanguageConfig(
         image="gcc:13",
         filename="main.cpp",
-        compile_command="g++ -O2 -std=c++17 {workdir}/main.cpp -o {workdir}/program",
-        run_command="{workdir}/program < {workdir}/input.txt",
+        compile_command="g++ -O2 -std=c++17 {workdir}/main.cpp -o {workdir}/out/program",
+        run_command="{workdir}/out/program",
     ),
     "java": LanguageConfig(
         image="eclipse-temurin:17-jdk",
         filename="Main.java",
-        compile_command="cd {workdir} && javac Main.java",
-        run_command="cd {workdir} && java Main < input.txt",
+        compile_command="cd {workdir} && javac -d out Main.java",
+        run_command="cd {workdir} && java -cp out Main",
+        time_multiplier=2.0,
+        memory_multiplier=2.0,
     ),
     "go": LanguageConfig(
         image="golang:1.23",
         filename="main.go",
-        compile_command="cd {workdir} && go build -o program main.go",
-        run_command="{workdir}/program < {workdir}/input.txt",
+        compile_command="cd {workdir} && go build -o out/program main.go",
+        run_command="{workdir}/out/program",
     ),
 }
 
+# Every command runs under run_wrapper.pl, which enforces the wall-clock
+# limit and reports the program's own CPU time, peak RSS and wall time.
+RUN_WRAPPER = Path(__file__).with_name("run_wrapper.pl").read_bytes()
+WRAPPER_PATH = ".judge/run.pl"
+# Programs run as nobody: they can read the workdir but not the test data
+# (the mounted store and the input cache are root-only)
+RUN_UID = 65534
+RUSAGE_MARKER = b"\n__IA_RUSAGE__ "
+# the usage line always fits in this many trailing stderr bytes
+USAGE_TAIL_BYTES = 512
+
+
+def _error(message: str) -> Dict[str, Any]:
+    return {
+        "stdout": "",
+        "stderr": message,
+        "executionTime": "0ms",
+        "memory": "",
+        "status": "error",
+    }
+
+
+# A file's content: bytes, chunks (e.g. captured output) or a file on disk
+Payload = Union[bytes, List[bytes], Path]
+_BLOCK = 512
+_READ_CHUNK = 1 << 16
 
-def _nanos(cpus: float) -> int:
-    # nano_cpus is in units of 1e-9 CPUs
-    return int(cpus * 1_000_000_000)
 
+def _tar_header(name: str, size: int, mode: int, kind: bytes = tarfile.REGTYPE) -> bytes:
+    info = tarfile.TarInfo(name=name)
+    info.size = size
+    info.mode = mode
+    info.type = kind
+    info.mtime = int(time.time())
+    return info.tobuf(format=tarfile.GNU_FORMAT)
 
-def execute_code(language: str, code: str, stdin: str = "") -> Dict[str, Any]:
+
+def _payload_size(data: Payload) -> int:
+    if isinstance(data, Path):
+        return data.stat().st_size
+    if isinstance(data, list):
+        return sum(len(chunk) for chunk in data)
+    return len(data)
+
+
+def _archive(files: Dict[str, Payload], private_dirs: Tuple[str, ...] = ()) -> Iterator[bytes]:
+    """Stream a tar archive of `files` for `put_archive`.
+
+    Nothing is assembled in memory: headers and the callers' own buffers are
+    yielded as they are and files on disk are read in 64 KiB pieces, so each
+    payload is copied once, onto the Docker socket. `private_dirs` are
+    created root-only (0700) before the files.
+    """
+    for name in private_dirs:
+        yield _tar_header(name, 0, 0o700, tarfile.DIRTYPE)
+    for name, data in files.items():
+        size = _payload_size(data)
+        yield _tar_header(name, size, 0o644)
+        if isinstance(data, Path):
+            with open(data, "rb") as f:
+                while chunk := f.read(_READ_CHUNK):
+                    yield chunk
+        elif isinstance(data, list):
+            yield from data
+        else:
+            yield data
+        if size % _BLOCK:
+            yield bytes(_BLOCK - size % _BLOCK)
+    yield bytes(2 * _BLOCK)  # end-of-archive marker
+
+
+def _file_key(path: Path) -> Tuple[str, int]:
+    """Cache key of a file in a container's input cache, and its size.
+
+    Path, size and mtime identify the content without reading it; test-case
+    store files never change once written.
+    """
+    st = path.stat()
+    key = hashlib.sha256(f"{path.resolve()}\0{st.st_size}\0{st.st_mtime_ns}".encode("utf-8")).hexdigest()
+    return key, st.st_size
+
+
+def _mounted_path(path: Path) -> str | None:
+    """Where `path` is visible inside sandboxes, if the test-case store is mounted."""
     settings = get_settings()
-    client = docker.from_env()
+    if not settings.sandbox_testcase_source:
+        return None
+    try:
+        relative = path.resolve().relative_to(Path(settings.testcase_dir).resolve())
+    except ValueError:
+        return None
+    return f"{TESTCASE_MOUNT}/{relative.as_posix()}"
 
-    lang = (language or "").lower()
-    config = LANGUAGE_MAP.get(lang)
-    if config is None:
-        return {
-            "stdout": "",
-            "stderr": f"language {language} not supported",
-            "executionTime": "0ms",
-            "memory": "",
-            "status": "error",
-        }
 
-    workdir = "/workspace"
-    command = ["/bin/sh", "-lc", config.build_command(workdir)]
+def _decode(data: bytes | None) -> str:
+    return (data or b"").decode("utf-8", errors="replace")
+
+
+class OutputCapture:
+    """Keeps the first `limit` bytes of a stream (plus an optional tail) as it arrives."""
+
+    def __init__(self, limit: int, tail: int = 0):
+        self.limit = max(limit, 0)
+        self.chunks: List[bytes] = []
+        self.size = 0  # bytes kept
+        self.total = 0  # bytes seen
+        self.tail = b""
+        self._tail_size = tail
+
+    @property
+    def overflow(self) -> bool:
+        return self.total > self.limit
+
+    def feed(self, data: bytes) -> None:
+        self.total += len(data)
+        room = self.limit - self.size
+        if room > 0:
+            kept = data[:room]
+            self.chunks.append(kept)
+            self.size += len(kept)
+        if self._tail_size:
+            self.tail = (self.tail + data)[-self._tail_size:]
+
+    def data(self, limit: Optional[int] = None) -> bytes:
+        data = b"".join(self.chunks)
+        return data if limit is None else data[:limit]
+
 
-    container = None
-    start_ts = time.monotonic()
+def _split_usage(stderr: OutputCapture) -> Tuple[bytes, Dict[str, int] | None]:
+    """Parse the wrapper's trailing usage line and return stderr without it."""
+    idx = stderr.tail.rfind(RUSAGE_MARKER)
+    if idx < 0:
+        return stderr.data(), None
+    fields = _decode(stderr.tail[idx + len(RUSAGE_MARKER):]).split()
     try:
-        # Ensure image present locally (ignore failures in offline mode)
-        try:
-            client.images.pull(config.image)
-        except Exception:
-            pass
-
-        container = client.containers.create(
-            image=config.image,
-            command=command,
-            working_dir=workdir,
-            network_disabled=True,
-            mem_limit=f"{settings.sandbox_memory_mb}m",
-            nano_cpus=_nanos(settings.sandbox_cpus),
-            detach=True,
-        )
-
-        tar_stream = io.BytesIO()
-        with tarfile.open(fileobj=tar_stream, mode="w") as tar:
-            def add_file(name: str, data: bytes) -> None:
-                info = tarfile.TarInfo(name=name)
-                info.size = len(data)
-                info.mtime = int(time.time())
-                tar.addfile(info, io.BytesIO(data))
-
-            add_file(config.filename, code.encode("utf-8"))
-            add_file("input.txt", (stdin or "").encode("utf-8"))
-
-        tar_stream.seek(0)
-        container.put_archive(workdir, tar_stream.read())
-
-        container.start()
-        try:
-            container.wait(timeout=settings.sandbox_timeout_sec)
-            status = "success"
-        except Exception:
-            status = "timeout"
+        usage = {key: int(value) for key, value in (f.split("=", 1) for f in fields)}
+    except ValueError:
+        return stderr.data(), None
+    # where the marker starts in the whole stream; the kept prefix may reach into it
+    marker_at = stderr.total - len(stderr.tail) + idx
+    return stderr.data(marker_at), usage
+
+
+def _ms(us: int | None) -> float | None:
+    return None if us is None else round(us / 1000, 3)
+
+
+def cpu_time_ms(case: Dict[str, Any]) -> float | None:
+    if case.get("cpuUserMs") is None:
+        return None
+    return round(case["cpuUserMs"] + (case.get("cpuSysMs") or 0), 3)
+
+
+def format_time(ms: float | None) -> str:
+    return f"{round(ms or 0)}ms"
+
+
+def format_memory(kb: int | None) -> str:
+    return "" if kb is None else f"{kb / 1024:.1f}MB"
+
+
+class SandboxSession:
+    """A checked-out container holding one submission.
+
+    The source is copied in and compiled once on `open()`; `run()` can then be
+    called for any number of inputs, each under `limits`.
+    """
+
+    def __init__(
+        self,
+        config: LanguageConfig,
+        code: str,
+        use_pool: bool | None = None,
+        limits: RunLimits | None = None,
+    ):
+        settings = get_settings()
+        self.config = config
+        self.code = code
+        self.limits = limits or RunLimits.default()
+        self.workdir = WORKDIR
+        self.pool = get_pool() if (settings.sandbox_pool_enabled if use_pool is None else use_pool) else None
+        self.lease: PooledContainer | None = None
+        self.reusable = True
+
+    def open(self, files: Dict[str, Payload] | None = None) -> Dict[str, Any]:
+        """Check out a container, copy source (plus extra files) and compile."""
+        if self.pool is not None:
+            self.lease = self.pool.acquire(self.config.image)
+        else:
+            container = create_sandbox_container(get_docker_client(), self.config.image)
+            self.lease = PooledContainer(container=container, image=self.config.image)
+
+        payload: Dict[str, Payload] = {self.config.filename: self.code.encode("utf-8"), WRAPPER_PATH: RUN_WRAPPER}
+        payload.update(files or {})
+        self.put_files(payload)
+
+        compiled = self._compile()
+        if compiled["status"] == "success":
+            # after compiling, so compilers keep the default container limit
+            self._fit_memory()
+        return compiled
+
+    def _compile(self) -> Dict[str, Any]:
+        settings = get_settings()
+        compile_cmd = self.config.compile(self.workdir)
+        if compile_cmd is None:
+            return {"status": "success", "stderr": "", "timeMs": 0, "cached": None, "savedMs": 0}
+
+        cache = get_compile_cache() if settings.compile_cache_enabled else None
+        key = None
+        if cache is not None:
+            image_id = get_image_manager().image_id(self.config.image)
+            key = cache.key(self.config.image, image_id, self.code, compile_cmd)
+            hit = cache.get(key)
+            if hit is not None:
+                artifact, compile_ms = hit
+                self.lease.container.put_archive(self.workdir, artifact)
+                return {"status": "success", "stderr": "", "timeMs": 0, "cached": True, "savedMs": compile_ms}
+
+        result = self._exec(compile_cmd, "/dev/null", settings.sandbox_compile_timeout_sec * 1000)
+        if result["status"] != "success":
+            # javac reports errors on stdout
+            return {"status": result["status"], "stderr": result["stderr"] or result["stdout"], "timeMs": result["timeMs"], "cached": False, "savedMs": 0}
+        if cache is not None:
+            stream, _ = self.lease.container.get_archive(f"{self.workdir}/{ARTIFACT_DIR}")
+            cache.put(key, b"".join(stream), int(result["timeMs"]))
+        return {"status": "success", "stderr": "", "timeMs": result["timeMs"], "cached": False if cache else None, "savedMs": 0}
+
+    def put_files(self, files: Dict[str, Payload]) -> None:
+        """Copy files into the workdir (names are relative to it)."""
+        if files:
+            self.lease.container.put_archive(self.workdir, _archive(files))
+
+    def stage(self, values: Dict[str, str | Payload]) -> Dict[str, str]:
+        """Make each value readable in the sandbox; returns name -> sandbox path.
+
+        Strings and bytes are written to `name` in the workdir. Files are read
+        in place from the mounted test-case store, or else copied once into
+        the container's input cache and reused by later runs and sessions on
+        the same container. Everything new goes over in a single archive.
+        """
+        lease = self.lease
+        paths: Dict[str, str] = {}
+        files: Dict[str, Payload] = {}
+        fresh: Dict[str, int] = {}
+        for name, value in values.items():
+            if isinstance(value, Path):
+                mounted = _mounted_path(value)
+                if mounted is not None:
+                    paths[name] = mounted
+                    continue
+                key, size = _file_key(value)
+                paths[name] = f"{INPUT_CACHE_DIR}/{key}"
+                if key not in lease.staged and key not in fresh:
+                    files[f"{INPUT_CACHE_DIR.lstrip('/')}/{key}"] = value
+                    fresh[key] = size
+            else:
+                paths[name] = f"{self.workdir}/{name}"
+                files[f"{self.workdir.lstrip('/')}/{name}"] = value.encode("utf-8") if isinstance(value, str) else value
+        if fresh:
+            self._make_room(sum(fresh.values()))
+        if files:
+            private = (INPUT_CACHE_DIR.lstrip("/"),) if fresh else ()
+            lease.container.put_archive("/", _archive(files, private_dirs=private))
+            lease.staged.update(fresh)
+        return paths
+
+    def run(self, input_path: str, args: str = "", trusted: bool = False) -> Dict[str, Any]:
+        """Run the compiled program on `input_path` (absolute, or relative to the workdir).
+
+        Programs run as RUN_UID, after the wrapper has opened their input; a
+        `trusted` program (a problem's checker) keeps root so it can read the
+        test data passed in `args`.
+        """
+        cmd = self.config.run_command.format(workdir=self.workdir)
+        if args:
+            cmd = f"{cmd} {args}"
+        if not input_path.startswith("/"):
+            input_path = f"{self.workdir}/{input_path}"
+        return self._exec(cmd, input_path, self.limits.wall_ms, uid=None if trusted else RUN_UID)
+
+    def close(self) -> None:
+        lease, self.lease = self.lease, None
+        if lease is None:
+            return
+        if self.pool is not None and lease.memory_mb is not None:
+            # idle containers always carry the default limit
+            try:
+                self._set_memory(lease, default_memory_mb())
+                lease.memory_mb = None
+            except DockerException:
+                self.reusable = False
+        if self.pool is not None:
+            self.pool.release(lease, reusable=self.reusable)
+        else:
             try:
-                container.stop(timeout=1)
+                lease.container.remove(force=True)
             except Exception:
                 pass
 
-        stdout = container.logs(stdout=True, stderr=False).decode("utf-8", errors="replace")
-        stderr = container.logs(stdout=False, stderr=True).decode("utf-8", errors="replace")
-        elapsed_ms = int((time.monotonic() - start_ts) * 1000)
+    def __enter__(self) -> "SandboxSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _fit_memory(self) -> None:
+        """Raise the container's memory limit when the problem allows more than the default."""
+        needed = self.limits.memory_mb + MEMORY_HEADROOM_MB
+        current = self.lease.memory_mb or default_memory_mb()
+        if needed <= current:
+            return
+        try:
+            self._set_memory(self.lease, needed)
+        except DockerException as exc:
+            # MLE is still judged from peak RSS; the kernel may just kill earlier
+            logger.warning("could not raise sandbox memory limit to %sMB: %s", needed, exc)
+            return
+        self.lease.memory_mb = needed
+
+    @staticmethod
+    def _set_memory(lease: PooledContainer, mb: int) -> None:
+        lease.container.update(mem_limit=f"{mb}m", memswap_limit=f"{mb}m")
+
+    def _make_room(self, incoming: int) -> None:
+        """Empty the container's input cache if `incoming` bytes would overflow it."""
+        lease = self.lease
+        limit = get_settings().sandbox_input_cache_mb * 1024 * 1024
+        if not lease.staged or sum(lease.staged.values()) + incoming <= limit:
+            return
+        lease.container.exec_run(["/bin/sh", "-c", f"rm -rf {INPUT_CACHE_DIR}"])
+        lease.staged.clear()
+
+    def _exec(self, cmd: str, input_path: str, limit_ms: int, uid: int | None = None) -> Dict[str, Any]:
+        """Run `cmd` under the wrapper, reading stdout/stderr as they are produced.
+
+        Only the first `sandbox_stdout_limit_kb` of stdout is kept; past that
+        the program is killed and the result flagged `outputLimitExceeded`.
+        `stdout` is a preview of at most `sandbox_output_preview_kb`; the kept
+        bytes are in `stdoutChunks` for the judge.
+        """
+        settings = get_settings()
+        argv = ["perl", f"{self.workdir}/{WRAPPER_PATH}", input_path, str(limit_ms), cmd]
+        if uid is not None:
+            argv.append(str(uid))
+        stdout = OutputCapture(settings.sandbox_stdout_limit_kb * 1024)
+        stderr = OutputCapture(settings.sandbox_stderr_limit_kb * 1024, tail=USAGE_TAIL_BYTES)
+        started = time.monotonic()
+        result = self.lease.container.exec_run(argv, workdir=self.workdir, demux=True, stream=True)
+        interrupted = False
+        for out, err in result.output:
+            if out:
+                stdout.feed(out)
+                if stdout.overflow and not interrupted:
+                    interrupted = True
+                    self._interrupt()
+            if err:
+                stderr.feed(err)
+        elapsed_ms = (time.monotonic() - started) * 1000
+        stderr_data, usage = _split_usage(stderr)
+
+        if usage is None:
+            # wrapper did not report (e.g. killed from outside): coarse fallback
+            usage = {"exit": -1 if result.exit_code is None else result.exit_code, "timeout": 0, "wall_us": int(elapsed_ms * 1000)}
+        if usage["timeout"]:
+            status = "timeout"
+            self.reusable = False
+        elif usage["exit"]:
+            status = "error"
+        else:
+            status = "success"
+        preview_bytes = settings.sandbox_output_preview_kb * 1024
         return {
-            "stdout": stdout,
-            "stderr": stderr,
-            "executionTime": f"{elapsed_ms}ms",
-            "memory": "",
+            "stdout": _decode(stdout.data(preview_bytes)),
+            "stderr": _decode(stderr_data),
+            "exitCode": usage["exit"],
             "status": status,
+            "timeMs": round(usage["wall_us"] / 1000, 3),
+            "cpuUserMs": _ms(usage.get("user_us")),
+            "cpuSysMs": _ms(usage.get("sys_us")),
+            "memoryKb": usage.get("maxrss_kb"),
+            "stdoutChunks": stdout.chunks,
+            "stdoutBytes": stdout.total,
+            "truncated": stdout.total > preview_bytes,
+            "outputLimitExceeded": stdout.overflow,
         }
+
+    def _interrupt(self) -> None:
+        # the wrapper kills the program's process group on SIGUSR1
+        pid_file = f"{self.workdir}/{WRAPPER_PATH}.pid"
+        try:
+            self.lease.container.exec_run(["/bin/sh", "-c", f'kill -USR1 "$(cat {pid_file})"'])
+        except DockerException:
+            # the wall-clock limit still ends the run
+            self.reusable = False
+
+
+def execute_batch(
+    language: str,
+    code: str,
+    inputs: List[str],
+    use_pool: bool | None = None,
+    limits: RunLimits | None = None,
+) -> Dict[str, Any]:
+    """Compile once and run the program against every input in one container.
+
+    Returns {"status", "compile": {...}, "cases": [{stdout, stderr, exitCode,
+    status, timeMs, cpuUserMs, cpuSysMs, memoryKb, stdoutChunks, ...}, ...]}. `status` is
+    "compile_error" when the language is unknown or the compiler rejected the
+    code, and "error" when the sandbox itself failed; `cases` is empty then.
+    """
+    lang = (language or "").lower()
+    config = LANGUAGE_MAP.get(lang)
+    if config is None:
+        return {"status": "compile_error", "compile": {"status": "error", "stderr": f"language {language} not supported", "timeMs": 0}, "cases": []}
+
+    files = {f"inputs/{i}.txt": (stdin or "").encode("utf-8") for i, stdin in enumerate(inputs)}
+    try:
+        with SandboxSession(config, code, use_pool=use_pool, limits=limits) as session:
+            compiled = session.open(files)
+            if compiled["status"] != "success":
+                return {"status": "compile_error", "compile": compiled, "cases": []}
+            cases = [session.run(f"inputs/{i}.txt") for i in range(len(inputs))]
+            return {"status": "success", "compile": compiled, "cases": cases}
     except DockerException as exc:
-        return {
-            "stdout": "",
-            "stderr": str(exc),
-            "executionTime": "0ms",
-            "memory": "",
-            "status": "error",
-        }
-    finally:
-        if container is not None:
-            try:
-                container.remove(force=True)
-            except Exception:
-                pass
+        return {"status": "error", "compile": {"status": "error", "stderr": str(exc), "timeMs": 0}, "cases": []}
+
+
+def execute_parallel(
+    language: str,
+    code: str,
+    inputs: List[str | Path],
+    check: Callable[[int, Dict[str, Any]], bool] | None = None,
+    stop_on_first_failure: bool = False,
+    owner: str | None = None,
+    use_pool: bool | None = None,
+    limits: RunLimits | None = None,
+) -> Dict[str, Any]:
+    """Run the inputs concurrently across several sandboxes.
+
+    Every case waits for a slot from the global fair scheduler, so total
+    concurrency stays within the CPU budget. The first sandbox compiles
+    before the others open, letting them restore the artifact from the
+    compile cache. `check(i, result)` is called as each case finishes; with
+    `stop_on_first_failure` the first False stops cases that have not started
+    yet, which are left as None in `cases`. An exception in any worker (from
+    Docker, `check` or the checker) stops the batch and fails it with
+    status "error"; a rejected compile is "compile_error", as in
+    `execute_batch`. Results are returned in input order.
+    Inputs are strings or files; files are handed over through
+    `SandboxSession.stage`, so each reaches a container at most once.
+    """
+    lang = (language or "").lower()
+    config = LANGUAGE_MAP.get(lang)
+    if config is None:
+        return {"status": "compile_error", "compile": {"status": "error", "stderr": f"language {language} not supported", "timeMs": 0}, "cases": []}
+
+    slots = get_case_slots()
+    owner = owner or uuid.uuid4().hex
+    results: List[Dict[str, Any] | None] = [None] * len(inputs)
+    pending = iter(range(len(inputs)))
+    lock = threading.Lock()
+    stop = threading.Event()
+    errors: List[Exception] = []
+
+    def take() -> int | None:
+        with lock:
+            return None if stop.is_set() else next(pending, None)
+
+    def work(session: SandboxSession) -> None:
+        while (i := take()) is not None:
+            with slots.slot(owner):
+                if stop.is_set():
+                    return
+                name = f"inputs/{i}.txt"
+                res = session.run(session.stage({name: inputs[i] or ""})[name])
+            results[i] = res
+            if check is not None and not check(i, res) and stop_on_first_failure:
+                stop.set()
+
+    def open_session() -> Tuple[SandboxSession, Dict[str, Any]]:
+        session = SandboxSession(config, code, use_pool=use_pool, limits=limits)
+        try:
+            with slots.slot(owner):
+                return session, session.open()
+        except Exception:
+            session.close()
+            raise
+
+    try:
+        first, compiled = open_session()
+    except DockerException as exc:
+        return {"status": "error", "compile": {"status": "error", "stderr": str(exc), "timeMs": 0}, "cases": []}
+
+    def guarded(session: SandboxSession) -> None:
+        # a case that dies mid-run would stay None, like a skipped one: fail the batch instead
+        try:
+            work(session)
+        except Exception as exc:
+            with lock:
+                errors.append(exc)
+            stop.set()
+
+    def extra_worker() -> None:
+        try:
+            session, _ = open_session()
+        except Exception:
+            # the remaining workers still drain the cases
+            return
+        with session:
+            guarded(session)
+
+    with first:
+        if compiled["status"] != "success":
+            return {"status": "compile_error", "compile": compiled, "cases": []}
+        workers = min(len(inputs), slots.capacity) - 1
+        threads = [threading.Thread(target=extra_worker, daemon=True) for _ in range(max(workers, 0))]
+        for t in threads:
+            t.start()
+        guarded(first)
+        for t in threads:
+            t.join()
+    if errors:
+        return {"status": "error", "compile": {"status": "error", "stderr": str(errors[0]), "timeMs": 0}, "cases": []}
+    return {"status": "success", "compile": compiled, "cases": results}
+
+
+def execute_code(language: str, code: str, stdin: str = "", use_pool: bool | None = None) -> Dict[str, Any]:
+    batch = execute_batch(language, code, [stdin or ""], use_pool=use_pool)
+    if batch["status"] != "success":
+        return {**_error(batch["compile"]["stderr"]), "compile": batch["compile"]}
+    case = batch["cases"][0]
+    return {
+        "stdout": case["stdout"],
+        "stderr": case["stderr"],
+        "executionTime": format_time(case["timeMs"]),
+        "memory": format_memory(case["memoryKb"]),
+        # non-zero exits are reported through stderr, as before
+        "status": "timeout" if case["status"] == "timeout" else "success",
+        "timeMs": case["timeMs"],
+        "cpuTimeMs": cpu_time_ms(case),
+        "memoryKb": case["memoryKb"],
+        "truncated": case["truncated"],
+        "outputLimitExceeded": case["outputLimitExceeded"],
+        "compile": batch["compile"],
+    }
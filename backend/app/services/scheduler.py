@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.config import get_settings
+
+
+class FairSlots:
+    """Global budget of concurrently running test cases.
+
+    When a slot frees up it goes to the waiting submission that currently
+    holds the fewest slots (FIFO among equals), so a problem with hundreds of
+    cases cannot starve submissions that arrive after it.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(capacity, 1)
+        self._cond = threading.Condition()
+        self._held: Dict[str, int] = {}
+        self._waiting: List[Tuple[int, str]] = []
+        self._seq = itertools.count()
+        self._in_use = 0
+
+    def acquire(self, owner: str) -> None:
+        with self._cond:
+            ticket = (next(self._seq), owner)
+            self._waiting.append(ticket)
+            try:
+                while not (self._in_use < self.capacity and self._next() == ticket):
+                    self._cond.wait()
+            finally:
+                self._waiting.remove(ticket)
+            self._in_use += 1
+            self._held[owner] = self._held.get(owner, 0) + 1
+            # another slot may still be free for the next waiter
+            self._cond.notify_all()
+
+    def release(self, owner: str) -> None:
+        with self._cond:
+            self._in_use -= 1
+            held = self._held.get(owner, 1) - 1
+            if held > 0:
+                self._held[owner] = held
+            else:
+                self._held.pop(owner, None)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, owner: str) -> Iterator[None]:
+        self.acquire(owner)
+        try:
+            yield
+        finally:
+            self.release(owner)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "capacity": self.capacity,
+                "in_use": self._in_use,
+                "waiting": len(self._waiting),
+                "submissions": len(self._held),
+            }
+
+    def _next(self) -> Tuple[int, str]:
+        return min(self._waiting, key=lambda t: (self._held.get(t[1], 0), t[0]))
+
+
+def case_slot_capacity() -> int:
+    """How many sandboxes may run at once: the CPU budget divided by per-sandbox CPUs."""
+    settings = get_settings()
+    budget = settings.sandbox_cpu_budget or float(os.cpu_count() or 1)
+    return max(1, int(budget // max(settings.sandbox_cpus, 0.01)))
+
+
+_slots: Optional[FairSlots] = None
+_slots_lock = threading.Lock()
+
+
+def get_case_slots() -> FairSlots:
+    global _slots
+    with _slots_lock:
+        if _slots is None:
+            _slots = FairSlots(case_slot_capacity())
+        return _slots
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from sqlalchemy import ColumnElement, Select, cast, func, literal, or_, select, union
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Session
+
+from app import models
+from app.schemas import SearchHit
+
+
+# Text search configuration used by the search_vector triggers (migration
+# 20240921_000008): no stemming or stop words, so Chinese and English behave alike.
+SEARCH_CONFIG = "simple"
+# Weight of the full-text rank versus trigram similarity in the score
+TEXT_RANK_WEIGHT = 0.6
+SNIPPET_CHARS = 160
+
+
+def like_pattern(q: str) -> str:
+    """`%q%` with LIKE wildcards in `q` escaped (backslash is the escape char)."""
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def snippet(text: Optional[str], q: str, size: int = SNIPPET_CHARS) -> str:
+    """Up to `size` characters of `text` around the first match of `q`."""
+    text = " ".join((text or "").split())
+    pos = text.lower().find(q.lower())
+    start = max(pos - size // 4, 0) if pos > 0 else 0
+    out = text[start:start + size]
+    return ("…" if start else "") + out + ("…" if start + size < len(text) else "")
+
+
+def _tsquery(q: str) -> ColumnElement:
+    return func.websearch_to_tsquery(SEARCH_CONFIG, q)
+
+
+def _matches(vector: ColumnElement, texts: List[ColumnElement], q: str) -> ColumnElement:
+    # each branch is served by its own GIN index (tsvector or gin_trgm_ops)
+    pattern = like_pattern(q)
+    return or_(vector.op("@@")(_tsquery(q)), *[t.ilike(pattern, escape="\\") for t in texts])
+
+
+def _score(vector: ColumnElement, texts: List[ColumnElement], q: str) -> ColumnElement:
+    # normalization 32 maps the rank into [0, 1) like the similarity term
+    rank = func.ts_rank_cd(vector, _tsquery(q), 32)
+    similarity = func.greatest(*[func.coalesce(func.word_similarity(q, t), 0) for t in texts])
+    return (TEXT_RANK_WEIGHT * rank + (1 - TEXT_RANK_WEIGHT) * similarity).label("score")
+
+
+def _item_query(q: str, limit: int) -> Select:
+    Q, KI = models.Question, models.KnowledgeItem
+    answer = KI.flashcard["answer"].astext
+    empty = cast(literal(""), TSVECTOR)
+    # matches on either table, unioned so each side can use its indexes
+    matched = union(
+        select(KI.id).join(Q, Q.id == KI.question_id).where(_matches(Q.search_vector, [Q.text], q)),
+        select(KI.id).where(_matches(KI.search_vector, [answer], q)),
+    ).subquery()
+    vector = func.coalesce(Q.search_vector, empty).op("||")(func.coalesce(KI.search_vector, empty))
+    score = _score(vector, [Q.text, answer], q)
+    return (
+        select(KI.id, Q.text, answer, Q.difficulty, Q.tags, score)
+        .join(Q, Q.id == KI.question_id)
+        .join(matched, matched.c.id == KI.id)
+        .order_by(score.desc(), KI.created_at.desc())
+        .limit(limit)
+    )
+
+
+def _problem_query(q: str, limit: int) -> Select:
+    P = models.Problem
+    texts = [P.title, P.description]
+    score = _score(P.search_vector, texts, q)
+    return (
+        select(P.id, P.title, P.description, P.difficulty, P.tags, score)
+        .where(_matches(P.search_vector, texts, q))
+        .order_by(score.desc(), P.created_at.desc())
+        .limit(limit)
+    )
+
+
+def search_items(db: Session, q: str, limit: int) -> List[SearchHit]:
+    hits = []
+    for id_, text, answer, difficulty, tags, score in db.execute(_item_query(q, limit)):
+        # show the answer when that is where the match is
+        in_answer = answer and q.lower() in answer.lower() and q.lower() not in text.lower()
+        hits.append(
+            SearchHit(
+                type="item",
+                id=id_,
+                title=text,
+                snippet=snippet(answer if in_answer else text, q),
+                difficulty=difficulty,
+                tags=tags,
+                score=round(score, 4),
+            )
+        )
+    return hits
+
+
+def search_problems(db: Session, q: str, limit: int) -> List[SearchHit]:
+    return [
+        SearchHit(
+            type="problem",
+            id=id_,
+            title=title,
+            snippet=snippet(description, q),
+            difficulty=difficulty,
+            tags=tags,
+            score=round(score, 4),
+        )
+        for id_, title, description, difficulty, tags, score in db.execute(_problem_query(q, limit))
+    ]
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import get_settings
+from app.schemas import ExecuteRequest, ExecuteResponse
+from app.services.judge import AC, JE
+
+
+logger = logging.getLogger(__name__)
+
+
+def submission_row(owner: str, req: ExecuteRequest, p: models.Problem, res: ExecuteResponse) -> Dict[str, Any]:
+    """The `submissions` row for a judged response."""
+    cases = res.cases or []
+    return {
+        "id": uuid.uuid4(),
+        "problem_id": p.id,
+        "user_id": owner[:128],
+        "language": (req.language or "").lower(),
+        "code_hash": hashlib.sha256(req.code.encode("utf-8")).hexdigest(),
+        "verdict": res.verdict,
+        "passed_cases": sum(1 for c in cases if c.passed),
+        "total_cases": len(cases),
+        "time_ms": res.cpuTimeMs if res.cpuTimeMs is not None else res.timeMs,
+        "memory_kb": res.memoryKb,
+        "cases": [
+            {"verdict": c.verdict, "timeMs": c.timeMs, "cpuTimeMs": c.cpuTimeMs, "memoryKb": c.memoryKb}
+            for c in cases
+        ],
+        # judged now, whenever the batch is written
+        "created_at": datetime.utcnow(),
+    }
+
+
+def record_submission(owner: str, req: ExecuteRequest, p: models.Problem, res: ExecuteResponse) -> ExecuteResponse:
+    """Queue `res` for the submission history; sets `submissionId` once accepted."""
+    row = submission_row(owner, req, p, res)
+    if get_submission_recorder().record(row):
+        res.submissionId = row["id"]
+    return res
+
+
+def _rollup(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fold a batch into one increment per (problem, language)."""
+    totals: Dict[Tuple[Any, str], Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["problem_id"], row["language"])
+        t = totals.setdefault(
+            key,
+            {
+                "problem_id": row["problem_id"],
+                "language": row["language"],
+                "submissions": 0,
+                "accepted": 0,
+                "best_time_ms": None,
+                "best_memory_kb": None,
+            },
+        )
+        t["submissions"] += 1
+        if row["verdict"] == AC:
+            t["accepted"] += 1
+            for field, value in (("best_time_ms", row["time_ms"]), ("best_memory_kb", row["memory_kb"])):
+                if value is not None and (t[field] is None or value < t[field]):
+                    t[field] = value
+    # a fixed lock order keeps concurrent upserts from deadlocking
+    return [totals[key] for key in sorted(totals, key=lambda k: (str(k[0]), k[1]))]
+
+
+def _upsert_stats(db: Session, increments: List[Dict[str, Any]]) -> None:
+    stats = models.ProblemLanguageStats
+    stmt = pg_insert(stats).values(increments)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[stats.problem_id, stats.language],
+        set_={
+            "submissions": stats.submissions + stmt.excluded.submissions,
+            "accepted": stats.accepted + stmt.excluded.accepted,
+            # LEAST skips NULLs: batches without an accepted run keep the best
+            "best_time_ms": func.least(stats.best_time_ms, stmt.excluded.best_time_ms),
+            "best_memory_kb": func.least(stats.best_memory_kb, stmt.excluded.best_memory_kb),
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+class SubmissionRecorder:
+    """Writes judged submissions off the request path.
+
+    `record` only enqueues. A background thread collects up to `batch_size`
+    rows (or whatever arrived within `flush_ms` of the first), writes them
+    with one multi-row INSERT and folds the batch into
+    `problem_language_stats` with one upsert, in a single transaction. When
+    the queue is full new submissions are dropped with a warning instead of
+    slowing down judging.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_size: int,
+        flush_ms: int,
+        max_pending: int,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = max(batch_size, 1)
+        self.flush_sec = max(flush_ms, 0) / 1000
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max(max_pending, 1))
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._counters = {"recorded": 0, "written": 0, "batches": 0, "dropped": 0, "failed": 0}
+
+    # lifecycle -----------------------------------------------------------
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="submission-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write what is still queued, then stop the writer."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=30)
+        self._thread = None
+
+    # public API ----------------------------------------------------------
+    def record(self, row: Dict[str, Any]) -> bool:
+        if row.get("verdict") in (None, JE):
+            # judge errors are ours, not the submitter's: keep them out of the stats
+            return False
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._count("dropped")
+            logger.warning("submission queue full, dropping submission %s", row["id"])
+            return False
+        self._count("recorded")
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": self._queue.qsize(), "batch_size": self.batch_size, **self._counters}
+
+    # internals -----------------------------------------------------------
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[key] += n
+
+    def _loop(self) -> None:
+        stopping = False
+        while True:
+            batch: List[Dict[str, Any]] = []
+            deadline = 0.0
+            while len(batch) < self.batch_size:
+                if stopping:
+                    timeout: Optional[float] = 0  # drain what is left without waiting
+                elif not batch:
+                    timeout = None  # idle until the first row
+                else:
+                    timeout = max(deadline - time.monotonic(), 0)
+                try:
+                    row = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    continue
+                if not batch:
+                    deadline = time.monotonic() + self.flush_sec
+                batch.append(row)
+            if batch:
+                self._write(batch)
+            if stopping and self._queue.empty():
+                return
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(insert(models.Submission), batch)
+            _upsert_stats(db, _rollup(batch))
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._count("failed", len(batch))
+            logger.exception("writing %d submissions failed", len(batch))
+            return
+        finally:
+            db.close()
+        with self._lock:
+            self._counters["written"] += len(batch)
+            self._counters["batches"] += 1
+
+
+_recorder: Optional[SubmissionRecorder] = None
+_recorder_lock = threading.Lock()
+
+
+def get_submission_recorder() -> SubmissionRecorder:
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            from app.db import SessionLocal
+
+            settings = get_settings()
+            _recorder = SubmissionRecorder(
+                SessionLocal,
+                batch_size=settings.submission_batch_size,
+                flush_ms=settings.submission_flush_ms,
+                max_pending=settings.submission_queue_max,
+            )
+            _recorder.start()
+        return _recorder
+
+
+def shutdown_submission_recorder() -> None:
+    global _recorder
+    with _recorder_lock:
+        recorder, _recorder = _recorder, None
+    if recorder is not None:
+        recorder.stop()
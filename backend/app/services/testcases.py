@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import get_settings
+
+
+# New problems without explicit samples show this many leading cases
+DEFAULT_SAMPLE_CASES = 2
+CHUNK_SIZE = 1 << 16
+
+
+def iter_chunks(path: Path, size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield the file's bytes in `size` slices of a read-only memory map.
+
+    Only the pages being compared are resident, so a multi-MB expected output
+    never becomes a Python string.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return  # mmap rejects empty files
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            for offset in range(0, len(m), size):
+                yield m[offset:offset + size]
+
+
+def read_prefix(path: Path, limit: int) -> Tuple[str, bool]:
+    """The first `limit` bytes as text, and whether the file is longer."""
+    with open(path, "rb") as f:
+        data = f.read(limit + 1)
+    return data[:limit].decode("utf-8", errors="replace"), len(data) > limit
+
+
+class TestCaseStore:
+    """Local, content-addressed copies of the test-case blobs in the database.
+
+    Blobs live at `<root>/<sha[:2]>/<sha>` and are written atomically, so a
+    path handed out is always complete. Missing blobs are fetched on first
+    use; since files never change for a given hash, the directory can be
+    shared by every backend process and mounted read-only into sandboxes.
+    The root is kept 0700 so sandboxed programs, which run unprivileged,
+    cannot browse it.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.fetched = 0
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        os.chmod(self.root, 0o700)
+
+    def path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / sha256
+
+    def put(self, db: Session, data: bytes) -> str:
+        """Store `data` in the database (once per content) and locally; returns its hash."""
+        sha256 = hashlib.sha256(data).hexdigest()
+        db.execute(
+            insert(models.TestCaseBlob)
+            .values(sha256=sha256, size=len(data), data=data)
+            .on_conflict_do_nothing(index_elements=["sha256"])
+        )
+        self._write(sha256, data)
+        return sha256
+
+    def materialize(self, db: Session, hashes: Iterable[str]) -> Dict[str, Path]:
+        """Local paths for `hashes`, fetching the missing blobs in one streamed query."""
+        wanted = set(hashes)
+        missing = self.missing(wanted)
+        if missing:
+            for sha256, data in db.execute(self.blob_query(missing)):
+                self.save_fetched(sha256, data)
+        return self.paths(wanted)
+
+    def missing(self, hashes: Iterable[str]) -> List[str]:
+        """Those of `hashes` without a local copy yet."""
+        return [h for h in set(hashes) if not self.path(h).exists()]
+
+    @staticmethod
+    def blob_query(hashes: List[str]):
+        """(sha256, data) rows for `hashes`, one blob in memory at a time.
+
+        Async callers stream it themselves and hand each row to
+        `save_fetched` off the event loop.
+        """
+        return (
+            select(models.TestCaseBlob.sha256, models.TestCaseBlob.data)
+            .where(models.TestCaseBlob.sha256.in_(hashes))
+            .execution_options(yield_per=1)
+        )
+
+    def save_fetched(self, sha256: str, data: bytes) -> None:
+        self._write(sha256, data)
+        with self._lock:
+            self.fetched += 1
+
+    def paths(self, hashes: Iterable[str]) -> Dict[str, Path]:
+        """Local paths for `hashes`; LookupError if any blob was never fetched."""
+        paths = {h: self.path(h) for h in set(hashes)}
+        absent = [h for h, p in paths.items() if not p.exists()]
+        if absent:
+            raise LookupError(f"test case blobs missing: {', '.join(sorted(absent))}")
+        return paths
+
+    def case_files(self, db: Session, cases: List[models.TestCase]) -> List[Tuple[Path, Path]]:
+        """(input, expected output) paths for each case, in order."""
+        paths = self.materialize(db, [h for c in cases for h in (c.input_sha256, c.output_sha256)])
+        return [(paths[c.input_sha256], paths[c.output_sha256]) for c in cases]
+
+    def _write(self, sha256: str, data: bytes) -> None:
+        path = self.path(sha256)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{sha256}.{uuid.uuid4().hex}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+
+def test_set_version(problem: models.Problem) -> str:
+    """Hash of the problem's cases (order, inputs, outputs, samples aside).
+
+    Content-addressed blobs make this change exactly when the tests do.
+    """
+    h = hashlib.sha256()
+    for c in problem.cases:
+        h.update(f"{c.ordinal}:{c.input_sha256}:{c.output_sha256}\n".encode("ascii"))
+    return h.hexdigest()
+
+
+def save_cases(db: Session, problem: models.Problem, cases: Iterable[Tuple[str, str, bool]]) -> None:
+    """Replace the problem's cases with (input, expected output, sample) triples.
+
+    When no case is flagged as a sample, the first DEFAULT_SAMPLE_CASES are.
+    """
+    store = get_test_case_store()
+    cases = list(cases)
+    flagged = any(sample for _, _, sample in cases)
+    if problem.cases:
+        problem.cases = []
+        db.flush()  # delete the old rows before their ordinals are reused
+    for ordinal, (stdin, expected, sample) in enumerate(cases):
+        data_in, data_out = stdin.encode("utf-8"), expected.encode("utf-8")
+        problem.cases.append(
+            models.TestCase(
+                ordinal=ordinal,
+                input_sha256=store.put(db, data_in),
+                output_sha256=store.put(db, data_out),
+                input_size=len(data_in),
+                output_size=len(data_out),
+                is_sample=bool(sample) if flagged else ordinal < DEFAULT_SAMPLE_CASES,
+            )
+        )
+
+
+_store: Optional[TestCaseStore] = None
+_store_lock = threading.Lock()
+
+
+def get_test_case_store() -> TestCaseStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TestCaseStore(get_settings().testcase_dir)
+        return _store
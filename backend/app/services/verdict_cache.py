@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from app.config import get_settings
+from app.schemas import ExecuteResponse
+from app.services.judge import AC, CE, OLE, RE, WA
+
+
+# Verdicts that depend only on the code and the tests. TLE/MLE can flip with
+# machine load and JE is our failure, so those are always re-judged.
+CACHEABLE_VERDICTS = frozenset({AC, WA, CE, RE, OLE})
+
+
+def normalize_source(code: str) -> str:
+    """Source as hashed for the cache: LF line endings, no trailing blank space at the end.
+
+    Only differences no compiler or interpreter can observe are dropped.
+    """
+    return code.replace("\r\n", "\n").rstrip()
+
+
+class VerdictCache:
+    """Size- and age-bounded LRU of judged responses.
+
+    Keys cover everything a verdict depends on (see `runner.judge_key`),
+    including a hash of the problem's test set, so editing the tests simply
+    stops old entries from being hit; they age out or get evicted.
+    Identical submissions arriving while one is being judged wait for that
+    result instead of running again.
+    """
+
+    def __init__(self, max_entries: int, ttl_sec: int):
+        self.max_entries = max(max_entries, 1)
+        self.ttl_sec = max(ttl_sec, 1)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, ExecuteResponse]]" = OrderedDict()
+        self._inflight: Dict[str, threading.Event] = {}
+
+    def get(self, key: str) -> Optional[Tuple[ExecuteResponse, float]]:
+        """(a copy of the stored response, its age in seconds), or None."""
+        with self._lock:
+            return self._lookup(key)
+
+    def put(self, key: str, response: ExecuteResponse) -> None:
+        if response.verdict not in CACHEABLE_VERDICTS:
+            return
+        if response.verdict == CE and not response.compileTimeMs:
+            # the compiler never ran (sandbox trouble), so resubmitting may well compile
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response.model_copy(deep=True))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_judge(self, key: str, judge: Callable[[], ExecuteResponse]) -> Tuple[ExecuteResponse, Optional[float]]:
+        """Return (response, age in seconds if it came from the cache)."""
+        with self._lock:
+            hit = self._lookup(key)
+            if hit is not None:
+                return hit
+            waiting = self._inflight.get(key)
+            if waiting is None:
+                done = self._inflight[key] = threading.Event()
+                self.misses += 1
+        if waiting is not None:
+            # the same submission is being judged right now
+            waiting.wait()
+            with self._lock:
+                hit = self._lookup(key)
+                if hit is None:
+                    self.misses += 1
+            if hit is not None:
+                return hit
+            # not cacheable (or it failed): judge it ourselves
+            return judge(), None
+        try:
+            response = judge()
+            self.put(key, response)
+            return response, None
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            done.set()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "ttlSec": self.ttl_sec,
+                "hits": self.hits,
+                "misses": self.misses,
+                "inflight": len(self._inflight),
+            }
+
+    def _lookup(self, key: str) -> Optional[Tuple[ExecuteResponse, float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, response = entry
+        age = time.monotonic() - stored_at
+        if age > self.ttl_sec:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response.model_copy(deep=True), age
+
+
+_cache: Optional[VerdictCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_verdict_cache() -> Optional[VerdictCache]:
+    """The process-wide cache, or None when VERDICT_CACHE_ENABLED is off."""
+    global _cache
+    settings = get_settings()
+    if not settings.verdict_cache_enabled:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = VerdictCache(settings.verdict_cache_max_entries, settings.verdict_cache_ttl_sec)
+        return _cache
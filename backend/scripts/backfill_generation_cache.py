@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""Add existing knowledge items to the generation cache.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/backfill_generation_cache.py --batch 1000
+
+New items are cached as they are generated; run this once after the
+20240921_000011 migration so that items generated before it are reused too.
+For each question text the oldest item wins. Safe to re-run: texts already in
+the cache are left alone.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from sqlalchemy import select
+
+from app import models
+from app.config import get_settings
+from app.db import SessionLocal
+from app.services.generation_cache import GenerationCache
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=1000, help="items per commit")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    cache = GenerationCache(settings.generation_cache_near_duplicates, settings.generation_cache_threshold)
+    t0 = time.perf_counter()
+    seen = 0
+    with SessionLocal() as read, SessionLocal() as write:
+        rows = read.execute(
+            select(models.Question.text, models.KnowledgeItem.id)
+            .join(models.KnowledgeItem, models.KnowledgeItem.question_id == models.Question.id)
+            .order_by(models.KnowledgeItem.created_at, models.KnowledgeItem.id)
+            .execution_options(yield_per=args.batch)
+        )
+        for text, item_id in rows:
+            cache.store(write, text, item_id)
+            seen += 1
+            if seen % args.batch == 0:
+                write.commit()
+                print(f"{seen} items, {cache.stats()['stored']} cached")
+        write.commit()
+    print(f"done: {seen} items, {cache.stats()['stored']} new cache entries in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
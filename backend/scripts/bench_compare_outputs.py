@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+"""Micro-benchmark the output comparator against the previous implementation.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/bench_compare_outputs.py --sizes 100000 1000000
+
+For each size it builds an expected output of that many numbers (10 per
+line) and compares it with itself and with an output whose first column is
+off by less than the tolerance. It reports the best-of-N time and the peak
+traced memory of:
+
+  legacy   the previous list-of-lines implementation (inlined below)
+  string   compare_outputs on whole strings
+  chunks   compare_outputs on 64 KiB byte chunks, as read from the sandbox
+
+A mismatch case (differs in the first line) shows the early stop.
+
+With `--check N` it instead checks that tolerant-mode pass/fail agrees with
+the legacy implementation on a list of edge cases (lone \\r and other
+str.splitlines() breaks, \\r\\n split across chunks, inf/nan/1e512, ...) and
+on N random output pairs, each also fed as randomly split byte chunks.
+Exits with status 1 on the first disagreement.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Iterator, List, Tuple
+
+from app.services.judge import compare_outputs
+
+
+# -- previous implementation, kept verbatim for comparison -----------------
+def _legacy_normalize_lines(s: str) -> list[str]:
+    lines = [ln.rstrip() for ln in (s or "").splitlines()]
+    while lines and lines[0] == "":
+        lines.pop(0)
+    while lines and lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def _legacy_try_float(v: str):
+    try:
+        return float(v)
+    except Exception:
+        return None
+
+
+def legacy_compare_outputs(expected: str, actual: str, mode: str = "exact", float_tol: float = 1e-6) -> Tuple[bool, str]:
+    if mode == "exact":
+        return (expected == actual, "")
+    exp_lines = _legacy_normalize_lines(expected)
+    act_lines = _legacy_normalize_lines(actual)
+    if len(exp_lines) != len(act_lines):
+        return (False, "line_count")
+    for e, a in zip(exp_lines, act_lines):
+        e_tokens = e.split()
+        a_tokens = a.split()
+        if len(e_tokens) != len(a_tokens):
+            return (False, "token_count")
+        for et, at in zip(e_tokens, a_tokens):
+            e_num = _legacy_try_float(et)
+            a_num = _legacy_try_float(at)
+            if e_num is not None and a_num is not None:
+                if abs(e_num - a_num) > float_tol:
+                    return (False, "float")
+            elif et != at:
+                return (False, "token")
+    return (True, "")
+# ---------------------------------------------------------------------------
+
+
+def make_outputs(n: int, noise: float) -> Tuple[str, str]:
+    rng = random.Random(n)
+    values = [rng.uniform(-1e6, 1e6) for _ in range(n)]
+    exp_lines, act_lines = [], []
+    for i in range(0, n, 10):
+        row = values[i:i + 10]
+        exp_lines.append(" ".join(f"{v:.6f}" for v in row))
+        # mostly identical tokens, a few differing by less than the tolerance
+        act_lines.append(" ".join(f"{v + noise:.7f}" if j == 0 else f"{v:.6f}" for j, v in enumerate(row)))
+    return "\n".join(exp_lines) + "\n", "\n".join(act_lines) + "\n"
+
+
+def chunked(s: str, size: int = 1 << 16) -> List[bytes]:
+    data = s.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+# (expected, actual) pairs where the streaming tokenizer once diverged
+EDGE_CASES = [
+    ("1 2\r3 4", "1 2\n3 4"),
+    ("1 2\r3 4", "1 2 3 4"),
+    ("1\r\n2", "1\n2"),
+    ("1\r\r2", "1\n\n2"),
+    ("a\fb", "a\nb"),
+    ("a\fb", "a b"),
+    ("a\x0bb\x1cc\x1dd\x1ee\x85f\u2028g\u2029h", "a\nb\nc\nd\ne\nf\ng\nh"),
+    ("a\x1fb", "a b"),
+    ("x\n\r\n\f", "x"),
+    ("inf", "1e512"),
+    ("-inf", "-1e999"),
+    ("inf", "-inf"),
+    ("inf", "5"),
+    ("Infinity", "inf"),
+    ("nan", "NaN"),
+    ("nan", "5"),
+    ("1_000", "1000"),
+    ("\uff11\uff12", "12"),
+    ("1e308", "-1e308"),
+    ("0.1", "+.1000001"),
+    ("infinite", "inf"),
+]
+
+
+def random_output(rng: random.Random, lines: int) -> str:
+    words = ["0", "1", "-1", "3.14159", "1e-7", "1e512", "inf", "-inf", "nan", "Infinity", "1_0", "\uff17", "+.5", "abc", "Yes", "-", "."]
+    breaks = ["\n"] * 6 + ["\r\n", "\r", "\f", "\x0b", "\x85", "\u2028"]
+    spaces = [" "] * 6 + ["  ", "\t", "\x1f", "\xa0"]
+    out = []
+    for _ in range(lines):
+        out.append(rng.choice(spaces).join(rng.choice(words) for _ in range(rng.randrange(0, 4))))
+        out.append(rng.choice(spaces) if rng.random() < 0.2 else "")
+        out.append(rng.choice(breaks))
+    return "".join(out)
+
+
+def mutate(rng: random.Random, text: str) -> str:
+    if not text or rng.random() < 0.3:
+        return text
+    i = rng.randrange(len(text))
+    return text[:i] + rng.choice(["", " ", "\n", "\r", "\r\n", "\f", "1", "0.0000001", "inf", "x"]) + text[i + rng.randrange(0, 3):]
+
+
+def random_chunks(rng: random.Random, text: str) -> List[bytes]:
+    data = text.encode("utf-8")
+    cuts = sorted(rng.sample(range(1, len(data)), min(len(data) - 1, rng.randrange(0, 6)))) if len(data) > 1 else []
+    return [data[a:b] for a, b in zip([0] + cuts, cuts + [len(data)])]
+
+
+def pairs(n: int, seed: int) -> Iterator[Tuple[str, str]]:
+    yield from EDGE_CASES
+    rng = random.Random(seed)
+    for _ in range(n):
+        expected = random_output(rng, rng.randrange(1, 5))
+        yield expected, mutate(rng, expected)
+
+
+def check(n: int, seed: int) -> None:
+    rng = random.Random(seed + 1)
+    for count, (expected, actual) in enumerate(pairs(n, seed), 1):
+        want, _ = legacy_compare_outputs(expected, actual, "tolerant", 1e-6)
+        got = {
+            "string": compare_outputs(expected, actual, "tolerant", 1e-6)[0],
+            "chunks": compare_outputs(random_chunks(rng, expected), random_chunks(rng, actual), "tolerant", 1e-6)[0],
+        }
+        for name, passed in got.items():
+            if passed != want:
+                print(f"{name}: passed={passed}, legacy passed={want} for {expected!r} vs {actual!r}")
+                sys.exit(1)
+    print(f"{count} pairs ({len(EDGE_CASES)} edge cases): tolerant pass/fail matches the legacy implementation")
+
+
+def measure(fn: Callable[[], Tuple[bool, str]], repeat: int) -> Tuple[float, float, bool]:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        passed, _ = fn()
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / (1024 * 1024), passed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--check", type=int, metavar="N", help="check equivalence on N random pairs instead")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.check is not None:
+        check(args.check, args.seed)
+        return
+
+    print(f"{'case':<30}{'impl':<8}{'best ms':>10}{'peak MiB':>10}  passed")
+    for n in args.sizes:
+        expected, actual = make_outputs(n, noise=1e-7)
+        wrong = "x" + actual
+        actual_chunks, wrong_chunks = chunked(actual), chunked(wrong)
+        cases = [
+            (f"{n} numbers, identical", expected, chunked(expected)),
+            (f"{n} numbers, match", actual, actual_chunks),
+            (f"{n} numbers, mismatch", wrong, wrong_chunks),
+        ]
+        for label, act, act_chunks in cases:
+            impls = [
+                ("legacy", lambda: legacy_compare_outputs(expected, act, "tolerant", 1e-6)),
+                ("string", lambda: compare_outputs(expected, act, "tolerant", 1e-6)),
+                ("chunks", lambda: compare_outputs(expected, act_chunks, "tolerant", 1e-6)),
+            ]
+            for name, fn in impls:
+                ms, peak, passed = measure(fn, args.repeat)
+                print(f"{label:<30}{name:<8}{ms:>10.1f}{peak:>10.1f}  {passed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""Compare per-request generation with the batched, concurrent pipeline.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/bench_generation.py --questions 200 --latency-ms 300 --failure-rate 0.1
+
+Uses `MockProvider` with injected latency (and optional failures), and
+in-memory question loading and saving, so no database or LLM key is needed.
+It runs the same set of questions through:
+
+  sequential  `generate_from_question` one question at a time, as
+              POST /generate does for each request
+  pipeline    `GenerationRun` (POST /generate/bulk): provider batches,
+              bounded concurrency, retries with backoff
+
+and prints the wall time and the final progress counters.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from typing import Any, Dict, Sequence
+from uuid import UUID
+
+from app.services.generation import GenerationRun, Loaded
+from app.services.llm_provider import ProviderError
+from app.services.mock_provider import MockProvider
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument("--backoff-ms", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    questions = {uuid.uuid4(): f"面试题 {i}：解释第 {i} 个概念" for i in range(args.questions)}
+    stored: Dict[UUID, Dict[str, Any]] = {}
+
+    def load(ids: Sequence[UUID], overwrite: bool) -> Loaded:
+        return {q: questions[q] for q in ids}, [], []
+
+    def save(generated: Dict[UUID, Dict[str, Any]]) -> Dict[UUID, UUID]:
+        stored.update(generated)
+        return {q: uuid.uuid4() for q in generated}
+
+    provider = MockProvider(args.latency_ms, args.failure_rate, seed=args.seed)
+    t0 = time.perf_counter()
+    failed = 0
+    for text in questions.values():
+        try:
+            provider.generate_from_question(text)
+        except ProviderError:
+            failed += 1
+    sequential = time.perf_counter() - t0
+    print(f"sequential  {sequential:8.2f}s  done={len(questions) - failed} failed={failed} (no retries)")
+
+    progress_updates = []
+    run = GenerationRun(
+        MockProvider(args.latency_ms, args.failure_rate, seed=args.seed),
+        list(questions),
+        concurrency=args.concurrency,
+        max_attempts=args.max_attempts,
+        backoff_ms=args.backoff_ms,
+        report=lambda **fields: progress_updates.append(fields),
+        load=load,
+        save=save,
+    )
+    t0 = time.perf_counter()
+    result = asyncio.run(run.run())
+    pipeline = time.perf_counter() - t0
+    p = run.progress
+    print(
+        f"pipeline    {pipeline:8.2f}s  done={p['done']} failed={p['failed']} retries={p['retries']} "
+        f"progress updates={len(progress_updates)} saved={len(stored)} errors={len(result['errors'])}"
+    )
+    print(f"speedup     {sequential / pipeline:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
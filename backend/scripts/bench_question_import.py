@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""Question import throughput: the former POST /questions loop versus bulk ingestion.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/bench_question_import.py --rows 50000 --baseline-rows 2000
+
+Requires DATABASE_URL to point at a migrated database. Generates synthetic
+questions (with `--duplicates` of them repeated) tagged `import-bench`,
+imports them in each mode, prints rows per second and the speedup over the
+baseline, then deletes everything tagged `import-bench`:
+
+  baseline   what POST /questions did: one ORM object per row, commit, then
+             a refresh SELECT per row (`--batch` items per request)
+  endpoint   POST /questions now: one multi-row INSERT and one SELECT per request
+  insert     QuestionImporter, multi-row INSERT ... RETURNING per chunk
+  copy       QuestionImporter, COPY into a temp table per chunk
+
+The baseline is slow, so it runs on `--baseline-rows` rows; rates are per
+row, so they compare directly. Exits with status 1 when bulk ingestion
+(copy and insert) is not at least 10x faster than the baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from typing import Callable, List
+
+from app import models
+from app.db import SessionLocal
+from app.routers.questions import create_questions
+from app.schemas import BulkQuestionsCreate, QuestionCreate
+from app.services.question_import import QuestionImporter
+
+MARKER = "import-bench"
+TARGET_SPEEDUP = 10
+
+
+def make_questions(n: int, duplicates: float, label: str, rng: random.Random) -> List[QuestionCreate]:
+    run = uuid.uuid4().hex[:8]
+    topics = ["哈希表", "B+ 树", "TCP 拥塞控制", "虚函数", "GIL", "MVCC", "一致性哈希", "LRU 缓存"]
+    out: List[QuestionCreate] = []
+    for i in range(n):
+        if out and rng.random() < duplicates:
+            # same text up to case and spacing: a duplicate after normalization
+            out.append(QuestionCreate(text=" " + out[rng.randrange(len(out))].text.upper().replace(" ", "  "), tags=[MARKER]))
+            continue
+        text = f"[{label} {run}] 第 {i} 题：请解释{rng.choice(topics)}的原理与常见面试追问"
+        out.append(QuestionCreate(text=text, tags=[MARKER, f"t{i % 20}"], difficulty=rng.choice(["easy", "medium", "hard"])))
+    return out
+
+
+def baseline(items: List[QuestionCreate], batch: int) -> None:
+    for start in range(0, len(items), batch):
+        with SessionLocal() as db:
+            created = []
+            for item in items[start:start + batch]:
+                q = models.Question(text=item.text, tags=item.tags, difficulty=item.difficulty)
+                db.add(q)
+                created.append(q)
+            db.commit()
+            for q in created:
+                db.refresh(q)
+
+
+def endpoint(items: List[QuestionCreate], batch: int) -> None:
+    for start in range(0, len(items), batch):
+        with SessionLocal() as db:
+            create_questions(BulkQuestionsCreate(items=items[start:start + batch]), db)
+
+
+def jsonl(items: List[QuestionCreate]) -> List[str]:
+    return [item.model_dump_json() + "\n" for item in items]
+
+
+def importer(method: str, chunk_size: int) -> Callable[[List[str], int], None]:
+    def run(lines: List[str], batch: int) -> None:
+        summary = QuestionImporter(method, chunk_size).run(lines, "jsonl")
+        print(f"    {method}: inserted {summary['inserted']}, duplicates {summary['duplicates']}", flush=True)
+
+    return run
+
+
+def cleanup() -> None:
+    with SessionLocal() as db:
+        db.execute(models.Question.__table__.delete().where(models.Question.tags.contains([MARKER])))
+        db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--baseline-rows", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=100, help="items per POST /questions request")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--duplicates", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # (label, rows, input prepared outside the timing, run)
+    modes = [
+        ("baseline", args.baseline_rows, list, baseline),
+        ("endpoint", args.baseline_rows, list, endpoint),
+        ("insert", args.rows, jsonl, importer("insert", args.chunk_size)),
+        ("copy", args.rows, jsonl, importer("copy", args.chunk_size)),
+    ]
+    rates = {}
+    try:
+        for label, n, prepare, run in modes:
+            data = prepare(make_questions(n, args.duplicates, label, rng))
+            print(f"  {label}: {n} rows", flush=True)
+            t0 = time.perf_counter()
+            run(data, args.batch)
+            rates[label] = n / (time.perf_counter() - t0)
+    finally:
+        cleanup()
+
+    print(f"{'mode':<10}{'rows/s':>12}{'speedup':>10}")
+    for label, *_ in modes:
+        print(f"{label:<10}{rates[label]:>12.0f}{rates[label] / rates['baseline']:>9.1f}x")
+    missed = [m for m in ("insert", "copy") if rates[m] / rates["baseline"] < TARGET_SPEEDUP]
+    print(json.dumps({"target_speedup": TARGET_SPEEDUP, "missed": missed}))
+    if missed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
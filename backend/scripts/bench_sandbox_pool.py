@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Compare sandbox latency with and without the warm container pool.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/bench_sandbox_pool.py --runs 50 --language python
+
+Requires a reachable Docker daemon. Prints p50/p99 wall-clock latency of
+`execute_code` for a cold (create/start/remove per run) and a pooled setup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import statistics
+import time
+
+from app.services.container_pool import get_pool, shutdown_pool
+from app.services.images import get_image_manager
+from app.services.sandbox import LANGUAGE_MAP, execute_code
+
+PROGRAMS = {
+    "python": "print(sum(map(int, input().split())))\n",
+    "cpp": (
+        "#include <iostream>\n"
+        "int main(){long a,b;std::cin>>a>>b;std::cout<<a+b<<std::endl;}\n"
+    ),
+    "java": (
+        "import java.util.*;\n"
+        "public class Main{public static void main(String[] x){"
+        "Scanner s=new Scanner(System.in);System.out.println(s.nextLong()+s.nextLong());}}\n"
+    ),
+    "go": (
+        "package main\nimport \"fmt\"\n"
+        "func main(){var a,b int64;fmt.Scan(&a,&b);fmt.Println(a+b)}\n"
+    ),
+}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def measure(language: str, runs: int, use_pool: bool) -> list[float]:
+    code = PROGRAMS[language]
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        res = execute_code(language, code, "1 2\n", use_pool=use_pool)
+        samples.append((time.perf_counter() - t0) * 1000)
+        if res["status"] != "success" or res["stdout"].strip() != "3":
+            raise SystemExit(f"unexpected result: {res}")
+    return samples
+
+
+def report(label: str, samples: list[float]) -> None:
+    print(
+        f"{label:<8} n={len(samples):<4} "
+        f"p50={percentile(samples, 50):8.1f}ms  "
+        f"p99={percentile(samples, 99):8.1f}ms  "
+        f"mean={statistics.fmean(samples):8.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--language", default="python", choices=sorted(PROGRAMS))
+    args = parser.parse_args()
+    if args.language not in LANGUAGE_MAP:
+        raise SystemExit(f"language {args.language} not configured")
+
+    # warm-up: pulls the image so neither variant pays for it
+    get_image_manager().refresh()
+    execute_code(args.language, PROGRAMS[args.language], "1 2\n", use_pool=False)
+    report("cold", measure(args.language, args.runs, use_pool=False))
+
+    pool = get_pool()
+    pool.start()
+    try:
+        # let the refill thread populate the pool before measuring
+        image = LANGUAGE_MAP[args.language].image
+        deadline = time.monotonic() + 60
+        while pool.stats().get(image, {}).get("size", 0) < pool.size and time.monotonic() < deadline:
+            time.sleep(0.2)
+        report("pooled", measure(args.language, args.runs, use_pool=True))
+        print(f"pool stats: {pool.stats().get(image)}")
+    finally:
+        shutdown_pool()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""Compare keyword search paths over a large synthetic question bank.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/bench_search.py --rows 1000000
+
+Requires DATABASE_URL to point at a database migrated to 20240921_000008
+(pg_trgm, search_vector triggers and GIN indexes). The script COPYs `--rows`
+questions with knowledge items (mixed Chinese/English text, tagged
+`bench-search`) through the triggers, runs each query `--repeat` times
+per path and prints p50/p95 latency with the scans in its plan:
+
+  seqscan   the old `/items?q=` filter, ILIKE with index scans disabled
+  ilike     the same filter, now able to use the gin_trgm_ops index
+  search    the ranked `/search` item query (tsvector OR trigram, scored)
+
+Rows are deleted afterwards unless --keep is given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import random
+import statistics
+import time
+import uuid
+
+from sqlalchemy import func, select, text
+
+from app import models
+from app.db import SessionLocal, engine
+from app.services.search import _item_query
+
+TAG = "bench-search"
+WORDS_EN = [
+    "virtual", "function", "pointer", "hash", "table", "thread", "mutex", "cache", "index", "tree",
+    "heap", "stack", "queue", "graph", "lock", "memory", "kernel", "socket", "process", "vector",
+]
+WORDS_ZH = ["虚函数", "指针", "哈希表", "线程", "互斥锁", "缓存", "索引", "红黑树", "内存", "进程", "协程", "事务"]
+QUERIES = ["virtual function", "mutex", "哈希表", "红黑树 内存", "cache index", "kernel socket"]
+
+
+def sentence(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS_EN) if rng.random() < 0.6 else rng.choice(WORDS_ZH) for _ in range(n))
+
+
+def copy_rows(rows: int, seed: int, chunk: int = 50_000) -> None:
+    rng = random.Random(seed)
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        for start in range(0, rows, chunk):
+            questions, items = io.StringIO(), io.StringIO()
+            for _ in range(min(chunk, rows - start)):
+                qid, iid = uuid.uuid4(), uuid.uuid4()
+                questions.write(f"{qid}\t{sentence(rng, 12)}？\t{{{TAG}}}\tmedium\n")
+                flashcard = json.dumps({"answer": sentence(rng, 30), "pitfalls": [sentence(rng, 6)]}, ensure_ascii=False)
+                items.write(f"{iid}\t{qid}\t{flashcard.replace(chr(92), chr(92) * 2)}\n")
+            questions.seek(0)
+            items.seek(0)
+            cur.copy_expert("COPY questions (id, text, tags, difficulty) FROM STDIN", questions)
+            cur.copy_expert("COPY knowledge_items (id, question_id, flashcard) FROM STDIN", items)
+            raw.commit()
+            print(f"  loaded {min(start + chunk, rows)}/{rows}", flush=True)
+        cur.execute("ANALYZE questions")
+        cur.execute("ANALYZE knowledge_items")
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def legacy_query(q: str):
+    # the /items?q= statement as list_items builds it
+    return (
+        select(models.KnowledgeItem.id)
+        .join(models.Question, models.Question.id == models.KnowledgeItem.question_id)
+        .where(models.Question.text.ilike(f"%{q}%"))
+        .order_by(models.KnowledgeItem.created_at.desc())
+        .limit(20)
+    )
+
+
+def explain(db, stmt) -> str:
+    compiled = stmt.compile(bind=engine, compile_kwargs={"literal_binds": True})
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    nodes, scans = [plan[0]["Plan"]], []
+    while nodes:
+        node = nodes.pop()
+        if "Scan" in node["Node Type"]:
+            scans.append(f"{node['Node Type']} on {node.get('Relation Name', '?')}")
+        nodes.extend(node.get("Plans", []))
+    return ", ".join(sorted(set(scans)))
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def run(db, label: str, build, repeat: int, disable_indexes: bool = False) -> None:
+    samples, plan = [], ""
+    for q in QUERIES:
+        stmt = build(q)
+        if disable_indexes:
+            db.execute(text("SET LOCAL enable_indexscan = off"))
+            db.execute(text("SET LOCAL enable_bitmapscan = off"))
+        plan = explain(db, stmt)
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            db.execute(stmt).all()
+            samples.append((time.perf_counter() - t0) * 1000)
+        db.rollback()
+    print(f"{label:<10}{statistics.median(samples):>10.1f}{percentile(samples, 95):>10.1f}  {plan}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="leave the generated rows in place")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        existing = db.scalar(select(func.count()).select_from(models.Question).where(models.Question.tags.contains([TAG])))
+        if existing < args.rows:
+            print(f"loading {args.rows - existing} rows ...")
+            copy_rows(args.rows - existing, args.seed)
+        print(f"{'path':<10}{'p50 ms':>10}{'p95 ms':>10}  scans")
+        run(db, "seqscan", legacy_query, args.repeat, disable_indexes=True)
+        run(db, "ilike", legacy_query, args.repeat)
+        run(db, "search", lambda q: _item_query(q, 20), args.repeat)
+    finally:
+        if not args.keep:
+            tagged = select(models.Question.id).where(models.Question.tags.contains([TAG]))
+            db.execute(models.KnowledgeItem.__table__.delete().where(models.KnowledgeItem.question_id.in_(tagged)))
+            db.execute(models.Question.__table__.delete().where(models.Question.tags.contains([TAG])))
+            db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
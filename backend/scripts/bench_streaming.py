@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""Time to first content: blocking generation versus streamed sections.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/bench_streaming.py --latency-ms 800 --chunk-delay-ms 600 --runs 5
+
+Uses `MockProvider`, so no database or LLM key is needed. `latency-ms` is
+the provider's time to start answering and `chunk-delay-ms` the time per
+section. For each mode it prints when the first section is available to the
+client and when the whole item is:
+
+  blocking   `agenerate_from_question`, as POST /generate waits for it
+  streaming  `astream_from_question`, as POST /generate/stream sends it
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Tuple
+
+from app.services.mock_provider import MockProvider
+
+
+QUESTION = "Redis 的持久化方式有哪些？各自的优缺点是什么？"
+
+
+async def blocking(provider: MockProvider) -> Tuple[float, float]:
+    t0 = time.perf_counter()
+    await provider.agenerate_from_question(QUESTION)
+    elapsed = time.perf_counter() - t0
+    return elapsed, elapsed
+
+
+async def streaming(provider: MockProvider) -> Tuple[float, float]:
+    t0 = time.perf_counter()
+    first = None
+    async for _ in provider.astream_from_question(QUESTION):
+        if first is None:
+            first = time.perf_counter() - t0
+    return first, time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--chunk-delay-ms", type=float, default=600)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    provider = MockProvider(args.latency_ms, chunk_delay_ms=args.chunk_delay_ms)
+    print(f"{'mode':<11}{'first ms':>10}{'total ms':>10}")
+    for name, mode in (("blocking", blocking), ("streaming", streaming)):
+        samples: List[Tuple[float, float]] = [asyncio.run(mode(provider)) for _ in range(args.runs)]
+        first = statistics.median(s[0] for s in samples) * 1000
+        total = statistics.median(s[1] for s in samples) * 1000
+        print(f"{name:<11}{first:>10.0f}{total:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+"""Check provider routing against local stub LLM servers.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/check_providers.py --requests 200
+
+Starts stub servers (scripts/stub_llm_server.py) on free ports and, through
+`ProviderRouter` + `HttpProvider`, checks that:
+
+  pooling      connections are reused: a shared provider opens about as
+               many connections as there are concurrent callers, while a
+               provider per call (as `get_provider()` used to build) opens
+               one per request
+  weights      traffic splits roughly by weight (3:1)
+  failover     with one provider always failing and one unreachable, every
+               call still succeeds and the failing ones are skipped after
+               LLM_FAILURE_THRESHOLD errors
+  limits       rate_per_sec/burst and max_concurrency are respected
+  streaming    sections arrive one by one through the router
+
+Prints the router's per-provider stats (latency histograms) and exits with
+status 1 if a check fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from app.services.http_provider import HttpProvider
+from app.services.provider_registry import ProviderRouter, build_router
+from stub_llm_server import start
+
+
+failures: List[str] = []
+
+
+def check(name: str, ok: bool, detail: str) -> None:
+    print(f"  [{'ok' if ok else 'FAIL'}] {name}: {detail}")
+    if not ok:
+        failures.append(name)
+
+
+def stub_stats(port: int) -> Dict[str, int]:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats") as response:
+        return json.load(response)
+
+
+def url(server) -> str:
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def run_threads(n: int, concurrency: int, call: Callable[[int], Any]) -> float:
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(call, range(n)))
+    return time.perf_counter() - t0
+
+
+async def run_async(n: int, concurrency: int, call: Callable[[int], Any]) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            await call(i)
+
+    await asyncio.gather(*(one(i) for i in range(n)))
+
+
+def check_pooling(n: int, concurrency: int) -> None:
+    print("pooling")
+    shared = start(latency_ms=5)
+    router = build_router([{"name": "stub", "type": "http", "url": url(shared), "max_connections": concurrency}])
+    run_threads(n, concurrency, lambda i: router.generate_from_question(f"q{i}"))
+    asyncio.run(run_async(n, concurrency, lambda i: router.agenerate_from_question(f"q{i}")))
+    router.close()
+    reused = stub_stats(shared.server_port)
+
+    fresh = start(latency_ms=5)
+
+    def per_call(i: int) -> None:
+        provider = HttpProvider(url(fresh))
+        try:
+            provider.generate_from_question(f"q{i}")
+        finally:
+            provider.close()
+
+    run_threads(n, concurrency, per_call)
+    new = stub_stats(fresh.server_port)
+    check(
+        "connections reused",
+        reused["connections"] <= 2 * concurrency + 2 and new["connections"] >= n,
+        f"shared provider: {reused['connections']} connections for {reused['requests']} requests; "
+        f"provider per call: {new['connections']} for {new['requests']}",
+    )
+
+
+def check_weights(n: int, concurrency: int) -> None:
+    print("weights")
+    heavy, light = start(latency_ms=2), start(latency_ms=2)
+    router = build_router([
+        {"name": "heavy", "type": "http", "url": url(heavy), "weight": 3},
+        {"name": "light", "type": "http", "url": url(light), "weight": 1},
+    ])
+    run_threads(n, concurrency, lambda i: router.generate_from_question(f"q{i}"))
+    router.close()
+    h, l = stub_stats(heavy.server_port)["requests"], stub_stats(light.server_port)["requests"]
+    check("3:1 split", 2.0 <= h / max(l, 1) <= 4.5, f"heavy={h} light={l}")
+
+
+def check_failover(n: int, concurrency: int) -> ProviderRouter:
+    print("failover")
+    broken, healthy = start(latency_ms=2, failure_rate=1.0), start(latency_ms=2)
+    router = build_router(
+        [
+            {"name": "broken", "type": "http", "url": url(broken), "weight": 5},
+            {"name": "down", "type": "http", "url": "http://127.0.0.1:9", "weight": 5},
+            {"name": "healthy", "type": "http", "url": url(healthy), "weight": 1},
+        ],
+        failure_threshold=3,
+        cooldown_sec=60,
+    )
+    errors = []
+
+    def call(i: int) -> None:
+        try:
+            router.generate_from_question(f"q{i}")
+        except Exception as exc:
+            errors.append(exc)
+
+    run_threads(n, concurrency, call)
+    stats = router.stats()
+    check("all calls succeed", not errors, f"{len(errors)} errors, {stats['failovers']} failovers")
+    broken_calls = stats["providers"]["broken"]["calls"]
+    check(
+        "failing providers skipped",
+        broken_calls <= 3 + concurrency and not stats["providers"]["broken"]["healthy"],
+        f"broken provider called {broken_calls} times, down {stats['providers']['down']['calls']}",
+    )
+    router.close()
+    return router
+
+
+def check_limits() -> None:
+    print("limits")
+    server = start(latency_ms=10)
+    rate, burst, duration = 40, 5, 2.0
+    router = build_router([
+        {"name": "limited", "type": "http", "url": url(server), "rate_per_sec": rate, "burst": burst, "max_concurrency": 2},
+    ])
+    stop = time.perf_counter() + duration
+
+    def call(i: int) -> None:
+        while time.perf_counter() < stop:
+            router.generate_from_question("q")
+
+    run_threads(8, 8, call)
+    stats = stub_stats(server.server_port)
+    served = stats["requests"]
+    # 2 in flight at 10 ms each would allow ~200/s: the bucket is what holds it back
+    check(
+        "rate limit",
+        rate * duration * 0.8 <= served <= rate * (duration + 0.1) + burst,
+        f"{served} requests in {duration}s at {rate}/s (burst {burst})",
+    )
+    check("concurrency limit", stats["max_in_flight"] <= 2, f"peak in flight at the server {stats['max_in_flight']}")
+    check("callers waited", router.stats()["waits"] > 0, f"{router.stats()['waits']} waits")
+    router.close()
+
+
+def check_streaming() -> None:
+    print("streaming")
+    server = start(latency_ms=50, chunk_delay_ms=50)
+    router = build_router([{"name": "stub", "type": "http", "url": url(server)}])
+
+    async def stream() -> List[float]:
+        t0 = time.perf_counter()
+        return [time.perf_counter() - t0 async for _ in router.astream_from_question("q")]
+
+    times = asyncio.run(stream())
+    check(
+        "sections streamed",
+        len(times) == 4 and times[0] < times[-1] - 0.1,
+        "arrived at " + ", ".join(f"{t * 1000:.0f}ms" for t in times),
+    )
+    router.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    check_pooling(args.requests, args.concurrency)
+    check_weights(args.requests, args.concurrency)
+    router = check_failover(args.requests, args.concurrency)
+    check_limits()
+    check_streaming()
+    print("failover router stats:")
+    print(json.dumps(router.stats(), indent=2))
+    if failures:
+        print(f"{len(failures)} check(s) failed: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""Check that the list endpoints' queries are served by indexes.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/check_query_plans.py --rows 200000
+
+Requires DATABASE_URL to point at a database migrated to head. The script
+seeds `--rows` questions with knowledge items and `--rows / 10` problems
+(tagged `plan-check`, with spread-out tags and difficulties) via COPY, then
+ANALYZEs the tables. Next it calls the `/items` and `/problems` handlers
+directly (on the async engine) and records every statement they send. Each statement is run
+through `EXPLAIN (FORMAT JSON)` with its real parameters, and the check
+fails if any plan contains a sequential scan of questions,
+knowledge_items or problems. It exits with status 1 when a check fails.
+
+Seeded rows are deleted afterwards unless --keep is given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import io
+import json
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Tuple
+
+from sqlalchemy import event, select
+
+from app import models
+from app.db import AsyncSessionLocal, SessionLocal, async_engine, engine
+from app.routers.items import list_items
+from app.routers.problems import list_problems
+from app.services.pagination import encode_cursor
+
+MARKER = "plan-check"
+TAGS = [f"tag{i:02d}" for i in range(40)]
+DIFFICULTIES = ["easy", "medium", "hard"]
+WATCHED = {"questions", "knowledge_items", "problems"}
+
+
+def seed(rows: int, seed_: int, chunk: int = 50_000) -> None:
+    rng = random.Random(seed_)
+    start_at = datetime.now(timezone.utc) - timedelta(days=365)
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        for start in range(0, rows, chunk):
+            questions, items, problems = io.StringIO(), io.StringIO(), io.StringIO()
+            for n in range(start, min(start + chunk, rows)):
+                qid, iid = uuid.uuid4(), uuid.uuid4()
+                created = (start_at + timedelta(seconds=n * 30)).isoformat()
+                tags = ",".join([MARKER, *rng.sample(TAGS, rng.randint(1, 3))])
+                difficulty = rng.choice(DIFFICULTIES)
+                questions.write(f"{qid}\tquestion {n} about {rng.choice(TAGS)}\t{{{tags}}}\t{difficulty}\t{created}\n")
+                items.write(f"{iid}\t{qid}\t{{\"answer\": \"answer {n}\", \"pitfalls\": []}}\t{created}\n")
+                if n % 10 == 0:
+                    problems.write(
+                        f"{uuid.uuid4()}\tproblem {n}\tdescription {n}\t{difficulty}\tpass\tpython\t{{{tags}}}\t{created}\n"
+                    )
+            for table, columns, buf in (
+                ("questions", "id, text, tags, difficulty, created_at", questions),
+                ("knowledge_items", "id, question_id, flashcard, created_at", items),
+                ("problems", "id, title, description, difficulty, solution_code, solution_language, tags, created_at", problems),
+            ):
+                buf.seek(0)
+                cur.copy_expert(f"COPY {table} ({columns}) FROM STDIN", buf)
+            raw.commit()
+            print(f"  seeded {min(start + chunk, rows)}/{rows}", flush=True)
+        for table in sorted(WATCHED):
+            cur.execute(f"ANALYZE {table}")
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def cleanup(db) -> None:
+    marked = select(models.Question.id).where(models.Question.tags.contains([MARKER]))
+    db.execute(models.KnowledgeItem.__table__.delete().where(models.KnowledgeItem.question_id.in_(marked)))
+    db.execute(models.Question.__table__.delete().where(models.Question.tags.contains([MARKER])))
+    db.execute(models.Problem.__table__.delete().where(models.Problem.tags.contains([MARKER])))
+    db.commit()
+
+
+def seq_scans(plan: dict) -> List[str]:
+    nodes, found = [plan], []
+    while nodes:
+        node = nodes.pop()
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in WATCHED:
+            found.append(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return found
+
+
+def scans(plan: dict) -> List[str]:
+    nodes, found = [plan], []
+    while nodes:
+        node = nodes.pop()
+        if node.get("Relation Name") in WATCHED or node.get("Index Name"):
+            found.append(f"{node['Node Type']}({node.get('Index Name') or node.get('Relation Name')})")
+        nodes.extend(node.get("Plans", []))
+    return found
+
+
+async def capture(call: Callable[[], Awaitable[object]]) -> List[Tuple[str, object]]:
+    """Statements (with parameters) sent to the database while `call` runs."""
+    statements: List[Tuple[str, object]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        await call()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+    return statements
+
+
+def cursor_after(db, n: int, model) -> str:
+    # a cursor deep into the listing, to check that later pages stay on the index
+    row = db.execute(select(model.created_at, model.id).order_by(model.created_at.desc(), model.id.desc()).offset(n).limit(1)).one()
+    return encode_cursor(row.created_at, row.id)
+
+
+async def check(cases, db) -> int:
+    failures = 0
+    conn = await db.connection()
+    for label, call in cases:
+        for statement, parameters in await capture(call):
+            if not any(t in statement for t in WATCHED):
+                continue
+            result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+            plan = result.scalar()
+            plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+            bad = seq_scans(plan)
+            failures += bool(bad)
+            status = f"FAIL seq scan on {', '.join(sorted(set(bad)))}" if bad else "ok"
+            kind = "count" if "count(" in statement.lower() else "page"
+            print(f"{label:<26}{kind:<7}{status:<36}{' '.join(scans(plan))}")
+    await db.rollback()
+    return failures
+
+
+async def run_checks(deep_item: str, deep_problem: str) -> int:
+    async with AsyncSessionLocal() as db:
+
+        def items(**kw):
+            params = dict(q=None, tag=None, difficulty=None, page=1, page_size=20, cursor=None, total=None)
+            params.update(kw)
+            return lambda: list_items(db=db, **params)
+
+        def problems(**kw):
+            params = dict(difficulty=None, tag=None, cursor="", page_size=20, total="none")
+            params.update(kw)
+            return lambda: list_problems(db=db, **params)
+
+        # Exact totals of broad filters (every row, or a third of them for a
+        # difficulty) are scans by nature; those cases ask for approx/none.
+        cases = [
+            ("items page 1", items(total="approx")),
+            ("items cursor first", items(cursor="")),
+            ("items cursor deep", items(cursor=deep_item)),
+            ("items tag + count", items(tag="tag07", total="exact")),
+            ("items tag cursor deep", items(tag="tag07", cursor=deep_item)),
+            ("items difficulty cursor", items(difficulty="hard", cursor="")),
+            ("items q + count", items(q="about tag13", total="exact")),
+            ("problems cursor first", problems()),
+            ("problems cursor deep", problems(cursor=deep_problem)),
+            ("problems tag + count", problems(tag="tag21", total="exact")),
+            ("problems difficulty", problems(difficulty="medium", cursor=deep_problem)),
+        ]
+        failures = await check(cases, db)
+    await async_engine.dispose()
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--keep", action="store_true", help="leave the seeded rows in place")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        existing = db.scalar(select(models.Question.id).where(models.Question.tags.contains([MARKER])).limit(1))
+        if existing is None:
+            print(f"seeding {args.rows} rows ...")
+            seed(args.rows, args.seed)
+        deep_item = cursor_after(db, args.rows // 2, models.KnowledgeItem)
+        deep_problem = cursor_after(db, args.rows // 20, models.Problem)
+        db.rollback()
+        failures = asyncio.run(run_checks(deep_item, deep_problem))
+    finally:
+        if not args.keep:
+            cleanup(db)
+        db.close()
+    print(f"{failures} statement(s) with sequential scans" if failures else "all list queries use indexes")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""Import a question bank from JSONL or CSV.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/import_questions.py questions.jsonl
+    PYTHONPATH=backend python backend/scripts/import_questions.py bank.csv --method insert --chunk-size 2000
+    cat questions.jsonl | PYTHONPATH=backend python backend/scripts/import_questions.py - --format jsonl
+
+JSONL: one {"text", "tags", "difficulty"} object per line. CSV: a header row
+with `text` and optionally `tags` (separated by `|`) and `difficulty`. The
+file is streamed in chunks (COPY by default, or multi-row INSERT); questions
+whose normalized text is already stored, or repeated in the file, are
+skipped. Progress is printed after each chunk and a summary at the end.
+POST /api/v1/questions/import does the same as a background job.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+
+from app.config import get_settings
+from app.services.question_import import FORMATS, METHODS, QuestionImporter
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="file to import, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--method", choices=METHODS, default="copy")
+    parser.add_argument("--chunk-size", type=int, default=get_settings().question_import_chunk_size)
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.path)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        parser.error("cannot tell the format from the file name; pass --format")
+
+    def report(read: int, inserted: int, duplicates: int, invalid: int, rows_per_sec: int) -> None:
+        print(f"  read {read}  inserted {inserted}  duplicates {duplicates}  invalid {invalid}  ({rows_per_sec} rows/s)", flush=True)
+
+    importer = QuestionImporter(args.method, args.chunk_size, report)
+    if args.path == "-":
+        summary = importer.run(sys.stdin, fmt)
+    else:
+        with open(args.path, encoding="utf-8-sig", newline="") as f:
+            summary = importer.run(f, fmt)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""Load-test the hot read endpoints: async handlers versus the previous sync ones.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/load_test_reads.py --concurrency 16 64 256 --duration 10
+
+Requires DATABASE_URL to point at a migrated database with at least one
+knowledge item and one problem. The script starts the app with uvicorn in a
+child process and also mounts sync twins of the four endpoints under
+`/sync/api/v1`. The twins are plain `def` handlers on the psycopg2 session,
+as the endpoints were before, so FastAPI runs them in its threadpool (40
+threads by default). A stdlib keep-alive HTTP client then keeps
+`--concurrency` requests in flight for `--duration` seconds per endpoint,
+mode and level. It prints requests per second, p50/p99 latency in ms and
+the number of errors.
+
+Both engines use the DB_POOL_SIZE / DB_MAX_OVERFLOW pool settings, so raise
+those when testing high concurrency.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import multiprocessing
+import os
+import time
+from typing import List, Tuple
+from uuid import UUID
+
+
+def serve(port: int) -> None:
+    # no sandboxes are needed for read endpoints
+    os.environ.setdefault("SANDBOX_POOL_ENABLED", "false")
+
+    import uvicorn
+    from fastapi import APIRouter, Depends, HTTPException
+    from sqlalchemy import func, select
+    from sqlalchemy.orm import Session, joinedload
+
+    from app import models
+    from app.db import get_db
+    from app.main import app
+    from app.routers.problems import _list_item, _read_samples
+    from app.serializers import serialize_knowledge_item
+    from app.services.testcases import get_test_case_store
+
+    sync_router = APIRouter(prefix="/sync/api/v1")
+
+    @sync_router.get("/items/{item_id}")
+    def sync_get_item(item_id: UUID, db: Session = Depends(get_db)):
+        item = db.get(models.KnowledgeItem, item_id)
+        if not item:
+            raise HTTPException(status_code=404, detail="item not found")
+        return serialize_knowledge_item(item)
+
+    @sync_router.get("/items")
+    def sync_list_items(page: int = 1, page_size: int = 20, db: Session = Depends(get_db)):
+        stmt = (
+            select(models.KnowledgeItem)
+            .options(joinedload(models.KnowledgeItem.question))
+            .order_by(models.KnowledgeItem.created_at.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+        rows = db.execute(stmt).scalars().unique().all()
+        total = db.scalar(select(func.count(models.KnowledgeItem.id))) or 0
+        return {"items": [serialize_knowledge_item(r) for r in rows], "total": total}
+
+    @sync_router.get("/problems")
+    def sync_list_problems(db: Session = Depends(get_db)):
+        rows = db.execute(select(models.Problem).order_by(models.Problem.created_at.desc())).scalars().all()
+        return [_list_item(p) for p in rows]
+
+    @sync_router.get("/problems/{problem_id}")
+    def sync_get_problem(problem_id: UUID, db: Session = Depends(get_db)):
+        p = db.get(models.Problem, problem_id)
+        if not p:
+            raise HTTPException(status_code=404, detail="problem not found")
+        samples = [c for c in p.cases if c.is_sample]
+        paths = get_test_case_store().materialize(db, [h for c in samples for h in (c.input_sha256, c.output_sha256)])
+        return {"id": p.id, "title": p.title, "test_cases": _read_samples(samples, paths)}
+
+    app.include_router(sync_router)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+async def _get(reader, writer, path: str) -> int:
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: bench\r\n\r\n".encode("ascii"))
+    await writer.drain()
+    status_line = await reader.readline()
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return int(status_line.split()[1])
+
+
+async def _client(port: int, path: str, deadline: float, latencies: List[float], errors: List[int]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            status = await _get(reader, writer, path)
+            if status == 200:
+                latencies.append((time.perf_counter() - t0) * 1000)
+            else:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def load(port: int, path: str, concurrency: int, duration: float) -> Tuple[float, List[float], int]:
+    latencies: List[float] = []
+    errors: List[int] = []
+    deadline = time.perf_counter() + duration
+    results = await asyncio.gather(
+        *[_client(port, path, deadline, latencies, errors) for _ in range(concurrency)], return_exceptions=True
+    )
+    failed = sum(1 for r in results if isinstance(r, Exception))
+    return len(latencies) / duration, latencies, len(errors) + failed
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+async def wait_ready(port: int, timeout: float = 30) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            await _get(reader, writer, "/health")
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+def sample_ids() -> Tuple[str, str]:
+    from sqlalchemy import select
+
+    from app import models
+    from app.db import SessionLocal
+
+    with SessionLocal() as db:
+        item_id = db.scalar(select(models.KnowledgeItem.id).limit(1))
+        problem_id = db.scalar(select(models.Problem.id).limit(1))
+    if item_id is None or problem_id is None:
+        raise SystemExit("needs at least one knowledge item and one problem")
+    return str(item_id), str(problem_id)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    item_id, problem_id = sample_ids()
+    endpoints = ["/items?page=1&page_size=20", f"/items/{item_id}", "/problems", f"/problems/{problem_id}"]
+
+    server = multiprocessing.Process(target=serve, args=(args.port,), daemon=True)
+    server.start()
+    try:
+        asyncio.run(wait_ready(args.port))
+        print(f"{'endpoint':<30}{'mode':<7}{'conc':>6}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for endpoint in endpoints:
+            for concurrency in args.concurrency:
+                for mode, prefix in (("sync", "/sync/api/v1"), ("async", "/api/v1")):
+                    rps, latencies, errors = asyncio.run(load(args.port, prefix + endpoint, concurrency, args.duration))
+                    print(
+                        f"{endpoint[:29]:<30}{mode:<7}{concurrency:>6}{rps:>10.1f}"
+                        f"{percentile(latencies, 50):>10.1f}{percentile(latencies, 99):>10.1f}{errors:>8}"
+                    )
+    finally:
+        server.terminate()
+        server.join()
+
+
+if __name__ == "__main__":
+    main()
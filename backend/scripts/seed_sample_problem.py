@@ -13,6 +13,7 @@ import uuid
 
 from app.db import SessionLocal
 from app.models import Problem
+from app.services.testcases import save_cases
 
 SAMPLE_PROBLEM_ID = uuid.UUID("11111111-1111-1111-1111-111111111111")
 
@@ -68,9 +69,9 @@ def main() -> None:
             difficulty=SAMPLE["difficulty"],
             solution_language=SAMPLE["solution_language"],
             solution_code=SAMPLE["solution_code"],
-            test_cases=SAMPLE["test_cases"],
         )
         session.add(problem)
+        save_cases(session, problem, ((tc["input"], tc["expectedOutput"], False) for tc in SAMPLE["test_cases"]))
         session.commit()
         print(f"Seeded problem {problem.title} with id {problem.id}")
     finally:
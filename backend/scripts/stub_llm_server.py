@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""Stub LLM HTTP server speaking the `HttpProvider` protocol.
+
+Usage:
+    PYTHONPATH=backend python backend/scripts/stub_llm_server.py --port 9001 --latency-ms 300 --failure-rate 0.1
+
+Answers with `MockProvider` content after `--latency-ms` (plus
+`--chunk-delay-ms` per section), failing `--failure-rate` of the prompts with
+HTTP 503 (or an error entry in a batch, or an error line mid-stream).
+Connections are kept alive (HTTP/1.1). GET /stats returns the number of
+requests, of TCP connections accepted (which shows whether clients reuse
+connections) and the peak of concurrent requests. Point the backend at it with:
+
+    LLM_PROVIDERS='[{"name": "stub", "type": "http", "url": "http://127.0.0.1:9001"}]'
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+from app.services.llm_provider import SECTIONS
+from app.services.mock_provider import MockProvider
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, latency_ms: float = 0, failure_rate: float = 0.0, chunk_delay_ms: float = 0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency_sec = latency_ms / 1000
+        self.chunk_delay_sec = chunk_delay_ms / 1000
+        self.failure_rate = failure_rate
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "connections": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self.lock:
+            self.counters[key] += n
+            if key == "in_flight":
+                self.counters["max_in_flight"] = max(self.counters["max_in_flight"], self.counters["in_flight"])
+
+    def fails(self) -> bool:
+        if self.failure_rate and random.random() < self.failure_rate:
+            self.count("failures")
+            return True
+        return False
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubServer
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path != "/stats":
+            return self._json(404, {"error": "not found"})
+        with self.server.lock:
+            self._json(200, dict(self.server.counters))
+
+    def do_POST(self) -> None:
+        self.server.count("requests")
+        self.server.count("in_flight")
+        try:
+            self._post()
+        finally:
+            self.server.count("in_flight", -1)
+
+    def _post(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        s = self.server
+        if self.path == "/generate":
+            time.sleep(s.latency_sec + s.chunk_delay_sec * len(SECTIONS))
+            if s.fails():
+                return self._json(503, {"error": "stub: injected failure"})
+            return self._json(200, MockProvider._payload(body["question"]))
+        if self.path == "/generate/batch":
+            time.sleep(s.latency_sec + s.chunk_delay_sec * len(SECTIONS))
+            results = [{"error": "stub: injected failure"} if s.fails() else MockProvider._payload(q) for q in body["questions"]]
+            return self._json(200, {"results": results})
+        if self.path == "/generate/stream":
+            return self._stream(body["question"], body.get("sections") or list(SECTIONS))
+        self._json(404, {"error": "not found"})
+
+    def _stream(self, question: str, sections: list) -> None:
+        s = self.server
+        time.sleep(s.latency_sec)
+        fail_at = random.randrange(len(sections) + 1) if sections and s.fails() else None
+        if fail_at == 0:
+            return self._json(503, {"error": "stub: injected failure"})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        payload = MockProvider._payload(question)
+        for i, name in enumerate(sections, 1):
+            time.sleep(s.chunk_delay_sec)
+            if i == fail_at:
+                self._chunk({"error": f"stub: injected failure before {name}"})
+                break
+            self._chunk({"section": name, "value": payload[name]})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, data: Dict[str, Any]) -> None:
+        line = (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+    def _json(self, status: int, data: Dict[str, Any]) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start(port: int = 0, **options: Any) -> StubServer:
+    """Serve in a background thread; port 0 picks a free one (see `server_port`)."""
+    server = StubServer(port, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--chunk-delay-ms", type=float, default=0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubServer(args.port, args.latency_ms, args.failure_rate, args.chunk_delay_ms)
+    print(f"stub LLM server on http://127.0.0.1:{server.server_port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()